@@ -33,8 +33,9 @@ from SeleniumLibrary.keywords import (AlertKeywords,
                                       TableElementKeywords,
                                       WaitingKeywords)
 from SeleniumLibrary.locators import ElementFinder, TableElementFinder
-from SeleniumLibrary.utils import (BrowserCache, Deprecated, LibraryListener,
-                                   timestr_to_secs)
+from SeleniumLibrary.utils import (BrowserCache, Deprecated, events,
+                                   is_noney, is_truthy, LibraryListener,
+                                   PollStrategy, timestr_to_secs)
 
 
 __version__ = '3.0.0b4.dev1'
@@ -159,8 +160,12 @@ class SeleniumLibrary(DynamicCore):
 
     - The ``strategy:value`` syntax is only supported by SeleniumLibrary 3.0
       and newer.
-    - Using the ``sizzle`` strategy or its alias ``jquery`` requires that
-      the system under test contains the jQuery library.
+    - The ``sizzle`` strategy and its alias ``jquery`` use the jQuery
+      library if the system under test contains it. Otherwise a minimal
+      built-in selector engine is used. It supports CSS selectors and the
+      ``:contains``, ``:visible``, ``:hidden``, ``:first``, ``:last``,
+      ``:even``, ``:odd``, ``:eq``, ``:gt`` and ``:lt`` jQuery extensions,
+      but not the ``+`` and ``~`` combinators together with them.
     - Prior to SeleniumLibrary 3.0, table related keywords only supported
       ``xpath``, ``css`` and ``sizzle/jquery`` strategies.
 
@@ -177,6 +182,24 @@ class SeleniumLibrary(DynamicCore):
 
     The support for the ``(//`` prefix is new in SeleniumLibrary 3.0.
 
+    === Frame paths ===
+
+    Elements inside frames can be located without `Select Frame` by
+    prefixing the locator with one or more ``frame:<css selector>`` parts
+    separated with ``>>``. Frame selectors are resolved starting from the
+    top level document regardless of the currently selected frame.
+
+    | `Click Element` | frame:#outer >> frame:#inner >> css:button |
+
+    Same-origin frames are resolved with one JavaScript call. The frame
+    containing the element stays selected while the keyword runs, and
+    consecutive locators using the same frame path in that keyword reuse
+    it without any extra WebDriver calls. After the keyword, and when a
+    locator without a frame path is used, the frame that was selected
+    earlier is selected again. WebElements got using frame paths can
+    therefore not be used in later keywords without selecting their
+    frame with `Select Frame`.
+
     == Using WebElements ==
 
     In addition to specifying a locator as a string, it is possible to use
@@ -211,6 +234,18 @@ class SeleniumLibrary(DynamicCore):
 
     | `Click Element` | custom:example |
 
+    Running a keyword for every lookup has some overhead. Simple
+    strategies can instead be registered as locator templates, where
+    ``{criteria}`` is replaced with the locator value, or as JavaScript
+    snippets prefixed with ``javascript:`` or ``js:``. Templates are
+    handled exactly like the locators they expand to, and scripts get the
+    locator value and the possible parent element as ``arguments[0]`` and
+    ``arguments[1]``:
+
+    | `Add Location Strategy` | data | css:[data-test="{criteria}"] |
+    | `Add Location Strategy` | text | js:return [...document.querySelectorAll('button')].filter(e => e.textContent === arguments[0]); |
+    | `Click Element`         | data:submit |
+
     See the `Add Location Strategy` keyword for more details.
 
     = Timeouts, waits and delays =
@@ -232,6 +267,40 @@ class SeleniumLibrary(DynamicCore):
     when `importing` the library. See `time format` below for supported
     timeout syntax.
 
+    == Poll strategy ==
+
+    ``Wait ...`` keywords check their condition first immediately and then
+    repeatedly until it is true or the timeout expires. By default the
+    condition is checked every 0.2 seconds. The poll strategy makes the
+    interval configurable:
+
+    - ``initial``: interval after the first check, 0.2 seconds by default,
+    - ``backoff``: multiplier for each following interval, 1 by default,
+    - ``max_interval``: maximum interval, not limited by default,
+    - ``jitter``: fraction by which intervals are randomly changed to
+      avoid synchronized polling, 0 by default.
+
+    For example, ``initial=50 ms, backoff=2, max_interval=1 s`` notices
+    fast conditions quickly without polling slow ones too often. The
+    strategy can be set with the ``wait_poll_strategy`` argument when
+    `importing` the library, with `Set Wait Poll Strategy` and for one
+    keyword call with the ``poll`` argument of ``Wait ...`` keywords.
+    The last check is always done when the timeout expires, and the
+    number of checks is logged on the debug level.
+
+    `Wait Until Page Contains Element`, `Wait Until Page Does Not Contain
+    Element`, `Wait Until Element Is Visible`, `Wait Until Element Is Not
+    Visible`, `Wait Until Element Contains` and `Wait Until Element Does
+    Not Contain` do not need to poll when the locator can be evaluated in
+    the browser. They wait inside the page using a mutation observer and
+    continue as soon as the page changes so that the condition becomes
+    true. Visibility and text are still verified with the normal checks
+    afterwards. If the page is navigated away or the wait in the browser
+    fails otherwise, the keywords continue by polling for the remaining
+    time. The ``initial`` interval is used for periodic checks in the
+    page to notice changes that do not cause mutations, such as finished
+    animations.
+
     == Implicit wait ==
 
     Implicit wait specifies the maximum time how long Selenium waits when
@@ -240,6 +309,12 @@ class SeleniumLibrary(DynamicCore):
     the library. See [http://seleniumhq.org/docs/04_webdriver_advanced.html|
     Selenium documentation] for more information about this functionality.
 
+    Keywords verifying that an element does not exist, such as `Page Should
+    Not Contain Element`, `Element Should Not Be Visible` and `Wait Until
+    Page Does Not Contain Element`, do not use the implicit wait. Neither
+    do `Click Button` and `Click Image` when checking which of the
+    alternative element types matches, unless no element is found at all.
+
     See `time format` below for supported syntax.
 
     == Selenium speed ==
@@ -306,7 +381,8 @@ class SeleniumLibrary(DynamicCore):
 
     def __init__(self, timeout=5.0, implicit_wait=0.0,
                  run_on_failure='Capture Page Screenshot',
-                 screenshot_root_directory=None):
+                 screenshot_root_directory=None, locator_statistics=None,
+                 max_elements=None, wait_poll_strategy=None):
 
         """SeleniumLibrary can be imported with several optional arguments.
 
@@ -319,14 +395,33 @@ class SeleniumLibrary(DynamicCore):
         - ``screenshot_root_directory``:
           Location where possible screenshots are created. If not given,
           the directory where the log file is written is used.
+        - ``locator_statistics``:
+          Collect statistics about locating elements. If the value ends
+          with ``.json`` or ``.csv``, statistics are also written to that
+          file, relative to the output directory, at the end of each suite.
+          Any other true value only enables collecting them. See `Log
+          Locator Statistics` for details.
+        - ``max_elements``:
+          Maximum number of elements returned when finding all elements
+          matching a locator, for example, with `Get WebElements`. If more
+          elements match, a warning is logged and only the first
+          ``max_elements`` elements are returned. Not limited by default.
+        - ``wait_poll_strategy``:
+          Default `poll strategy` used by ``Wait ...`` keywords, for
+          example, ``initial=50 ms, backoff=2, max_interval=1 s``.
         """
         self.timeout = timestr_to_secs(timeout)
+        self.poll_strategy = PollStrategy.parse(wait_poll_strategy or '')
         self.implicit_wait = timestr_to_secs(implicit_wait)
         self.speed = 0.0
         self.run_on_failure_keyword \
             = RunOnFailureKeywords.resolve_keyword(run_on_failure)
         self._running_on_failure_keyword = False
+        self._keyword_depth = 0
         self.screenshot_root_directory = screenshot_root_directory
+        self.network_idle_wait = None
+        self.framework_sync = None
+        self._waiting = WaitingKeywords(self)
         libraries = [
             AlertKeywords(self),
             BrowserManagementKeywords(self),
@@ -339,13 +434,24 @@ class SeleniumLibrary(DynamicCore):
             ScreenshotKeywords(self),
             SelectElementKeywords(self),
             TableElementKeywords(self),
-            WaitingKeywords(self)
+            self._waiting
         ]
         self._browsers = BrowserCache()
         DynamicCore.__init__(self, libraries)
         self.ROBOT_LIBRARY_LISTENER = LibraryListener()
         self.element_finder = ElementFinder(self)
         self.table_element_finder = TableElementFinder(self)
+        if not is_noney(max_elements):
+            self.element_finder.max_elements = int(max_elements)
+        if is_truthy(locator_statistics):
+            self._enable_locator_statistics(locator_statistics)
+
+    def _enable_locator_statistics(self, report):
+        profiler = self.element_finder.profiler
+        profiler.enabled = True
+        if str(report).lower().endswith(('.json', '.csv')):
+            profiler.report = report
+            events.on('suite_end', profiler.write_report)
 
     _speed_in_secs = Deprecated('_speed_in_secs', 'speed')
     _timeout_in_secs = Deprecated('_timeout_in_secs', 'timeout')
@@ -356,7 +462,18 @@ class SeleniumLibrary(DynamicCore):
 
     def run_keyword(self, name, args, kwargs):
         try:
-            return DynamicCore.run_keyword(self, name, args, kwargs)
+            self._waiting.wait_before_keyword(name)
+            self._keyword_depth += 1
+            try:
+                result = DynamicCore.run_keyword(self, name, args, kwargs)
+            finally:
+                self._keyword_depth -= 1
+                # Keywords run by other keywords, for example by custom
+                # locator strategies, must not unselect frames in use.
+                if not self._keyword_depth:
+                    self.element_finder.restore_frames()
+            self._waiting.wait_after_keyword(name)
+            return result
         except Exception:
             self.failure_occurred()
             raise
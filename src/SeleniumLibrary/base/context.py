@@ -14,8 +14,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from SeleniumLibrary.utils import escape_xpath_value
-
 
 class ContextAware(object):
 
@@ -49,7 +47,8 @@ class ContextAware(object):
 
         :param locator: Locator to use when searching the element.
             See library documentation for the supported locator syntax.
-        :param tag: Limit searching only to these elements.
+        :param tag: Limit searching only to these elements. Can also be
+            a tuple of tags in priority order.
         :param first_only: Return only first matching element if true,
             a list of elements otherwise.
         :param required: Raise `ElementNotFound` if element not found when
@@ -65,20 +64,48 @@ class ContextAware(object):
         return self.element_finder.find(locator, tag, first_only,
                                         required, parent)
 
-    def find_elements(self, locator, tag=None, parent=None):
+    def find_elements(self, locator, tag=None, parent=None, limit=None,
+                      offset=0):
         """Find all elements matching `locator`.
 
         Always returns a list of `WebElement` objects. If no matching element
         is found, the list is empty. Otherwise semantics are exactly same
         as with :meth:`find_element`.
+
+        :param limit: Return at most this many elements.
+        :param offset: Skip this many matching elements first.
         """
-        return self.find_element(locator, tag, False, False, parent)
+        return self.element_finder.find(locator, tag, False, False, parent,
+                                        limit, offset)
+
+    def count_elements(self, locator, tag=None, parent=None):
+        """Count elements matching `locator` without returning them.
+
+        Arguments have the same semantics as with :meth:`find_elements`.
+        Counting is faster than finding elements when the locator matches
+        many elements.
+        """
+        return self.element_finder.count(locator, tag, parent)
+
+    def get_element_state(self, locator, tag=None, required=True):
+        """Get the state of the element matching `locator` with one call.
+
+        :return: Dictionary with ``displayed``, ``enabled``, ``readonly``
+            and ``text`` items, or ``None`` if element not found and
+            `required` is false.
+        :raises SeleniumLibrary.errors.ElementNotFound: If element not found
+            and `required` is true.
+        """
+        return self.element_finder.get_state(locator, tag, required)
 
     def is_text_present(self, text):
-        locator = "xpath://*[contains(., %s)]" % escape_xpath_value(text)
-        return self.find_element(locator, required=False) is not None
+        """Check does the current frame contain `text`.
+
+        The text is searched from ``innerText`` or ``textContent`` of the
+        document depending on the mode set with ``Set Page Text Mode``.
+        """
+        return self.element_finder.is_text_present(text)
 
     def is_element_enabled(self, locator, tag=None):
-        element = self.find_element(locator, tag)
-        return (element.is_enabled() and
-                element.get_attribute('readonly') is None)
+        state = self.get_element_state(locator, tag)
+        return state['enabled'] and not state['readonly']
@@ -56,7 +56,9 @@ class LibraryComponent(ContextAware):
 
     def assert_page_not_contains(self, locator, tag=None, message=None,
                                  loglevel='INFO'):
-        if self.find_element(locator, tag, required=False):
+        with self.element_finder.probe():
+            element = self.find_element(locator, tag, required=False)
+        if element:
             self.log_source(loglevel)
             if is_noney(message):
                 message = ("Page should not have contained %s '%s'."
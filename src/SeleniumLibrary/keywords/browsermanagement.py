@@ -67,6 +67,8 @@ class BrowserManagementKeywords(LibraryComponent):
         """
         self.debug('Closing all browsers.')
         self.browsers.close_all()
+        self._window_manager.clear()
+        self.element_finder.page_changed()
 
     @keyword
     def close_browser(self):
@@ -75,6 +77,8 @@ class BrowserManagementKeywords(LibraryComponent):
             self.debug('Closing browser with session id {}.'
                        .format(self.browser.session_id))
             self.browsers.close()
+            self._window_manager.clear()
+            self.element_finder.page_changed()
 
     @keyword
     def open_browser(self, url, browser='firefox', alias=None,
@@ -235,6 +239,7 @@ class BrowserManagementKeywords(LibraryComponent):
         except RuntimeError:
             raise RuntimeError("No browser with index or alias '%s' found."
                                % index_or_alias)
+        self.element_finder.page_changed()
         self.debug('Switched to browser with Selenium session id %s.'
                    % self.browser.session_id)
 
@@ -242,6 +247,8 @@ class BrowserManagementKeywords(LibraryComponent):
     def close_window(self):
         """Closes currently opened pop-up window."""
         self.browser.close()
+        self._window_manager.clear()
+        self.element_finder.page_changed()
 
     @keyword
     def get_window_identifiers(self):
@@ -365,6 +372,7 @@ class BrowserManagementKeywords(LibraryComponent):
             pass
         finally:
             self._window_manager.select(locator)
+            self.element_finder.page_changed()
 
     @keyword
     def list_windows(self):
@@ -449,17 +457,23 @@ class BrowserManagementKeywords(LibraryComponent):
     def go_back(self):
         """Simulates the user clicking the back button on their browser."""
         self.browser.back()
+        self._window_manager.clear()
+        self.element_finder.page_changed()
 
     @keyword
     def go_to(self, url):
         """Navigates the active browser instance to the provided ``url``."""
         self.info("Opening url '%s'" % url)
         self.browser.get(url)
+        self._window_manager.clear()
+        self.element_finder.page_changed()
 
     @keyword
     def reload_page(self):
         """Simulates user reloading page."""
         self.browser.refresh()
+        self._window_manager.clear()
+        self.element_finder.page_changed()
 
     @keyword
     def get_selenium_speed(self):
@@ -557,6 +571,7 @@ class BrowserManagementKeywords(LibraryComponent):
         self.ctx.implicit_wait = timestr_to_secs(value)
         for browser in self.browsers.get_open_browsers():
             browser.implicitly_wait(self.ctx.implicit_wait)
+        self.element_finder.implicit_waits.clear()
         return old_wait
 
     @keyword
@@ -566,7 +581,9 @@ class BrowserManagementKeywords(LibraryComponent):
         Same as `Set Selenium Implicit Wait` but only affects the current
         browser.
         """
-        self.browser.implicitly_wait(timestr_to_secs(value))
+        wait = timestr_to_secs(value)
+        self.browser.implicitly_wait(wait)
+        self.element_finder.implicit_waits[self.browser] = wait
 
     def _get_browser_creation_function(self, browser_name):
         try:
@@ -34,7 +34,7 @@ class ElementKeywords(LibraryComponent):
         return self.find_element(locator)
 
     @keyword
-    def get_webelements(self, locator):
+    def get_webelements(self, locator, limit=None, offset=0):
         """Returns list of WebElement objects matching the ``locator``.
 
         See the `Locating elements` section for details about the locator
@@ -43,8 +43,41 @@ class ElementKeywords(LibraryComponent):
         Starting from SeleniumLibrary 3.0, the keyword returns an empty
         list if there are no matching elements. In previous releases the
         keyword failed in this case.
+
+        ``offset`` matching elements are skipped and at most ``limit``
+        elements are returned. With locators that are searched using
+        JavaScript, such as ``css`` and ``xpath``, skipped and excess
+        elements are never transferred from the browser. See also the
+        ``max_elements`` argument used when `importing` the library.
+
+        Example:
+        | @{rows} = | `Get WebElements` | css:table#results tr | limit=10 | offset=20 |
+        """
+        limit = None if is_noney(limit) else int(limit)
+        return self.find_elements(locator, limit=limit, offset=int(offset))
+
+    @keyword
+    def get_webelements_for_locators(self, *locators):
+        """Returns lists of WebElement objects matching the ``locators``.
+
+        The returned list contains one list of matching elements for each
+        locator in the same order as the locators were given. Lists are
+        empty if a locator does not match any element.
+
+        Locators using ``id``, ``name``, ``identifier``, ``class``, ``tag``,
+        ``css`` or ``xpath`` strategy or the `default locator strategy` are
+        all resolved with one JavaScript call, which is considerably faster
+        than using `Get WebElements` separately with each locator. Other
+        locators are resolved one by one.
+
+        See the `Locating elements` section for details about the locator
+        syntax.
+
+        Example:
+        | ${username} | ${password} | ${submit} = | `Get WebElements For Locators` | id:username | id:password | css:form button |
         """
-        return self.find_elements(locator)
+        return self.element_finder.find_many(locators, first_only=False,
+                                             required=False)
 
     @keyword
     def element_should_contain(self, locator, expected, message=None):
@@ -127,7 +160,7 @@ class ElementKeywords(LibraryComponent):
         See `Page Should Contain Element` for explanation about ``message``
         and ``loglevel`` arguments.
         """
-        count = len(self.find_elements(locator))
+        count = self.count_elements(locator)
         x = int(x)
         if count != x:
             if is_falsy(message):
@@ -256,7 +289,8 @@ class ElementKeywords(LibraryComponent):
         Passes if element does not exists. See `Element Should Be Visible`
         for more information about visibility and supported arguments.
         """
-        element = self.find_element(locator, required=False)
+        with self.element_finder.probe():
+            element = self.find_element(locator, required=False)
         if element is None:
             self.info("Element '%s' did not exist." % locator)
         elif not element.is_displayed():
@@ -650,10 +684,8 @@ return !element.dispatchEvent(evt);
         syntax. Key attributes for images are ``id``, ``src`` and ``alt``.
         """
         self.info("Clicking image '%s'." % locator)
-        element = self.find_element(locator, tag='image', required=False)
-        if not element:
-            # A form may have an image as it's submit trigger.
-            element = self.find_element(locator, tag='input')
+        # A form may have an image as it's submit trigger.
+        element = self.find_element(locator, tag=('image', 'input'))
         element.click()
 
     @keyword
@@ -703,7 +735,7 @@ return !element.dispatchEvent(evt);
         Example:
         | count = | `Get Matching Xpath Count` | //div[@id='sales-pop'] |
         """
-        count = len(self.find_elements('xpath:' + xpath))
+        count = self.count_elements('xpath:' + xpath)
         return str(count) if is_truthy(return_str) else count
 
     @keyword
@@ -719,6 +751,17 @@ return !element.dispatchEvent(evt);
         custom strategies. `Remove Location Strategy` can be used to
         remove a registered strategy.
 
+        ``strategy_keyword`` is normally the name of the keyword
+        implementing the strategy. If it contains ``{criteria}``, it is
+        a locator template where ``{criteria}`` is replaced with the
+        locator value. If the template uses the ``css``, ``jquery``,
+        ``sizzle`` or ``xpath`` strategy and ``{criteria}`` is in quotes,
+        quotes in the value are escaped. Otherwise the value is inserted
+        as is. If it starts with ``javascript:`` or ``js:``, the
+        rest is JavaScript returning the matching elements. Templates and
+        scripts are faster than keywords, because no keyword needs to be
+        run for each lookup.
+
         Location strategies are automatically removed after leaving the
         current scope by default. Setting ``persist`` to a true value (see
         `Boolean arguments`) will cause the location strategy to stay
@@ -735,6 +778,159 @@ return !element.dispatchEvent(evt);
         """
         self.element_finder.unregister(strategy_name)
 
+    @keyword
+    def set_element_cache(self, enabled=True):
+        """Enables or disables caching of located elements.
+
+        When the cache is enabled, elements found with a locator are reused
+        by later keywords using the same locator, for example, in sequence
+        `Wait Until Element Is Visible`, `Click Element` and `Element Text
+        Should Be`. A cached element is used only if the page has not been
+        modified after the element was found. This is checked with a counter
+        maintained in the page, which costs one JavaScript call per lookup.
+        Navigating, selecting windows and selecting frames clear the cache.
+
+        The cache is disabled by default. ``enabled`` is considered true or
+        false as explained in `Boolean arguments`. The previous value is
+        returned.
+
+        Example:
+        | `Set Element Cache` | True |
+
+        See also `Log Element Cache Statistics`.
+        """
+        cache = self.element_finder.element_cache
+        previous = cache.enabled
+        cache.enabled = is_truthy(enabled)
+        cache.clear()
+        return previous
+
+    @keyword
+    def log_element_cache_statistics(self):
+        """Logs and returns statistics of the element cache.
+
+        Statistics are returned as a dictionary containing numbers of
+        ``hits`` and ``misses``, the ``hit rate`` and the number of
+        ``stale retries`` where a cached element was no longer attached
+        to the page and it had to be searched again. Additionally
+        ``saved url reads`` tells how many times the `default locator
+        strategy` resolved the page URL in the browser when searching
+        elements instead of asking it from the browser separately.
+
+        See `Set Element Cache` for more information.
+        """
+        statistics = self.element_finder.element_cache.statistics()
+        statistics['saved url reads'] = \
+            self.element_finder.base_url_reads_saved
+        self.info('Element cache: %d hits, %d misses (hit rate %.1f%%), '
+                  '%d stale retries. Saved %d current URL reads.'
+                  % (statistics['hits'], statistics['misses'],
+                     statistics['hit rate'] * 100,
+                     statistics['stale retries'],
+                     statistics['saved url reads']))
+        return statistics
+
+    @keyword
+    def log_locator_statistics(self, limit=10):
+        """Logs and returns statistics about locating elements.
+
+        Statistics are collected only if the ``locator_statistics``
+        argument is used when `importing` the library. They contain the
+        number of lookups, their total time in seconds, the number of
+        WebDriver commands they used and the number of elements they
+        returned. Statistics are logged per strategy and for ``limit``
+        slowest locators. Lookups done by `Get WebElements For Locators`
+        are reported with the ``batch`` strategy.
+
+        Statistics are returned as a dictionary where ``strategies`` and
+        ``locators`` contain lists of dictionaries with the same values
+        as the written report file.
+
+        Example:
+        | `Log Locator Statistics` | limit=5 |
+        """
+        profiler = self.element_finder.profiler
+        if not profiler.enabled:
+            self.info('Locator statistics are not collected. Use the '
+                      'locator_statistics import argument to enable them.')
+        statistics = profiler.statistics()
+        lines = ['Strategy statistics:']
+        lines.extend(self._format_locator_statistics(stats)
+                     for stats in statistics['strategies'])
+        lines.append('Slowest locators:')
+        lines.extend(self._format_locator_statistics(stats)
+                     for stats in statistics['locators'][:int(limit)])
+        self.info('\n'.join(lines))
+        return statistics
+
+    def _format_locator_statistics(self, stats):
+        name = stats['strategy']
+        if 'locator' in stats:
+            name = "'%s' (%s)" % (stats['locator'], name)
+        return ('%s: %d call%s, %.3f s, %d command%s, %d element%s'
+                % (name, stats['calls'], s(stats['calls']), stats['time'],
+                   stats['commands'], s(stats['commands']),
+                   stats['elements'], s(stats['elements'])))
+
+    @keyword
+    def set_locator_optimization(self, enabled=True):
+        """Enables or disables rewriting XPath locators to faster ones.
+
+        When optimization is enabled, XPath locators that have a provably
+        equivalent ``id`` or ``css`` locator are searched using it. For
+        example, ``//*[@id='x']`` is searched as ``id:x`` and
+        ``//div[@class='x']/span`` as ``css:div[class="x"] > span``.
+        Expressions using, for example, text, positions or axes are never
+        rewritten, nor are locators used with a parent element or element
+        names that can also match SVG elements, such as ``a`` or ``svg``.
+
+        Optimization is disabled by default. ``enabled`` is considered true
+        or false as explained in `Boolean arguments`. The previous value
+        is returned.
+
+        Locators in test data and their estimated cost can be listed
+        without running tests with command
+        ``python -m SeleniumLibrary.locators.locatoroptimizer path``.
+
+        Example:
+        | `Set Locator Optimization` | True |
+        """
+        optimizer = self.element_finder.optimizer
+        previous = optimizer.enabled
+        optimizer.enabled = is_truthy(enabled)
+        return previous
+
+    @keyword
+    def set_page_text_mode(self, mode):
+        """Sets how text is read when searching it from the page.
+
+        Affects `Page Should Contain`, `Page Should Not Contain`,
+        `Wait Until Page Contains`, `Wait Until Page Does Not Contain`
+        and `Current Frame Should Contain` and other keywords searching
+        text from the whole page.
+
+        With the default mode ``textContent``, all text in the document is
+        searched, including text in hidden elements and in ``script`` and
+        ``style`` elements. With mode ``innerText``, only rendered text
+        is searched, similarly as a user sees it. Modes are case-insensitive.
+        The previous mode is returned.
+
+        When text is not found, `Selenium Implicit Wait` is waited for it
+        to appear only with ``textContent``.
+
+        Example:
+        | ${mode} = | `Set Page Text Mode` | innerText |
+        | `Page Should Not Contain` | Hidden text |
+        | `Set Page Text Mode` | ${mode} |
+        """
+        modes = {'innertext': 'innerText', 'textcontent': 'textContent'}
+        if mode.lower() not in modes:
+            raise ValueError("Page text mode must be 'innerText' or "
+                             "'textContent', got '%s'." % mode)
+        previous = self.element_finder.text_mode
+        self.element_finder.text_mode = modes[mode.lower()]
+        return previous
+
     def _map_ascii_key_code_to_key(self, key_code):
         map = {
             0: Keys.NULL,
@@ -769,17 +965,4 @@ return !element.dispatchEvent(evt);
             raise ValueError(message)
 
     def _page_contains(self, text):
-        self.browser.switch_to.default_content()
-
-        if self.is_text_present(text):
-            return True
-
-        subframes = self.find_elements("xpath://frame|//iframe")
-        self.debug('Current frame has %d subframes.' % len(subframes))
-        for frame in subframes:
-            self.browser.switch_to.frame(frame)
-            found_text = self.is_text_present(text)
-            self.browser.switch_to.default_content()
-            if found_text:
-                return True
-        return False
+        return self.element_finder.page_contains(text)
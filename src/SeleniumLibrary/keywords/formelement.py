@@ -326,9 +326,7 @@ class FormElementKeywords(LibraryComponent):
         `introduction` for details about locating elements.
         """
         self.info("Clicking button '%s'." % locator)
-        element = self.find_element(locator, tag='input', required=False)
-        if not element:
-            element = self.find_element(locator, tag='button')
+        element = self.find_element(locator, tag=('input', 'button'))
         element.click()
 
     @keyword
@@ -39,6 +39,7 @@ class FrameKeywords(LibraryComponent):
         self.info("Selecting frame '%s'." % locator)
         element = self.find_element(locator)
         self.browser.switch_to.frame(element)
+        self.element_finder.frame_changed(locator)
 
     @keyword
     def unselect_frame(self):
@@ -47,6 +48,7 @@ class FrameKeywords(LibraryComponent):
         In practice cancels a previous `Select Frame` call.
         """
         self.browser.switch_to.default_content()
+        self.element_finder.frame_changed()
 
     @keyword
     def current_frame_should_contain(self, text, loglevel='INFO'):
@@ -101,8 +103,10 @@ class FrameKeywords(LibraryComponent):
     def _frame_contains(self, locator, text):
         element = self.find_element(locator)
         self.browser.switch_to.frame(element)
+        self.element_finder.frame_changed(locator)
         self.info("Searching for text from frame '%s'." % locator)
         found = self.is_text_present(text)
         self.browser.switch_to.default_content()
+        self.element_finder.frame_changed()
         return found
 
@@ -15,23 +15,410 @@
 # limitations under the License.
 
 import time
+from collections import namedtuple
+
+from selenium.common.exceptions import (JavascriptException,
+                                        TimeoutException, WebDriverException)
 
 from SeleniumLibrary.base import LibraryComponent, keyword
 from SeleniumLibrary.errors import ElementNotFound
-from SeleniumLibrary.utils import is_noney, secs_to_timestr
+from SeleniumLibrary.locators.elementfinder import FIRST_JS
+from SeleniumLibrary.locators.pageruntime import (ASYNC_RUNTIME_CHECK,
+                                                  RUNTIME_CHECK)
+from SeleniumLibrary.utils import (is_falsy, is_noney, is_string, is_truthy,
+                                   plural_or_not as s, PollStrategy,
+                                   secs_to_timestr, timestr_to_secs)
+
+
+# Timer functions of the page not counted as network activity by
+# NETWORK_IDLE_SCRIPT. Scripts of the library use them so that their own
+# timers do not delay waiting for the network to be idle.
+TIMERS_JS = """
+var pageTimers = window.__seleniumLibraryNetwork ?
+                 window.__seleniumLibraryNetwork.timerFunctions : window;
+var setTimeout = function (callback, delay) {
+    return pageTimers.setTimeout.call(window, callback, delay);
+};
+var clearTimeout = function (id) {
+    return pageTimers.clearTimeout.call(window, id);
+};
+"""
+
+# Waits in the page until the first element matching the given query
+# reaches the given state or the given timeout in milliseconds expires.
+# The state is checked whenever the DOM changes and also periodically to
+# notice changes not causing mutations, such as finished transitions.
+# Visibility and text are checked using the element state of the page
+# runtime, which uses the same displayed atom as WebElement.is_displayed.
+# Returns true if the state was reached, false on timeout and null if
+# checking the state failed.
+WAIT_SCRIPT = ASYNC_RUNTIME_CHECK + FIRST_JS + TIMERS_JS + """
+var spec = arguments[1], timeout = arguments[2],
+    done = arguments[arguments.length - 1],
+    observer = null, interval = null, timer = null, finished = false;
+function state(element) {
+    return runtime.call('elementState', [element]);
+}
+function reached() {
+    var element = first(spec);
+    switch (spec.state) {
+        case 'present': return element !== null;
+        case 'absent': return element === null;
+        case 'visible': return element !== null && state(element).displayed;
+        case 'hidden': return element !== null && !state(element).displayed;
+        case 'contains':
+            return element !== null &&
+                   state(element).text.indexOf(spec.text) !== -1;
+        case 'not contains':
+            return element !== null &&
+                   state(element).text.indexOf(spec.text) === -1;
+    }
+    throw new Error('Unknown state ' + spec.state);
+}
+function finish(result) {
+    if (!finished) {
+        finished = true;
+        if (observer) {
+            observer.disconnect();
+        }
+        clearInterval(interval);
+        clearTimeout(timer);
+        done(result);
+    }
+}
+function check() {
+    try {
+        if (reached()) {
+            finish(true);
+        }
+    } catch (error) {
+        finish(null);
+    }
+}
+check();
+if (!finished) {
+    observer = new MutationObserver(check);
+    observer.observe(document, {childList: true, subtree: true,
+                                attributes: true, characterData: true});
+    interval = setInterval(check, spec.interval);
+    timer = setTimeout(function () { finish(false); }, timeout);
+}
+"""
+
+# Checks the given wait conditions and returns a list of results. Element
+# conditions have the query of their locator, other conditions only
+# JavaScript code. Element state is got from the page runtime. Results of
+# visibility and text conditions are null if the displayed atom is not
+# available. Errors in the code are not caught.
+CONDITIONS_SCRIPT = RUNTIME_CHECK + FIRST_JS + """
+var conditions = arguments[1], results = [];
+for (var i = 0; i < conditions.length; i++) {
+    var condition = conditions[i], element = null, state = null;
+    if (condition.kind === 'js') {
+        results.push(new Function(condition.value)() === true);
+        continue;
+    }
+    element = first(condition.query);
+    if (element === null) {
+        results.push(false);
+        continue;
+    }
+    state = runtime.call('elementState', [element]);
+    if (condition.kind === 'enabled') {
+        results.push(state.enabled && !state.readonly);
+    } else if (state.displayed === null) {
+        results.push(null);
+    } else if (condition.kind === 'visible') {
+        results.push(state.displayed);
+    } else {
+        results.push(state.text.indexOf(condition.value) !== -1);
+    }
+}
+return results;
+"""
+
+WaitCondition = namedtuple('WaitCondition', 'spec, kind, locator, value')
+
+# Timers scheduled to run later than this, in milliseconds, do not keep
+# the network busy. Pages often have long timers for things like session
+# expiration.
+MAX_NETWORK_TIMER = 1000
+
+# Returns the number of pending XMLHttpRequest and fetch requests and short
+# timers, milliseconds since the last of them finished and is the document
+# loaded. Instrumentation counting them is installed into the document on
+# the first call. The original timer functions are stored for TIMERS_JS. Requests started before that are not seen, but requests
+# already finished are taken into account using resource timing.
+NETWORK_IDLE_SCRIPT = """
+var state = window.__seleniumLibraryNetwork;
+if (!state) {
+    state = window.__seleniumLibraryNetwork = {
+        requests: 0, timers: {}, timerCount: 0, lastActive: 0
+    };
+    var maxTimer = arguments[0], entries = performance.getEntriesByType ?
+        performance.getEntriesByType('resource') : [];
+    for (var i = 0; i < entries.length; i++) {
+        state.lastActive = Math.max(state.lastActive, entries[i].responseEnd);
+    }
+    var finished = function () {
+        state.requests--;
+        state.lastActive = performance.now();
+    };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        var done = false, finish = function () {
+            if (!done) {
+                done = true;
+                finished();
+            }
+        };
+        state.requests++;
+        this.addEventListener('loadend', finish);
+        try {
+            return send.apply(this, arguments);
+        } catch (error) {
+            finish();
+            throw error;
+        }
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            var promise;
+            state.requests++;
+            try {
+                promise = fetch.apply(this, arguments);
+            } catch (error) {
+                finished();
+                throw error;
+            }
+            return promise.then(function (response) {
+                finished();
+                return response;
+            }, function (error) {
+                finished();
+                throw error;
+            });
+        };
+    }
+    var setTimeout = window.setTimeout, clearTimeout = window.clearTimeout;
+    state.timerFunctions = {setTimeout: setTimeout, clearTimeout: clearTimeout};
+    var timerDone = function (id) {
+        if (state.timers[id]) {
+            delete state.timers[id];
+            state.timerCount--;
+            state.lastActive = performance.now();
+        }
+    };
+    window.setTimeout = function (callback, delay) {
+        if (typeof callback !== 'function' || (delay || 0) > maxTimer) {
+            return setTimeout.apply(window, arguments);
+        }
+        var args = Array.prototype.slice.call(arguments, 2);
+        var id = setTimeout.call(window, function () {
+            timerDone(id);
+            return callback.apply(this, args);
+        }, delay);
+        state.timers[id] = true;
+        state.timerCount++;
+        return id;
+    };
+    window.clearTimeout = function (id) {
+        timerDone(id);
+        return clearTimeout.apply(window, arguments);
+    };
+}
+return {requests: state.requests, timers: state.timerCount,
+        idle: performance.now() - state.lastActive,
+        loaded: document.readyState === 'complete'};
+"""
+
+# States whose check in the page has exactly the same semantics as the
+# corresponding check done with WebDriver.
+EXACT_BROWSER_STATES = ('present', 'absent')
+
+
+# Frameworks whose stability can be waited for. Animations are never
+# detected automatically, because they are present on every page.
+FRAMEWORK_PROBES = ('angular', 'angularjs', 'jquery', 'react', 'animations')
+
+# Waits until the given frameworks, or all detected frameworks if none is
+# given, are stable or the given timeout in milliseconds expires. Returns
+# names of the checked frameworks and of the frameworks still pending, or
+# the error if checking failed.
+STABILITY_SCRIPT = TIMERS_JS + """
+var names = arguments[0], timeout = arguments[1],
+    done = arguments[arguments.length - 1],
+    pending = [], checked = [], finished = false, timer = null;
+function poll(isStable) {
+    return function (callback) {
+        (function check() {
+            // Polling stops also when the wait times out.
+            if (finished) {
+                return;
+            }
+            if (isStable()) {
+                callback();
+            } else {
+                setTimeout(check, 10);
+            }
+        })();
+    };
+}
+function noRunningAnimations() {
+    var animations = document.getAnimations ? document.getAnimations() : [];
+    for (var i = 0; i < animations.length; i++) {
+        if (animations[i].playState === 'running' && animations[i].effect &&
+                animations[i].effect.getComputedTiming().iterations !== Infinity) {
+            return false;
+        }
+    }
+    return true;
+}
+var probes = {
+    angular: {
+        present: function () { return !!window.getAllAngularTestabilities; },
+        wait: function (callback) {
+            var testabilities = window.getAllAngularTestabilities(),
+                count = testabilities.length;
+            if (!count) {
+                callback();
+            }
+            for (var i = 0; i < testabilities.length; i++) {
+                testabilities[i].whenStable(function () {
+                    if (--count === 0) {
+                        callback();
+                    }
+                });
+            }
+        }
+    },
+    angularjs: {
+        present: function () {
+            return !!(window.angular && window.angular.getTestability);
+        },
+        wait: function (callback) {
+            var root = document.querySelector(
+                '[ng-app], [data-ng-app], [ng-controller], .ng-scope');
+            window.angular.getTestability(root || document.body)
+                .whenStable(callback);
+        }
+    },
+    jquery: {
+        present: function () { return !!window.jQuery; },
+        wait: poll(function () { return window.jQuery.active === 0; })
+    },
+    react: {
+        present: function () {
+            var hook = window.__REACT_DEVTOOLS_GLOBAL_HOOK__;
+            return !!(window.React || hook && hook.renderers &&
+                      hook.renderers.size ||
+                      document.querySelector('[data-reactroot]'));
+        },
+        wait: function (callback) {
+            // React yields to the browser between units of work, so the
+            // scheduler is idle when the browser runs idle callbacks.
+            if (window.requestIdleCallback) {
+                window.requestIdleCallback(callback);
+            } else {
+                setTimeout(callback, 1);
+            }
+        }
+    },
+    animations: {
+        present: function () { return true; },
+        wait: function (callback) {
+            // Callbacks requested for the next frame have run when the
+            // frame after it starts.
+            requestAnimationFrame(function () {
+                requestAnimationFrame(function () {
+                    poll(noRunningAnimations)(callback);
+                });
+            });
+        }
+    }
+};
+function finish(result) {
+    if (!finished) {
+        finished = true;
+        clearTimeout(timer);
+        done(result);
+    }
+}
+function stable(name) {
+    return function () {
+        var index = pending.indexOf(name);
+        if (index !== -1) {
+            pending.splice(index, 1);
+        }
+        if (!pending.length) {
+            finish({checked: checked, pending: []});
+        }
+    };
+}
+try {
+    if (!names.length) {
+        for (var name in probes) {
+            if (name !== 'animations') {
+                names.push(name);
+            }
+        }
+    }
+    for (var i = 0; i < names.length; i++) {
+        if (probes[names[i]].present()) {
+            checked.push(names[i]);
+        }
+    }
+    pending = checked.slice();
+    if (!pending.length) {
+        finish({checked: checked, pending: []});
+    }
+    for (var j = 0; j < checked.length && !finished; j++) {
+        probes[checked[j]].wait(stable(checked[j]));
+    }
+    if (!finished) {
+        timer = setTimeout(function () {
+            finish({checked: checked, pending: pending});
+        }, timeout);
+    }
+} catch (error) {
+    finish({error: String(error)});
+}
+"""
 
 
 class WaitingKeywords(LibraryComponent):
+    # Keywords after which `Set Auto Wait For Network Idle` waits.
+    network_idle_keywords = frozenset([
+        'open_browser', 'go_to', 'go_back', 'reload_page', 'click_element',
+        'click_element_at_coordinates', 'double_click_element',
+        'click_button', 'click_link', 'click_image', 'submit_form'
+    ])
+    # Keywords before which `Set Auto Sync With Frameworks` waits.
+    framework_sync_keywords = frozenset([
+        'click_element', 'click_element_at_coordinates',
+        'double_click_element', 'click_button', 'click_link', 'click_image',
+        'input_text', 'input_password', 'clear_element_text', 'press_key',
+        'submit_form', 'select_checkbox', 'unselect_checkbox',
+        'select_radio_button', 'choose_file', 'select_all_from_list',
+        'select_from_list', 'select_from_list_by_index',
+        'select_from_list_by_value', 'select_from_list_by_label',
+        'unselect_from_list', 'unselect_from_list_by_index',
+        'unselect_from_list_by_value', 'unselect_from_list_by_label',
+        'drag_and_drop', 'drag_and_drop_by_offset', 'mouse_down', 'mouse_up',
+        'mouse_over', 'mouse_out', 'open_context_menu', 'set_focus_to_element'
+    ])
 
     @keyword
-    def wait_for_condition(self, condition, timeout=None, error=None):
+    def wait_for_condition(self, condition, timeout=None, error=None, poll=None):
         """Waits until the given ``condition`` is true or ``timeout`` expires.
 
         The ``condition`` can be arbitrary JavaScript expression but it
         must return a value to be evaluated. See `Execute JavaScript` for
         information about accessing content on pages.
 
-        ``error`` can be used to override the default error message.
+        ``error`` can be used to override the default error message and
+        ``poll`` the `poll strategy`.
 
         See `timeouts` for more information about using timeouts and their
         default value.
@@ -46,18 +433,19 @@ class WaitingKeywords(LibraryComponent):
         self._wait_until(
             lambda: self.browser.execute_script(condition) is True,
             "Condition '%s' did not become true in <TIMEOUT>." % condition,
-            timeout, error
+            timeout, error, poll
         )
 
     @keyword
-    def wait_until_page_contains(self, text, timeout=None, error=None):
+    def wait_until_page_contains(self, text, timeout=None, error=None, poll=None):
         """Waits until `text` appears on current page.
 
         Fails if `timeout` expires before the text appears. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains Element`, `Wait For Condition`,
         `Wait Until Element Is Visible` and BuiltIn keyword `Wait Until
@@ -65,17 +453,18 @@ class WaitingKeywords(LibraryComponent):
         """
         self._wait_until(lambda: self.is_text_present(text),
                          "Text '%s' did not appear in <TIMEOUT>." % text,
-                         timeout, error)
+                         timeout, error, poll)
 
     @keyword
-    def wait_until_page_does_not_contain(self, text, timeout=None, error=None):
+    def wait_until_page_does_not_contain(self, text, timeout=None, error=None, poll=None):
         """Waits until `text` disappears from current page.
 
         Fails if `timeout` expires before the `text` disappears. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait For Condition`,
         `Wait Until Element Is Visible` and BuiltIn keyword `Wait Until
@@ -83,17 +472,18 @@ class WaitingKeywords(LibraryComponent):
         """
         self._wait_until(lambda: not self.is_text_present(text),
                          "Text '%s' did not disappear in <TIMEOUT>." % text,
-                         timeout, error)
+                         timeout, error, poll)
 
     @keyword
-    def wait_until_page_contains_element(self, locator, timeout=None, error=None):
+    def wait_until_page_contains_element(self, locator, timeout=None, error=None, poll=None):
         """Waits until element specified with `locator` appears on current page.
 
         Fails if `timeout` expires before the element appears. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait For Condition`,
         `Wait Until Element Is Visible` and BuiltIn keyword `Wait Until
@@ -102,71 +492,74 @@ class WaitingKeywords(LibraryComponent):
         self._wait_until(
             lambda: self.find_element(locator, required=False) is not None,
             "Element '%s' did not appear in <TIMEOUT>." % locator,
-            timeout, error
+            timeout, error, poll, (locator, 'present')
         )
 
     @keyword
-    def wait_until_page_does_not_contain_element(self, locator, timeout=None, error=None):
+    def wait_until_page_does_not_contain_element(self, locator, timeout=None, error=None, poll=None):
         """Waits until element specified with `locator` disappears from current page.
 
         Fails if `timeout` expires before the element disappears. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait For Condition`,
         `Wait Until Element Is Visible` and BuiltIn keyword `Wait Until
         Keyword Succeeds`.
         """
         self._wait_until(
-            lambda: self.find_element(locator, required=False) is None,
+            lambda: self._page_does_not_contain_element(locator),
             "Element '%s' did not disappear in <TIMEOUT>." % locator,
-            timeout, error
+            timeout, error, poll, (locator, 'absent')
         )
 
     @keyword
-    def wait_until_element_is_visible(self, locator, timeout=None, error=None):
+    def wait_until_element_is_visible(self, locator, timeout=None, error=None, poll=None):
         """Waits until element specified with `locator` is visible.
 
         Fails if `timeout` expires before the element is visible. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait Until Page Contains
         Element`, `Wait For Condition` and BuiltIn keyword `Wait Until Keyword
         Succeeds`.
         """
         self._wait_until(
-            lambda: self.find_element(locator).is_displayed(),
+            lambda: self.get_element_state(locator)['displayed'],
             "Element '%s' not visible after <TIMEOUT>." % locator,
-            timeout, error
+            timeout, error, poll, (locator, 'visible')
         )
 
     @keyword
-    def wait_until_element_is_not_visible(self, locator, timeout=None, error=None):
+    def wait_until_element_is_not_visible(self, locator, timeout=None, error=None, poll=None):
         """Waits until element specified with `locator` is not visible.
 
         Fails if `timeout` expires before the element is not visible. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait Until Page Contains
         Element`, `Wait For Condition` and BuiltIn keyword `Wait Until Keyword
         Succeeds`.
         """
         self._wait_until(
-            lambda: not self.find_element(locator).is_displayed(),
+            lambda: not self.get_element_state(locator)['displayed'],
             "Element '%s' still visible after <TIMEOUT>." % locator,
-            timeout, error
+            timeout, error, poll, (locator, 'hidden')
         )
 
     @keyword
-    def wait_until_element_is_enabled(self, locator, timeout=None, error=None):
+    def wait_until_element_is_enabled(self, locator, timeout=None, error=None, poll=None):
         """Waits until element specified with `locator` is enabled.
 
         Fails if `timeout` expires before the element is enabled. Element
@@ -174,7 +567,8 @@ class WaitingKeywords(LibraryComponent):
         See `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait Until Page Contains
         Element`, `Wait For Condition` and BuiltIn keyword `Wait Until Keyword
@@ -186,67 +580,554 @@ class WaitingKeywords(LibraryComponent):
         self._wait_until(
             lambda: self.is_element_enabled(locator),
             "Element '%s' was not enabled in <TIMEOUT>." % locator,
-            timeout, error
+            timeout, error, poll
         )
 
     @keyword
-    def wait_until_element_contains(self, locator, text, timeout=None, error=None):
+    def wait_until_element_contains(self, locator, text, timeout=None, error=None, poll=None):
         """Waits until given element contains `text`.
 
         Fails if `timeout` expires before the text appears on given element. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait Until Page Contains Element`, `Wait For Condition`,
         `Wait Until Element Is Visible` and BuiltIn keyword `Wait Until
         Keyword Succeeds`.
         """
         self._wait_until(
-            lambda: text in self.find_element(locator).text,
+            lambda: text in self.get_element_state(locator)['text'],
             "Element '%s' did not get text '%s' in <TIMEOUT>." % (locator, text),
-            timeout, error
+            timeout, error, poll, (locator, 'contains', text)
         )
 
     @keyword
-    def wait_until_element_does_not_contain(self, locator, text, timeout=None, error=None):
+    def wait_until_element_does_not_contain(self, locator, text, timeout=None, error=None, poll=None):
         """Waits until given element does not contain `text`.
 
         Fails if `timeout` expires before the text disappears from given element. See
         `introduction` for more information about `timeout` and its
         default value.
 
-        `error` can be used to override the default error message.
+        `error` can be used to override the default error message and
+        `poll` the `poll strategy`.
 
         See also `Wait Until Page Contains`, `Wait Until Page Contains Element`, `Wait For Condition`,
         `Wait Until Element Is Visible` and BuiltIn keyword `Wait Until
         Keyword Succeeds`.
         """
         self._wait_until(
-            lambda: text not in self.find_element(locator).text,
+            lambda: text not in self.get_element_state(locator)['text'],
             "Element '%s' still had text '%s' after <TIMEOUT>." % (locator, text),
-            timeout, error
+            timeout, error, poll, (locator, 'not contains', text)
         )
 
-    def _wait_until(self, condition, error, timeout=None, custom_error=None):
+    @keyword
+    def wait_until_all(self, *conditions):
+        """Waits until all given `conditions` are true.
+
+        Conditions are given as separate arguments in format
+        ``kind:value``. Supported kinds are:
+
+        - ``visible:locator``: element is visible,
+        - ``enabled:locator``: element is enabled, see `Wait Until
+          Element Is Enabled`,
+        - ``text:locator=text``: element contains ``text``. The last
+          equal sign separates the locator from the text,
+        - ``js:code``: JavaScript code returns boolean true. If the code
+          does not contain ``return``, it is handled as an expression.
+
+        All conditions are checked using one JavaScript call per poll and
+        they share one timeout. Conditions using locators that cannot be
+        evaluated in the browser, such as frame paths, are checked
+        separately. Visibility, enabled state and text are verified with
+        the normal checks when the JavaScript check reports them true.
+
+        Optional ``timeout``, ``error`` and ``poll`` are given like named
+        arguments, for example ``timeout=20 s``, and they work the same
+        way as with other ``Wait ...`` keywords. Other arguments are
+        always conditions and an equal sign in them is not handled as
+        named argument syntax, so ``text:id:status=Done`` does not need
+        escaping. Escaping it like ``text:id:status\\=Done`` works too.
+
+        Example:
+        | `Wait Until All` | js:!document.querySelector('.spinner') | visible:id:results | enabled:id:next | timeout=20 s |
+        """
+        self._wait_until_conditions(conditions, all)
+
+    @keyword
+    def wait_until_any(self, *conditions):
+        """Waits until at least one of the given `conditions` is true.
+
+        Conditions and ``timeout``, ``error`` and ``poll`` are given the
+        same way as with `Wait Until All`.
+
+        Example:
+        | `Wait Until Any` | visible:id:results | visible:id:error | timeout=20 s |
+        """
+        self._wait_until_conditions(conditions, any)
+
+    @keyword
+    def wait_until_network_is_idle(self, idle_time='500 ms', timeout=None,
+                                   error=None, poll=None):
+        """Waits until the page has had no network activity for `idle_time`.
+
+        The page is considered idle when it is loaded, it has no pending
+        ``XMLHttpRequest`` or ``fetch`` requests nor timers scheduled to
+        run within one second, and none of them has finished during the
+        last `idle_time`. Requests are counted by instrumentation this
+        keyword installs into the page, so requests started before the
+        first wait on a page are not seen. `Set Auto Wait For Network
+        Idle` installs it right after pages are opened.
+
+        Fails if `timeout` expires before the page is idle. `error` can be
+        used to override the default error message and `poll` the `poll
+        strategy`. Pages using long-polling requests or timers that are
+        always rescheduled never become idle.
+
+        Example:
+        | `Click Button` | Search |
+        | `Wait Until Network Is Idle` | idle_time=200 ms | timeout=20 s |
+        """
+        idle_time = timestr_to_secs(idle_time)
+        self._wait_until(
+            lambda: self._network_is_idle(idle_time),
+            'Network did not become idle in <TIMEOUT>.',
+            timeout, error, poll
+        )
+
+    @keyword
+    def set_auto_wait_for_network_idle(self, enabled=True, idle_time='500 ms',
+                                       timeout=None):
+        """Sets whether to wait for the network to be idle after actions.
+
+        When enabled, `Wait Until Network Is Idle` with the given
+        `idle_time` and `timeout` is run automatically after `Open
+        Browser`, `Go To`, `Go Back`, `Reload Page`, `Submit Form` and
+        click keywords like `Click Element` and `Click Button`. If the
+        network does not become idle, a warning is logged and execution
+        continues. `timeout` defaults to the library timeout at the time
+        of each wait.
+
+        Returns the previous value as a Boolean.
+
+        Example:
+        | `Set Auto Wait For Network Idle` | idle_time=200 ms | timeout=10 s |
+        | `Click Button` | Search |    # Waits until results are loaded. |
+        | `Set Auto Wait For Network Idle` | False |
+        """
+        previous = self.ctx.network_idle_wait is not None
+        if is_truthy(enabled):
+            self.ctx.network_idle_wait = (timestr_to_secs(idle_time),
+                                          timeout)
+        else:
+            self.ctx.network_idle_wait = None
+        return previous
+
+    @keyword
+    def wait_until_frameworks_are_stable(self, frameworks='auto',
+                                         timeout=None, error=None):
+        """Waits until JavaScript frameworks on the page are stable.
+
+        Supported `frameworks` are:
+
+        - ``angular``: all Angular testabilities are stable,
+        - ``angularjs``: the AngularJS testability is stable,
+        - ``jquery``: ``jQuery.active`` is zero,
+        - ``react``: the browser is idle so that React has no scheduled
+          work pending,
+        - ``animations``: callbacks of pending animation frames have run
+          and no finite CSS or Web Animations are running.
+
+        Multiple frameworks can be separated with commas. With the default
+        value ``auto``, all frameworks except animations that are detected
+        on the page are waited for. Frameworks not present on the page are
+        considered stable.
+
+        All frameworks are checked with one asynchronous JavaScript call
+        that returns as soon as they are stable. The call is repeated if
+        the page is navigated during it. Fails if `timeout` expires before
+        the frameworks are stable. `error` can be used to override the
+        default error message. Fails immediately if the frameworks cannot
+        be checked, for example, because an alert is open.
+
+        Example:
+        | `Wait Until Frameworks Are Stable` |
+        | `Wait Until Frameworks Are Stable` | jquery, animations | timeout=10 s |
+        """
+        self._wait_until_frameworks_are_stable(
+            self._parse_frameworks(frameworks), timeout, error)
+
+    @keyword
+    def set_auto_sync_with_frameworks(self, frameworks='auto', timeout=None):
+        """Sets whether to wait for frameworks before interacting with elements.
+
+        When enabled, `Wait Until Frameworks Are Stable` with the given
+        `frameworks` and `timeout` is run automatically before keywords
+        interacting with elements, such as `Click Element`, `Input Text`
+        and `Select From List By Label`. If the frameworks do not become
+        stable, a warning is logged and the keyword is run anyway. Giving
+        a false value like ``False`` or ``None`` as `frameworks` disables
+        the automatic synchronization.
+
+        Returns the previous value as a Boolean.
+
+        Example:
+        | `Set Auto Sync With Frameworks` | angular, jquery | timeout=10 s |
+        | `Click Button` | Save |    # Waits for Angular and jQuery first. |
+        | `Set Auto Sync With Frameworks` | False |
+        """
+        previous = self.ctx.framework_sync is not None
+        if is_falsy(frameworks) or is_noney(frameworks):
+            self.ctx.framework_sync = None
+        else:
+            self.ctx.framework_sync = (self._parse_frameworks(frameworks),
+                                       timeout)
+        return previous
+
+    @keyword
+    def set_wait_poll_strategy(self, initial=0.2, backoff=1, max_interval=None,
+                               jitter=0):
+        """Sets how often ``Wait ...`` keywords check their condition.
+
+        The first check is done immediately and the next one after
+        ``initial`` seconds. Each following interval is ``backoff`` times
+        the previous one, but at most ``max_interval``. If ``jitter`` is
+        given, intervals are randomly changed by at most that fraction.
+        Intervals can be given in Robot Framework's time format. See the
+        `Poll strategy` section for more details.
+
+        The previous strategy is returned as a string like
+        ``initial=0.2, backoff=1.0, max_interval=None, jitter=0.0``.
+        It can be given to this keyword as ``initial`` to restore the
+        strategy later, or as ``poll`` to ``Wait ...`` keywords.
+
+        Example:
+        | ${orig} = | `Set Wait Poll Strategy` | initial=50 ms | backoff=2 | max_interval=1 s | jitter=0.1 |
+        | `Wait Until Page Contains` | Done |
+        | `Set Wait Poll Strategy` | ${orig} |
+        """
+        if is_string(initial) and '=' in initial:
+            strategy = PollStrategy.parse(initial)
+        else:
+            strategy = PollStrategy(initial, backoff, max_interval, jitter)
+        previous = str(self.ctx.poll_strategy)
+        self.ctx.poll_strategy = strategy
+        return previous
+
+    def wait_before_keyword(self, name):
+        """Waits for frameworks to be stable before keyword `name` if needed."""
+        if self.ctx.framework_sync is None or \
+                name not in self.framework_sync_keywords:
+            return
+        frameworks, timeout = self.ctx.framework_sync
+        try:
+            self._wait_until_frameworks_are_stable(frameworks, timeout)
+        except AssertionError as err:
+            self.warn('%s Running keyword %s anyway.'
+                      % (err, name.replace('_', ' ').title()))
+
+    def wait_after_keyword(self, name):
+        """Waits for the network to be idle after keyword `name` if needed."""
+        if self.ctx.network_idle_wait is None or \
+                name not in self.network_idle_keywords:
+            return
+        idle_time, timeout = self.ctx.network_idle_wait
+        try:
+            self._wait_until(lambda: self._network_is_idle(idle_time),
+                             'Network did not become idle in <TIMEOUT> after '
+                             'keyword %s.' % name.replace('_', ' ').title(),
+                             timeout)
+        except AssertionError as err:
+            self.warn(str(err))
+
+    def _network_is_idle(self, idle_time):
+        try:
+            state = self.browser.execute_script(NETWORK_IDLE_SCRIPT,
+                                                MAX_NETWORK_TIMER)
+        except WebDriverException as err:
+            self.debug('Checking network state failed: %s' % err)
+            return False
+        return (state['loaded'] and not state['requests'] and
+                not state['timers'] and state['idle'] >= idle_time * 1000)
+
+    def _parse_frameworks(self, frameworks):
+        names = [name.strip().lower() for name in frameworks.split(',')
+                 if name.strip()]
+        if names == ['auto']:
+            return []
+        for name in names:
+            if name not in FRAMEWORK_PROBES:
+                raise ValueError("Unsupported framework '%s'. Supported "
+                                 "frameworks are %s and auto."
+                                 % (name, ', '.join(FRAMEWORK_PROBES)))
+        return names
+
+    def _wait_until_frameworks_are_stable(self, frameworks, timeout=None,
+                                          custom_error=None):
+        max_time = time.time() + self.get_timeout(timeout)
+        pending = []
+        try:
+            self._wait_until(
+                lambda: self._frameworks_are_stable(frameworks, max_time,
+                                                    pending),
+                'Frameworks did not become stable in <TIMEOUT>.',
+                timeout, custom_error
+            )
+        except AssertionError as err:
+            if not is_noney(custom_error) or not pending:
+                raise
+            raise AssertionError('%s Pending: %s.' % (err, ', '.join(pending)))
+
+    def _frameworks_are_stable(self, frameworks, max_time, pending):
+        # Script calls are kept shorter than the script timeout, which is
+        # the same as the Selenium timeout.
+        call_timeout = min(max(max_time - time.time(), 0),
+                           self.ctx.timeout * 0.9)
+        # Timeouts and pages unloaded during the call are retried. Other
+        # errors, such as an open alert, would not go away by polling.
+        try:
+            result = self.browser.execute_async_script(
+                STABILITY_SCRIPT, frameworks, int(call_timeout * 1000))
+        except (TimeoutException, JavascriptException) as err:
+            self.debug('Waiting for frameworks failed: %s' % err)
+            return False
+        except WebDriverException as err:
+            message = (err.msg or type(err).__name__).rstrip('.')
+            raise AssertionError('Checking frameworks failed: %s.' % message)
+        if not isinstance(result, dict):
+            self.debug('Waiting for frameworks returned %s' % result)
+            return False
+        if 'error' in result:
+            self.debug('Waiting for frameworks failed: %s' % result['error'])
+            return False
+        pending[:] = result['pending']
+        if pending:
+            return False
+        self.debug('Stable frameworks: %s.'
+                   % (', '.join(result['checked']) or 'none detected'))
+        return True
+
+    def _page_does_not_contain_element(self, locator):
+        with self.element_finder.probe():
+            return self.find_element(locator, required=False) is None
+
+    def _wait_until_conditions(self, conditions, combine):
+        conditions, config = self._split_condition_config(conditions)
+        timeout = config.get('timeout')
+        custom_error = config.get('error')
+        poll = config.get('poll')
+        conditions = [self._parse_condition(spec) for spec in conditions]
+        if not conditions:
+            raise ValueError('At least one condition is required.')
+        queries = [self._get_condition_query(condition)
+                   for condition in conditions]
+        failed = []
+        try:
+            self._wait_until(
+                lambda: self._check_conditions(conditions, queries, combine,
+                                               failed),
+                '', timeout, custom_error, poll
+            )
+        except AssertionError:
+            if not is_noney(custom_error):
+                raise
+            expected = 'All' if combine is all else 'Any of the'
+            raise AssertionError(
+                "%s conditions did not become true in %s. False condition%s: "
+                "%s." % (expected, secs_to_timestr(self.get_timeout(timeout)),
+                         s(failed),
+                         ', '.join("'%s'" % spec for spec in failed)))
+
+    def _split_condition_config(self, arguments):
+        # Conditions always contain a colon before a possible equal sign,
+        # so arguments like 'timeout=1s' cannot be confused with them.
+        conditions, config = [], {}
+        for argument in arguments:
+            name, separator, value = argument.partition('=')
+            if separator and name.strip() in ('timeout', 'error', 'poll'):
+                config[name.strip()] = value
+            else:
+                conditions.append(argument)
+        return conditions, config
+
+    def _parse_condition(self, spec):
+        kind, separator, value = spec.partition(':')
+        kind = kind.strip().lower()
+        if not separator or kind not in ('visible', 'enabled', 'text', 'js'):
+            raise ValueError("Invalid wait condition '%s'. Supported "
+                             "conditions are 'visible:locator', "
+                             "'enabled:locator', 'text:locator=text' and "
+                             "'js:code'." % spec)
+        if kind == 'js':
+            if 'return' not in value:
+                value = 'return (%s);' % value
+            return WaitCondition(spec, kind, None, value)
+        if kind == 'text':
+            locator, separator, text = value.rpartition('=')
+            if not separator:
+                raise ValueError("Wait condition '%s' does not contain text "
+                                 "after the locator." % spec)
+            return WaitCondition(spec, kind, locator, text)
+        return WaitCondition(spec, kind, value, None)
+
+    def _get_condition_query(self, condition):
+        if condition.kind == 'js':
+            return {'kind': 'js', 'value': condition.value}
+        try:
+            query = self.element_finder.get_browser_query(condition.locator)
+        except WebDriverException as err:
+            self.debug("Checking condition '%s' in the browser not possible: "
+                       "%s" % (condition.spec, err))
+            return None
+        if query is None:
+            return None
+        return {'kind': condition.kind, 'value': condition.value,
+                'query': query}
+
+    def _check_conditions(self, conditions, queries, combine, failed):
+        # Conditions are first checked with one script. Other checks are
+        # done only if the script results can make the combined result true.
+        results = self._check_conditions_in_browser(queries)
+        checked = [result for result in results if result is not None]
+        if combine is all and not all(checked) or \
+                combine is any and checked == results and not any(checked):
+            failed[:] = [condition.spec for condition, result
+                         in zip(conditions, results) if result is False]
+            return False
+        results = [self._check_condition(condition, result)
+                   for condition, result in zip(conditions, results)]
+        failed[:] = [condition.spec for condition, result
+                     in zip(conditions, results) if not result]
+        return combine(results)
+
+    def _check_conditions_in_browser(self, queries):
+        items = [query for query in queries if query]
+        results = [None] * len(queries)
+        if not items:
+            return results
+        try:
+            checked = iter(self.element_finder.page_runtime.run(
+                CONDITIONS_SCRIPT, items))
+        except WebDriverException as err:
+            self.debug('Checking conditions in the browser failed: %s' % err)
+            return results
+        return [next(checked) if query else None for query in queries]
+
+    def _check_condition(self, condition, result):
+        # Results got with the script are final. Conditions it could not
+        # check are checked separately.
+        if result is not None:
+            return result
+        if condition.kind == 'js':
+            return self.browser.execute_script(condition.value) is True
+        state = self.get_element_state(condition.locator, required=False)
+        if state is None:
+            return False
+        if condition.kind == 'visible':
+            return state['displayed']
+        if condition.kind == 'enabled':
+            return state['enabled'] and not state['readonly']
+        return condition.value in state['text']
+
+    def _wait_until(self, condition, error, timeout=None, custom_error=None,
+                    poll=None, browser_wait=None):
         timeout = self.get_timeout(timeout)
         if is_noney(custom_error):
             error = error.replace('<TIMEOUT>', secs_to_timestr(timeout))
         else:
             error = custom_error
-        self._wait_until_worker(condition, timeout, error)
+        poll_strategy = self._get_poll_strategy(poll)
+        if browser_wait:
+            max_time = time.time() + timeout
+            if self._wait_in_browser(condition, timeout, poll_strategy,
+                                     *browser_wait):
+                return
+            timeout = max(max_time - time.time(), 0)
+        self._wait_until_worker(condition, timeout, error, poll_strategy)
 
-    def _wait_until_worker(self, condition, timeout, error):
+    def _wait_in_browser(self, condition, timeout, poll_strategy, locator,
+                         state, text=None):
+        # Waits using a mutation observer installed in the page. Returns
+        # False if the wait could not be done in the browser or did not
+        # succeed, in which case the caller continues by polling for the
+        # remaining time. Script calls are kept shorter than the script
+        # timeout, which is the same as the Selenium timeout.
+        try:
+            query = self.element_finder.get_browser_query(locator)
+        except WebDriverException as err:
+            self.debug('Waiting in the browser not possible: %s' % err)
+            return False
+        if query is None or self.ctx.timeout <= 0:
+            return False
+        runtime = self.element_finder.page_runtime
+        if state not in EXACT_BROWSER_STATES and not runtime.displayed_atom:
+            return False
+        query.update(state=state, text=text,
+                     interval=int(poll_strategy.initial * 1000))
         max_time = time.time() + timeout
+        max_call = self.ctx.timeout * 0.9
+        calls = 0
+        result = False
+        while True:
+            call_timeout = int(min(max_time - time.time(), max_call) * 1000)
+            if call_timeout <= 0:
+                break
+            calls += 1
+            try:
+                result = runtime.run_async(WAIT_SCRIPT, query, call_timeout)
+            except WebDriverException as err:
+                self.debug('Waiting in the browser failed, continuing by '
+                           'polling: %s' % err)
+                result = None
+            if result is not False:
+                break
+        self.debug('Waited in the browser using %d script call%s.'
+                   % (calls, s(calls)))
+        if not result:
+            return False
+        if state in EXACT_BROWSER_STATES:
+            return True
+        try:
+            return condition()
+        except ElementNotFound:
+            return False
+
+    def _get_poll_strategy(self, poll=None):
+        if is_noney(poll):
+            return self.ctx.poll_strategy
+        return PollStrategy.parse(poll)
+
+    def _wait_until_worker(self, condition, timeout, error,
+                           poll_strategy=None):
+        # The condition is checked once more when the timeout expires.
+        # Sleeping never continues past the timeout.
+        start_time = time.time()
+        max_time = start_time + timeout
+        intervals = (poll_strategy or PollStrategy()).intervals()
         not_found = None
-        while time.time() < max_time:
+        polls = 0
+        while True:
+            polls += 1
             try:
                 if condition():
+                    self._log_polls(polls, start_time)
                     return
             except ElementNotFound as err:
                 not_found = str(err)
             else:
                 not_found = None
-            time.sleep(0.2)
+            remaining = max_time - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(next(intervals), remaining))
+        self._log_polls(polls, start_time)
         raise AssertionError(not_found or error)
+
+    def _log_polls(self, polls, start_time):
+        self.debug('Waited %s using %d poll%s.'
+                   % (secs_to_timestr(round(time.time() - start_time, 3)),
+                      polls, s(polls)))
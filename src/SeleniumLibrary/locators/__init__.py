@@ -15,6 +15,10 @@
 # limitations under the License.
 
 from .customlocator import CustomLocator
+from .elementcache import ElementCache
 from .elementfinder import ElementFinder
+from .locatoroptimizer import LocatorOptimizer
+from .locatorprofiler import LocatorProfiler
+from .pageruntime import PageRuntime
 from .tableelementfinder import TableElementFinder
 from .windowmanager import WindowManager
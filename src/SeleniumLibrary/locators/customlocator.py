@@ -14,6 +14,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
+
 from robot.libraries.BuiltIn import BuiltIn
 
 from SeleniumLibrary.base import ContextAware
@@ -26,25 +28,61 @@ except NameError:
 
 
 class CustomLocator(ContextAware):
+    _script_prefixes = ('javascript:', 'js:')
+    _placeholder = re.compile(r'(["\']?)\{criteria\}\1')
 
     def __init__(self, ctx, name, finder):
         ContextAware.__init__(self, ctx)
         self.name = name
         self.finder = finder
+        self.template = None
+        self.script = None
+        if isinstance(finder, basestring):
+            if finder.lower().startswith(self._script_prefixes):
+                self.script = finder.split(':', 1)[1].strip()
+            elif '{criteria}' in finder:
+                self.template = finder
+        self._builtin = None
+
+    def expand(self, criteria, escape=None):
+        """Returns the locator template with `criteria` substituted.
+
+        If `escape` is given, placeholders in single or double quotes are
+        replaced, quotes included, with the literal `escape` returns for
+        `criteria`.
+        """
+        def substitute(match):
+            quote = match.group(1)
+            if quote and escape:
+                return escape(criteria)
+            return quote + criteria + quote
+        return self._placeholder.sub(substitute, self.template)
 
     def find(self, criteria, tag, constraints, parent):
+        # Templates are expanded when locators are compiled and never
+        # found with this method.
+        if self.script is not None:
+            element = self.browser.execute_script(self.script, criteria,
+                                                  self._get_parent(parent))
         # Allow custom locators to be keywords or normal methods
-        if isinstance(self.finder, basestring):
-            element = BuiltIn().run_keyword(self.finder, parent,
-                                            criteria, tag, constraints)
+        elif isinstance(self.finder, basestring):
+            if self._builtin is None:
+                self._builtin = BuiltIn()
+            element = self._builtin.run_keyword(self.finder, parent,
+                                                criteria, tag, constraints)
         elif hasattr(self.finder, '__call__'):
             element = self.finder(parent, criteria, tag, constraints)
         else:
             raise AttributeError('Invalid type provided for Custom Locator %s'
                                  % self.name)
 
+        if element is None and self.script is not None:
+            return []
         # Always return an array
         if hasattr(element, '__len__') and not isinstance(element, basestring):
             return element
         else:
             return [element]
+
+    def _get_parent(self, parent):
+        return parent if parent is not self.browser else None
@@ -0,0 +1,125 @@
+# Copyright 2008-2011 Nokia Networks
+# Copyright 2011-2016 Ryan Tomac, Ed Manlove and contributors
+# Copyright 2016-     Robot Framework Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import namedtuple
+
+from robot.api import logger
+from selenium.common.exceptions import (StaleElementReferenceException,
+                                        WebDriverException)
+
+from SeleniumLibrary.base import ContextAware
+from SeleniumLibrary.utils import LRUCache
+
+
+CacheEntry = namedtuple('CacheEntry', 'elements, generation')
+
+# Returns the DOM generation of the current document, installing the
+# mutation observer maintaining it if needed. The generation contains
+# a random page token so that a new document never matches generations
+# recorded for an earlier one. Returns null if any of the given elements
+# is no longer attached to the document.
+DOM_GENERATION_SCRIPT = """
+var state = window.__seleniumLibraryDom;
+if (!state) {
+    state = window.__seleniumLibraryDom = {
+        token: Math.random().toString(36).slice(2), generation: 0
+    };
+    new MutationObserver(function () {
+        state.generation++;
+    }).observe(document, {childList: true, subtree: true, attributes: true,
+                          characterData: true});
+}
+var elements = arguments[0];
+for (var i = 0; i < elements.length; i++) {
+    if (!document.documentElement.contains(elements[i])) {
+        return null;
+    }
+}
+return state.token + ':' + state.generation;
+"""
+
+
+class ElementCache(ContextAware):
+
+    def __init__(self, ctx, maxsize=256):
+        """Cache for element references returned by `ElementFinder`.
+
+        Cached references are keyed by browser session, window handle,
+        frame path, locator, tag, whether only the first element was
+        requested and the requested offset and limit. An entry is used
+        only if the DOM generation counter maintained in the page has not
+        changed after the entry was stored.
+        """
+        ContextAware.__init__(self, ctx)
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self.stale_retries = 0
+        self.frame_path = ()
+        self._entries = LRUCache(maxsize)
+        self._window_handle = None
+
+    def find(self, locator, tag, first_only, find_elements, window=None):
+        key = (self.browser.session_id, self._get_window_handle(),
+               self.frame_path, locator, tag, first_only, window)
+        try:
+            entry, generation = self._validate(self._entries.get(key))
+        except WebDriverException as err:
+            logger.debug('Reading DOM generation failed: %s' % err)
+            return find_elements()
+        if entry and generation == entry.generation:
+            self.hits += 1
+            return entry.elements
+        self.misses += 1
+        elements = find_elements()
+        if elements and generation:
+            self._entries.set(key, CacheEntry(elements, generation))
+        else:
+            self._entries.delete(key)
+        return elements
+
+    def clear(self):
+        self._entries.clear()
+        self._window_handle = None
+
+    def statistics(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'stale retries': self.stale_retries,
+                'hit rate': float(self.hits) / lookups if lookups else 0.0}
+
+    def _get_window_handle(self):
+        if self._window_handle is None:
+            self._window_handle = self.browser.current_window_handle
+        return self._window_handle
+
+    def _validate(self, entry):
+        # The generation is null if cached elements have been detached
+        # from the document. The generation for a new lookup is then read
+        # separately so that the entry can be replaced.
+        if entry:
+            try:
+                generation = self._get_generation(entry.elements)
+            except StaleElementReferenceException:
+                self.stale_retries += 1
+            else:
+                if generation is not None:
+                    return entry, generation
+        return None, self._get_generation([])
+
+    def _get_generation(self, elements):
+        return self.browser.execute_script(DOM_GENERATION_SCRIPT, elements)
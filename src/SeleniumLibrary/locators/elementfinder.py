@@ -14,18 +14,364 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
+import string
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial
+
 from robot.api import logger
-from robot.utils import NormalizedDict
+from robot.utils import is_integer, NormalizedDict
+from selenium.common.exceptions import (NoSuchElementException,
+                                        NoSuchFrameException,
+                                        WebDriverException)
 from selenium.webdriver.remote.webelement import WebElement
 
 from SeleniumLibrary.base import ContextAware
 from SeleniumLibrary.errors import ElementNotFound
-from SeleniumLibrary.utils import escape_xpath_value, events, is_falsy
+from SeleniumLibrary.utils import (escape_css_value, escape_xpath_value,
+                                   events, is_falsy, LRUCache, plural_or_not)
 
 from .customlocator import CustomLocator
+from .elementcache import ElementCache
+from .locatoroptimizer import LocatorOptimizer
+from .locatorprofiler import LocatorProfiler
+from .pageruntime import PageRuntime, RUNTIME_CHECK
+
+
+CompiledLocator = namedtuple('CompiledLocator',
+                             'prefix, strategy, criteria, tag, constraints, '
+                             'query')
+DefaultQuery = namedtuple('DefaultQuery', 'xpath, url_attrs')
+
+# Element matching shared by the scripts below. Constraint values are read
+# like WebElement.get_attribute reads them: the property is preferred and
+# the attribute is used as a fallback.
+MATCHES_JS = """
+function matches(element, tag, constraints) {
+    if (!element || !element.tagName) {
+        return false;
+    }
+    if (tag && element.tagName.toLowerCase() !== tag) {
+        return false;
+    }
+    for (var name in constraints) {
+        var expected = constraints[name], actual = element[name];
+        if (actual === undefined || actual === null || typeof actual === 'object') {
+            actual = element.getAttribute(name);
+        } else {
+            actual = String(actual);
+        }
+        if (expected instanceof Array ? expected.indexOf(actual) === -1
+                                      : actual !== expected) {
+            return false;
+        }
+    }
+    return true;
+}
+"""
+
+# Filters candidate elements by tag name and constraints in one call.
+FILTER_ELEMENTS_SCRIPT = MATCHES_JS + """
+var elements = arguments[0], result = [];
+for (var i = 0; i < elements.length; i++) {
+    if (matches(elements[i], arguments[1], arguments[2])) {
+        result.push(elements[i]);
+    }
+}
+return result;
+"""
+
+# Orders elements matched by the identifier strategy so that elements
+# matching by id come before elements matching only by name.
+ORDER_BY_IDENTIFIER_SCRIPT = MATCHES_JS + """
+var elements = arguments[0], criteria = arguments[1], ids = [], names = [];
+for (var i = 0; i < elements.length; i++) {
+    if (matches(elements[i], arguments[2], arguments[3])) {
+        (elements[i].getAttribute('id') === criteria ? ids : names).push(elements[i]);
+    }
+}
+return ids.concat(names);
+"""
+
+# Runs CSS, XPath and Sizzle queries. Sizzle queries use the page runtime
+# and fail if it is not yet installed. Default strategy queries matching
+# src or href attributes get the XPath without those attributes, the
+# attributes and the criteria. The URL the criteria is relative to is
+# resolved from the top level document like WebDriver resolves the current
+# URL. The query fails if the top level document is not accessible.
+QUERY_JS = """
+function xpathLiteral(value) {
+    if (value.indexOf('"') !== -1 && value.indexOf("'") !== -1) {
+        return "concat('" + value.split("'").join("', \\"'\\", '") + "')";
+    }
+    return value.indexOf("'") !== -1 ? '"' + value + '"' : "'" + value + "'";
+}
+function urlXpath(parts) {
+    var url = window.top.location.href, searchers = '';
+    if (url.indexOf('/') !== -1) {
+        url = url.split('/').slice(0, -1).join('/');
+    }
+    for (var i = 0; i < parts[1].length; i++) {
+        searchers += ' or ' + parts[1][i] + '=' + xpathLiteral(url + '/' + parts[2]);
+    }
+    return parts[0].slice(0, -2) + searchers + ')]';
+}
+function snapshot(expression, root) {
+    return document.evaluate(expression, root, null,
+                             XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+}
+function query(kind, expression, root) {
+    if (kind === 'css') {
+        return root.querySelectorAll(expression);
+    }
+    if (kind === 'sizzle') {
+        return window.__seleniumLibraryRuntime.call('sizzle', [expression, root]);
+    }
+    if (kind === 'url xpath') {
+        expression = urlXpath(expression);
+    }
+    var result = snapshot(expression, root), nodes = [];
+    for (var i = 0; i < result.snapshotLength; i++) {
+        nodes.push(result.snapshotItem(i));
+    }
+    return nodes;
+}
+"""
+
+# Returns the first element matching a query returned by
+# `ElementFinder.get_browser_query` or null.
+FIRST_JS = MATCHES_JS + QUERY_JS + """
+function first(spec) {
+    for (var i = 0; i < spec.queries.length; i++) {
+        var nodes = query(spec.queries[i][0], spec.queries[i][1], document);
+        for (var j = 0; j < nodes.length; j++) {
+            if (matches(nodes[j], spec.tag, spec.constraints)) {
+                return nodes[j];
+            }
+        }
+    }
+    return null;
+}
+"""
+
+# Returns the state of the given element, or of the first element matching
+# the given query, using the page runtime. Returns null if no element
+# matches the query.
+ELEMENT_STATE_SCRIPT = RUNTIME_CHECK + FIRST_JS + """
+var element = arguments[2] || first(arguments[1]);
+return element ? runtime.call('elementState', [element]) : null;
+"""
+
+# Runs a batch of queries in one call. Each item in the batch contains CSS
+# and XPath queries whose results are concatenated, the tag and constraints
+# used for filtering and optionally an offset of the first element and a
+# limit for the number of elements to return. Results of items that are
+# null or whose queries fail are returned as null. Results of multiple
+# queries are returned without duplicates.
+FIND_MANY_SCRIPT = MATCHES_JS + QUERY_JS + """
+var batch = arguments[0], root = arguments[1] || document, results = [];
+for (var i = 0; i < batch.length; i++) {
+    var item = batch[i], found = [];
+    if (item) {
+        var offset = item.offset || 0, limit = offset + (item.limit || Infinity);
+        var unique = item.queries.length > 1;
+        try {
+            for (var j = 0; j < item.queries.length && found.length < limit; j++) {
+                var nodes = query(item.queries[j][0], item.queries[j][1], root);
+                for (var k = 0; k < nodes.length && found.length < limit; k++) {
+                    if ((!unique || found.indexOf(nodes[k]) === -1) &&
+                            matches(nodes[k], item.tag, item.constraints)) {
+                        found.push(nodes[k]);
+                    }
+                }
+            }
+            found = found.slice(offset);
+        } catch (error) {
+            found = null;
+        }
+    } else {
+        found = null;
+    }
+    results.push(found);
+}
+return results;
+"""
+
+# Counts elements matching an item like in FIND_MANY_SCRIPT without
+# returning them. A single query without a tag or constraints is counted
+# without visiting the matched nodes. Results of multiple queries are
+# counted without duplicates.
+COUNT_SCRIPT = MATCHES_JS + QUERY_JS + """
+var item = arguments[0], root = arguments[1] || document, found = [], count = 0;
+var filtered = item.tag || Object.keys(item.constraints || {}).length;
+if (item.queries.length === 1 && !filtered) {
+    var kind = item.queries[0][0], expression = item.queries[0][1];
+    return kind === 'xpath' ? snapshot(expression, root).snapshotLength
+                            : query(kind, expression, root).length;
+}
+for (var i = 0; i < item.queries.length; i++) {
+    var nodes = query(item.queries[i][0], item.queries[i][1], root);
+    for (var j = 0; j < nodes.length; j++) {
+        if (!matches(nodes[j], item.tag, item.constraints)) {
+            continue;
+        }
+        if (item.queries.length > 1) {
+            if (found.indexOf(nodes[j]) !== -1) {
+                continue;
+            }
+            found.push(nodes[j]);
+        }
+        count++;
+    }
+}
+return count;
+"""
+
+# Resolves CSS selectors of nested frames starting from the current
+# document. Returns indices of the frames in their parent window, which
+# can be used for switching to them, and the index of the first selector
+# not matching a frame or null. Resolving stops after a frame whose
+# document is not accessible, typically because it is cross-origin.
+FRAME_PATH_SCRIPT = """
+var selectors = arguments[0], win = window, indices = [];
+for (var i = 0; i < selectors.length; i++) {
+    var frame = win.document.querySelector(selectors[i]), index = -1;
+    for (var j = 0; frame && j < win.frames.length; j++) {
+        if (win.frames[j] === frame.contentWindow) {
+            index = j;
+            break;
+        }
+    }
+    if (index === -1) {
+        return {indices: indices, missing: i};
+    }
+    indices.push(index);
+    try {
+        if (!frame.contentWindow.document) {
+            break;
+        }
+    } catch (error) {
+        break;
+    }
+    win = frame.contentWindow;
+}
+return {indices: indices, missing: null};
+"""
+
+# Returns the text of the current document using either its innerText or
+# textContent.
+TEXT_JS = """
+function pageText(doc, mode) {
+    var root = doc.documentElement;
+    if (!root) {
+        return '';
+    }
+    if (mode === 'innerText' && doc.body && doc.body.innerText !== undefined) {
+        return doc.body.innerText || '';
+    }
+    return root.textContent || '';
+}
+"""
+
+# Returns true if the text of the current document contains the given text.
+TEXT_PRESENT_SCRIPT = TEXT_JS + """
+return pageText(document, arguments[1]).indexOf(arguments[0]) !== -1;
+"""
+
+# Searches text from the current document and all frames accessible from
+# it. If the third argument is true, returns null if the current document
+# is not the top level document. Otherwise returns
+# whether the text was found, the number of searched documents and index
+# paths of frames whose documents are not accessible, typically because
+# they are cross-origin. The frame tree is cached in the page and rebuilt
+# when frames are added, removed or navigated, also when a frame navigates
+# by itself and its window gets a new document.
+PAGE_TEXT_SCRIPT = TEXT_JS + """
+var text = arguments[0], mode = arguments[1];
+if (arguments[2] && window !== window.top) {
+    return null;
+}
+function build(win, path, tree) {
+    try {
+        var doc = win.document, observer = new MutationObserver(function () {
+            tree.dirty = true;
+        });
+        observer.observe(doc, {childList: true, subtree: true,
+                               attributes: true, attributeFilter: ['src']});
+        tree.observers.push(observer);
+    } catch (error) {
+        tree.inaccessible.push(path);
+        tree.blocked.push(win);
+        return;
+    }
+    tree.windows.push(win);
+    tree.documents.push(doc);
+    for (var i = 0; i < win.frames.length; i++) {
+        build(win.frames[i], path.concat([i]), tree);
+    }
+}
+function isCurrent(tree) {
+    if (tree.dirty) {
+        return false;
+    }
+    try {
+        for (var i = 0; i < tree.windows.length; i++) {
+            if (tree.windows[i].document !== tree.documents[i]) {
+                return false;
+            }
+        }
+    } catch (error) {
+        // A cached frame has navigated to another origin.
+        return false;
+    }
+    for (var j = 0; j < tree.blocked.length; j++) {
+        try {
+            if (tree.blocked[j].document) {
+                return false;
+            }
+        } catch (error) {
+            // The frame is still not accessible.
+        }
+    }
+    return true;
+}
+function getTree() {
+    var tree = window.__seleniumLibraryFrameTree;
+    if (tree && isCurrent(tree)) {
+        return tree;
+    }
+    if (tree) {
+        for (var i = 0; i < tree.observers.length; i++) {
+            tree.observers[i].disconnect();
+        }
+    }
+    tree = window.__seleniumLibraryFrameTree = {
+        windows: [], documents: [], inaccessible: [], blocked: [],
+        observers: [], dirty: false
+    };
+    build(window, [], tree);
+    return tree;
+}
+function search(tree) {
+    for (var i = 0; i < tree.windows.length; i++) {
+        if (pageText(tree.windows[i].document, mode).indexOf(text) !== -1) {
+            return true;
+        }
+    }
+    return false;
+}
+var tree = getTree(), found = search(tree);
+return {found: found, documents: tree.windows.length,
+        inaccessible: found ? [] : tree.inaccessible};
+"""
 
 
 class ElementFinder(ContextAware):
+    compiled_cache_size = 512
+    _simple_tag = re.compile(r'^[a-z][a-z0-9-]*$')
+    _frame_part = re.compile(r'^\s*frame\s*[:=]', re.IGNORECASE)
 
     def __init__(self, ctx):
         ContextAware.__init__(self, ctx)
@@ -48,6 +394,11 @@ class ElementFinder(ContextAware):
         self._strategies = NormalizedDict(initial=strategies, caseless=True,
                                           spaceless=True)
         self._default_strategies = list(strategies)
+        self._templates = NormalizedDict(caseless=True, spaceless=True)
+        self._template_escapes = NormalizedDict(
+            initial={'css': escape_css_value, 'jquery': escape_css_value,
+                     'sizzle': escape_css_value, 'xpath': escape_xpath_value},
+            caseless=True, spaceless=True)
         self._key_attrs = {
             None: ['@id', '@name'],
             'a': ['@id', '@name', '@href',
@@ -57,19 +408,147 @@ class ElementFinder(ContextAware):
             'button': ['@id', '@name', '@value',
                        'normalize-space(descendant-or-self::text())']
         }
+        self._compiled = LRUCache(self.compiled_cache_size)
+        self.element_cache = ElementCache(ctx)
+        self.page_runtime = PageRuntime(ctx)
+        self.profiler = LocatorProfiler()
+        self.optimizer = LocatorOptimizer()
+        self.max_elements = None
+        self.text_mode = 'textContent'
+        self.implicit_waits = weakref.WeakKeyDictionary()
+        self._probing = False
+        self.base_url_reads_saved = 0
+        self._frames_selected = None
+        self._frames_restore = ()
+        self._lookup_depth = 0
+        self._base_url = None
 
     def find(self, locator, tag=None, first_only=True, required=True,
-             parent=None):
+             parent=None, limit=None, offset=0):
+        """Finds element(s) matching `locator`.
+
+        `tag` can also be a tuple of tags in priority order. Elements
+        matching an earlier tag are then returned before elements matching
+        a later one, and all tags are searched at once when possible.
+
+        When `first_only` is false, `offset` elements are skipped and at
+        most `limit` elements are returned. Locators that can be searched
+        with JavaScript apply these in the browser and other locators
+        after finding all elements. If `max_elements` is set and no
+        smaller `limit` is given, at most `max_elements` elements are
+        returned and a warning is logged if there would have been more.
+        """
         if parent and not self._is_webelement(parent):
             raise ValueError('Parent must be Selenium WebElement but it '
                              'was {}'.format(type(parent)))
         if self._is_webelement(locator):
             return locator
-        prefix, criteria = self._parse_locator(locator)
-        strategy = self._strategies[prefix]
-        tag, constraints = self._get_tag_and_constraints(tag)
-        elements = strategy(criteria, tag, constraints,
-                            parent=parent or self.browser)
+        window = self._get_window(first_only, limit, offset)
+        with self._lookup():
+            if self.profiler.enabled:
+                strategy = self._get_strategy_name(locator)
+                elements = self.profiler.profile(
+                    self.browser, strategy, locator, self._find_locator,
+                    locator, tag, first_only, required, parent, window)
+            else:
+                elements = self._find_locator(locator, tag, first_only,
+                                              required, parent, window)
+        if not first_only:
+            elements = self._truncate(locator, elements)
+        return elements
+
+    @contextmanager
+    def probe(self):
+        """Context manager for finding elements without the implicit wait.
+
+        Lookups not finding anything return immediately instead of waiting
+        for the implicit wait. The implicit wait of the current browser is
+        restored when the block exits.
+        """
+        wait = self._get_implicit_wait()
+        if self._probing or not wait:
+            yield
+            return
+        browser = self.browser
+        self._probing = True
+        browser.implicitly_wait(0)
+        try:
+            yield
+        finally:
+            self._probing = False
+            browser.implicitly_wait(wait)
+
+    @contextmanager
+    def _lookup(self):
+        # Lookups can be nested, for example, when a custom locator
+        # strategy finds elements. Frames selected by frame path locators
+        # are restored only by the outermost lookup. The base URL read
+        # during a lookup is reused until the outermost lookup ends.
+        self._lookup_depth += 1
+        try:
+            yield
+        finally:
+            self._lookup_depth -= 1
+            if not self._lookup_depth:
+                self._base_url = None
+
+    def _restore_frames_if_outermost(self):
+        if self._lookup_depth <= 1:
+            self._restore_frames()
+
+    def _get_implicit_wait(self):
+        # Browser specific waits are set with Set Browser Implicit Wait.
+        if self._probing:
+            return 0
+        return self.implicit_waits.get(self.browser, self.ctx.implicit_wait)
+
+    def _get_window(self, first_only, limit, offset):
+        # Returns (offset, limit) applied when finding elements or None.
+        # When max_elements is used, one extra element is searched to know
+        # whether results were truncated.
+        if first_only:
+            return None
+        offset = int(offset or 0)
+        if offset < 0:
+            raise ValueError('Offset must be zero or positive, got %d.'
+                             % offset)
+        if limit is not None:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError('Limit must be positive, got %d.' % limit)
+        if self.max_elements is not None and (limit is None or
+                                              limit > self.max_elements):
+            limit = self.max_elements + 1
+        if not offset and limit is None:
+            return None
+        return offset, limit
+
+    def _truncate(self, locator, elements):
+        if self.max_elements is None or len(elements) <= self.max_elements:
+            return elements
+        logger.warn("Locator '%s' matched more elements than max_elements "
+                    "allows (%d). Extra elements are ignored."
+                    % (locator, self.max_elements))
+        return elements[:self.max_elements]
+
+    def _get_strategy_name(self, locator):
+        frames, locator = self._split_frame_path(locator)
+        return self._parse_locator(locator)[0].lower()
+
+    def _find_locator(self, locator, tag, first_only, required, parent,
+                      window=None):
+        frames, target = self._split_frame_path(locator)
+        if frames:
+            if parent:
+                raise ValueError('Frame path locators cannot be used with '
+                                 'a parent element.')
+            elements = self._find_in_frames(frames, target, tag, first_only,
+                                            window)
+        else:
+            if not parent:
+                self._restore_frames_if_outermost()
+            elements = self._find_in_context(locator, tag, first_only, parent,
+                                             window)
         if required and not elements:
             raise ElementNotFound("Element with locator '{}' not found."
                                   .format(locator))
@@ -79,13 +558,753 @@ class ElementFinder(ContextAware):
             return elements[0]
         return elements
 
+    def _find_in_context(self, locator, tag, first_only, parent,
+                         window=None):
+        if isinstance(tag, tuple):
+            def find(root):
+                return self._find_with_tags(locator, tag, root, first_only,
+                                            window)
+        else:
+            compiled = self.compile(locator, tag, parent)
+
+            def find(root):
+                return self._find(compiled, root, first_only, window)
+        if self.element_cache.enabled and not parent:
+            return self.element_cache.find(locator, tag, first_only,
+                                           lambda: find(self.browser), window)
+        return find(parent or self.browser)
+
+    def _find_with_tags(self, locator, tags, parent, first_only, window):
+        # Elements matching earlier tags are returned first. All tags are
+        # searched with one script when possible. Otherwise tags are
+        # searched one by one, first without the implicit wait so that an
+        # element matching a later tag is found without waiting for the
+        # earlier tags. The implicit wait is used only if nothing matches.
+        compiled = [self.compile(locator, tag, parent) for tag in tags]
+        found = self._find_with_tags_in_browser(compiled, parent, first_only,
+                                                window)
+        if found is None:
+            with self.probe():
+                found = [self._find(c, parent, first_only) for c in compiled]
+        if not any(found) and self._get_implicit_wait():
+            found = []
+            for c in compiled:
+                found.append(self._find(c, parent, first_only))
+                if found[-1]:
+                    break
+        elements = []
+        for element in (e for result in found for e in result):
+            if element not in elements:
+                elements.append(element)
+        if first_only:
+            return elements[:1]
+        if window:
+            offset, limit = window
+            elements = elements[offset:offset + limit if limit else None]
+        return elements
+
+    def _find_with_tags_in_browser(self, compiled, parent, first_only,
+                                   window):
+        # Returns a list of results for each tag or None if the elements
+        # need to be searched normally.
+        limit = 1 if first_only else None
+        if window and window[1]:
+            limit = window[0] + window[1]
+        batch = []
+        for c in compiled:
+            queries = self._get_browser_queries(c, parent)
+            if not queries:
+                return None
+            item = {'queries': queries, 'tag': c.tag,
+                    'constraints': c.constraints}
+            if limit:
+                item['limit'] = limit
+            batch.append(item)
+        root = parent if self._is_webelement(parent) else None
+        try:
+            found = self.browser.execute_script(FIND_MANY_SCRIPT, batch, root)
+        except WebDriverException as err:
+            logger.debug('Finding elements in browser failed: %s' % err)
+            return None
+        if not isinstance(found, list) or len(found) != len(batch) or \
+                None in found:
+            logger.debug("WebDriver element find returned %s" % found)
+            return None
+        return found
+
+    def get_browser_query(self, locator, tag=None):
+        """Returns a query for finding `locator` in the page or ``None``.
+
+        The query is a dictionary containing ``queries``, ``tag`` and
+        ``constraints`` like items used by the batch find script. It can
+        be used by scripts built from ``MATCHES_JS`` and ``QUERY_JS``.
+        ``None`` is returned if the locator cannot be searched with
+        JavaScript. Frames selected by frame path locators are restored.
+        """
+        if self._is_webelement(locator) or self._split_frame_path(locator)[0]:
+            return None
+        self._restore_frames_if_outermost()
+        return self._get_browser_query(self.compile(locator, tag))
+
+    def _get_browser_query(self, compiled):
+        queries = self._get_browser_queries(compiled)
+        if not queries:
+            return None
+        return {'queries': queries, 'tag': compiled.tag,
+                'constraints': compiled.constraints}
+
+    def get_state(self, locator, tag=None, required=True):
+        """Returns the state of the first element matching `locator`.
+
+        The state is a dictionary with ``displayed``, ``enabled``,
+        ``readonly`` and ``text`` items. It is got with one JavaScript call
+        when the locator can be searched with JavaScript, and otherwise
+        with one call after finding the element. ``displayed`` uses the
+        same atom as ``WebElement.is_displayed`` and ``text`` is the
+        rendered text of the element.
+
+        If no element is found, `ElementNotFound` is raised if `required`
+        is true and ``None`` returned otherwise.
+        """
+        with self._lookup():
+            return self._get_state(locator, tag, required)
+
+    def _get_state(self, locator, tag, required):
+        state = None
+        if self.page_runtime.displayed_atom and \
+                not self._is_webelement(locator) and \
+                not self._split_frame_path(locator)[0]:
+            self._restore_frames_if_outermost()
+            compiled = self.compile(locator, tag)
+            query = self._get_browser_query(compiled)
+            state = self._get_state_in_browser(query, None)
+            if state is False and self._get_implicit_wait():
+                state = None
+        if state is None:
+            element = self.find(locator, tag, required=required)
+            if element is None:
+                return None
+            if self.page_runtime.displayed_atom:
+                state = self._get_state_in_browser(None, element)
+            if state is None:
+                return self._get_state_with_webdriver(element)
+        if state is False:
+            if required:
+                raise ElementNotFound("Element with locator '{}' not found."
+                                      .format(locator))
+            return None
+        return state
+
+    def _get_state_in_browser(self, query, element):
+        # Returns False if no element matches the query and None if the
+        # state could not be got in the browser.
+        if not (query or element):
+            return None
+        try:
+            state = self.page_runtime.run(ELEMENT_STATE_SCRIPT, query, element)
+        except WebDriverException as err:
+            logger.debug('Getting element state in browser failed: %s' % err)
+            return None
+        if state is None and query:
+            return False
+        if not isinstance(state, dict):
+            logger.debug('Element state script returned %s' % state)
+            return None
+        return state
+
+    def _get_state_with_webdriver(self, element):
+        return {'displayed': element.is_displayed(),
+                'enabled': element.is_enabled(),
+                'readonly': element.get_attribute('readonly') is not None,
+                'text': element.text}
+
+    def count(self, locator, tag=None, parent=None):
+        """Returns the number of elements matching `locator`.
+
+        Elements are counted in the browser with one JavaScript call
+        without returning them when the locator uses the ``id``, ``name``,
+        ``identifier``, ``class``, ``tag``, ``css``, ``xpath`` or
+        ``sizzle`` strategy, or the default strategy. Other locators, and
+        all locators if the browser does not support JavaScript, are
+        counted by finding the elements. To retain the implicit wait
+        semantics, locators not matching anything are also searched with
+        a normal find if an implicit wait is set.
+
+        `tag` and `parent` have the same semantics as with :meth:`find`.
+        """
+        if parent and not self._is_webelement(parent):
+            raise ValueError('Parent must be Selenium WebElement but it '
+                             'was {}'.format(type(parent)))
+        if self._is_webelement(locator):
+            return 1
+        with self._lookup():
+            if self.profiler.enabled:
+                strategy = self._get_strategy_name(locator)
+                return self.profiler.profile(self.browser, strategy, locator,
+                                             self._count_locator, locator,
+                                             tag, parent)
+            return self._count_locator(locator, tag, parent)
+
+    def _count_locator(self, locator, tag, parent):
+        frames, target = self._split_frame_path(locator)
+        if frames:
+            if parent:
+                raise ValueError('Frame path locators cannot be used with '
+                                 'a parent element.')
+            return self._run_in_frames(frames, 0, self._count_in_context,
+                                       target, tag, None)
+        if not parent:
+            self._restore_frames_if_outermost()
+        return self._count_in_context(locator, tag, parent)
+
+    def _count_in_context(self, locator, tag, parent):
+        compiled = self.compile(locator, tag, parent)
+        count = self._count_in_browser(compiled, parent)
+        if count is None or not count and self._get_implicit_wait():
+            count = len(self._find_elements(compiled, parent or self.browser))
+        return count
+
+    def _count_in_browser(self, compiled, parent):
+        queries = self._get_browser_queries(compiled, parent)
+        if not queries:
+            return None
+        item = {'queries': queries, 'tag': compiled.tag,
+                'constraints': compiled.constraints}
+        try:
+            count = self.browser.execute_script(COUNT_SCRIPT, item, parent)
+        except WebDriverException as err:
+            logger.debug('Counting elements in browser failed: %s' % err)
+            return None
+        if not is_integer(count) or isinstance(count, bool):
+            logger.debug('WebDriver element count returned %s' % count)
+            return None
+        return count
+
+    def _split_frame_path(self, locator):
+        frames = ()
+        while self._frame_part.match(locator) and ' >> ' in locator:
+            frame, _, locator = locator.partition(' >> ')
+            frames += (frame[self._frame_part.match(frame).end():].strip(),)
+        return frames, locator
+
+    def _find_in_frames(self, frames, locator, tag, first_only, window=None):
+        return self._run_in_frames(frames, [], self._find_in_context,
+                                   locator, tag, first_only, None, window)
+
+    def _run_in_frames(self, frames, not_found, function, *args):
+        reused = self._frames_selected == frames
+        if not self._select_frames(frames):
+            return not_found
+        try:
+            return function(*args)
+        except NoSuchFrameException:
+            # Selected frame has been removed from the page.
+            if not reused:
+                raise
+            self._frames_selected = ()
+            if not self._select_frames(frames):
+                return not_found
+            return function(*args)
+
+    def _select_frames(self, frames):
+        # Frames selected by the previous frame path locator are reused.
+        # Otherwise frames are resolved from the top level document so
+        # that the same locator works regardless of the selected frame.
+        if self._frames_selected == frames:
+            return True
+        if self._frames_selected is None:
+            self._frames_restore = self.element_cache.frame_path
+        self._frames_selected = ()
+        self.element_cache.frame_path = ()
+        self.browser.switch_to.default_content()
+        remaining = list(frames)
+        while remaining:
+            try:
+                result = self.browser.execute_script(FRAME_PATH_SCRIPT,
+                                                     remaining)
+            except WebDriverException as err:
+                logger.debug('Resolving frames in browser failed: %s' % err)
+                return self._select_frames_one_by_one(frames, remaining)
+            if result['missing'] is not None:
+                # Return to the top level document recorded above.
+                if len(remaining) < len(frames):
+                    self.browser.switch_to.default_content()
+                return False
+            for index in result['indices']:
+                self.browser.switch_to.frame(index)
+            remaining = remaining[len(result['indices']):]
+        self._frames_selected = frames
+        self.element_cache.frame_path = self._get_frame_locators(frames)
+        return True
+
+    def _select_frames_one_by_one(self, frames, remaining):
+        for selector in remaining:
+            frame = self._find_by_css_selector(selector, None, None,
+                                               self.browser)
+            if not frame:
+                self.browser.switch_to.default_content()
+                return False
+            self.browser.switch_to.frame(frame[0])
+        self._frames_selected = frames
+        self.element_cache.frame_path = self._get_frame_locators(frames)
+        return True
+
+    def _get_frame_locators(self, frames):
+        # The frame path is also used when restoring frames, so frames
+        # must be stored as locators instead of plain CSS selectors.
+        return tuple('css:' + frame for frame in frames)
+
+    def restore_frames(self):
+        """Returns to the frame selected before frame path locators.
+
+        Called after each keyword so that frames selected by frame path
+        locators do not affect later keywords, also those not using
+        locators. If the frame cannot be selected anymore, the top level
+        document is selected. Nothing is done during a lookup.
+        """
+        if self._lookup_depth:
+            return
+        try:
+            self._restore_frames()
+        except (WebDriverException, ElementNotFound) as err:
+            logger.debug('Returning to the previously selected frame '
+                         'failed: %s' % err)
+            try:
+                self.browser.switch_to.default_content()
+            except WebDriverException:
+                pass
+            self.frame_changed()
+
+    def _restore_frames(self):
+        # Returns to the frame that was selected before frame path
+        # locators were used.
+        if self._frames_selected is None:
+            return
+        path = self._frames_restore
+        self._frames_selected = None
+        self._frames_restore = ()
+        self.element_cache.frame_path = ()
+        self.browser.switch_to.default_content()
+        for index, locator in enumerate(path):
+            self.element_cache.frame_path = path[:index]
+            self.browser.switch_to.frame(self.find(locator))
+        # Frame path locators in the path select frames of their own.
+        self._frames_selected = None
+        self._frames_restore = ()
+        self.element_cache.frame_path = path
+
+    def page_changed(self):
+        """Invalidates state cached for the current page.
+
+        Called by keywords that navigate or change the current window.
+        Because these operations also return to the top level browsing
+        context, the frame path is reset as well.
+        """
+        self.element_cache.frame_path = ()
+        self.element_cache.clear()
+        self._frames_selected = None
+
+    def page_contains(self, text):
+        """Returns true if the page or any of its frames contains `text`.
+
+        The top level document is selected like with ``Unselect Frame``.
+        Documents accessible from it are searched with one JavaScript
+        call and only frames whose documents are not accessible, such as
+        cross-origin frames, are selected for searching them separately.
+        """
+        try:
+            result = self.browser.execute_script(PAGE_TEXT_SCRIPT, text,
+                                                 self.text_mode, True)
+            if result is None:
+                self.browser.switch_to.default_content()
+                self.frame_changed()
+                result = self.browser.execute_script(
+                    PAGE_TEXT_SCRIPT, text, self.text_mode, True)
+        except WebDriverException as err:
+            logger.debug('Searching text in browser failed: %s' % err)
+            return self._page_contains_by_xpath(text)
+        if self._text_in_frames(text, result, ()):
+            return True
+        return self._wait_with_xpath() and self._page_contains_by_xpath(text)
+
+    def is_text_present(self, text):
+        """Returns true if the current document contains `text`.
+
+        Frames are not searched and frames selected by frame path
+        locators are first unselected. The text is searched with one
+        JavaScript call from the ``innerText`` or ``textContent`` of the
+        document depending on `text_mode`. If an implicit wait is set, the
+        text is not found and `text_mode` is ``textContent``, it is also
+        searched using XPath to wait for it.
+        """
+        self._restore_frames_if_outermost()
+        try:
+            if self.browser.execute_script(TEXT_PRESENT_SCRIPT, text,
+                                           self.text_mode) is True:
+                return True
+        except WebDriverException as err:
+            logger.debug('Searching text in browser failed: %s' % err)
+            return self._text_present_by_xpath(text)
+        return self._wait_with_xpath() and self._text_present_by_xpath(text)
+
+    def _wait_with_xpath(self):
+        # Finding with XPath retains the implicit wait semantics. XPath
+        # matches text like textContent, so it cannot be used with
+        # innerText.
+        return bool(self._get_implicit_wait()) and \
+            self.text_mode == 'textContent'
+
+    def _text_present_by_xpath(self, text):
+        locator = "xpath://*[contains(., %s)]" % escape_xpath_value(text)
+        return self.find(locator, required=False) is not None
+
+    def _text_in_frames(self, text, result, path):
+        logger.debug('Searched text from %d document%s in one call.'
+                     % (result['documents'], plural_or_not(result['documents'])))
+        if result['found']:
+            return True
+        for indices in result['inaccessible']:
+            frame_path = path + tuple(indices)
+            # Indices are relative to the top level document.
+            self.browser.switch_to.default_content()
+            for index in frame_path:
+                self.browser.switch_to.frame(index)
+            try:
+                found = self._text_in_frames(
+                    text, self.browser.execute_script(
+                        PAGE_TEXT_SCRIPT, text, self.text_mode, False),
+                    frame_path)
+            finally:
+                self.browser.switch_to.default_content()
+            if found:
+                return True
+        return False
+
+    def _page_contains_by_xpath(self, text):
+        self.browser.switch_to.default_content()
+        self.frame_changed()
+        if self._text_present_by_xpath(text):
+            return True
+        subframes = self.find("xpath://frame|//iframe", first_only=False,
+                              required=False)
+        logger.debug('Current frame has %d subframes.' % len(subframes))
+        for frame in subframes:
+            self.browser.switch_to.frame(frame)
+            self.frame_changed(frame)
+            found = self._text_present_by_xpath(text)
+            self.browser.switch_to.default_content()
+            self.frame_changed()
+            if found:
+                return True
+        return False
+
+    def frame_changed(self, locator=None):
+        """Records that frame `locator` was selected.
+
+        Selecting a frame is relative to the current frame. Calling this
+        method without `locator` resets the frame path to the top level.
+        """
+        if locator is None:
+            self.element_cache.frame_path = ()
+        else:
+            self.element_cache.frame_path += (locator,)
+        self.element_cache.clear()
+        self._frames_selected = None
+
+    def compile(self, locator, tag=None, parent=None):
+        """Returns `locator` parsed into a reusable `CompiledLocator`.
+
+        If the `optimizer` is enabled and `parent` is not a WebElement,
+        XPath locators are rewritten to equivalent faster ones.
+
+        Compiled locators are cached by ``(locator, tag)`` in a bounded LRU
+        cache that is cleared whenever strategies are registered or
+        unregistered. See :meth:`cache_info` for cache statistics.
+        """
+        optimize = self.optimizer.enabled and not self._is_webelement(parent)
+        key = (locator, tag, optimize)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compile(locator, tag, optimize=optimize)
+            self._compiled.set(key, compiled)
+        return compiled
+
+    def cache_info(self):
+        """Returns hits, misses, maxsize and currsize of the locator cache."""
+        return self._compiled.info()
+
+    def _compile(self, locator, tag, expanded=(), optimize=False):
+        prefix, criteria = self._parse_locator(locator)
+        if optimize:
+            prefix, criteria = self.optimizer.optimize(prefix, criteria)
+        if prefix in self._templates:
+            # Templates are compiled like the locators they expand to,
+            # so that they can use the same fast paths and batching.
+            # Quoted criteria is escaped for the strategy of the template.
+            template = self._templates[prefix]
+            if template.name in expanded:
+                raise ValueError("Locator template '%s' refers to itself."
+                                 % template.name)
+            target = self._parse_locator(template.template)[0]
+            escape = self._template_escapes.get(target)
+            return self._compile(template.expand(criteria, escape), tag,
+                                 expanded + (template.name,), optimize)
+        strategy = self._strategies[prefix]
+        tag, constraints = self._get_tag_and_constraints(tag)
+        query = None
+        if prefix == 'default':
+            query = self._compile_default_query(criteria, tag, constraints)
+        return CompiledLocator(prefix, strategy, criteria, tag, constraints,
+                               query)
+
+    def find_many(self, locators, tag=None, first_only=True, required=True,
+                  parent=None):
+        """Find elements matching all `locators` at once.
+
+        Locators using ``id``, ``name``, ``identifier``, ``class``, ``tag``,
+        ``css``, ``xpath``, ``sizzle`` or the default strategy are resolved
+        with one JavaScript call. If `first_only` is true, only the first
+        match of each locator is returned from the browser. Other locators,
+        and all locators if the browser does not support JavaScript, are
+        resolved one by one like with :meth:`find`. To retain the implicit
+        wait semantics, locators not matching anything are also resolved
+        one by one if an implicit wait is set.
+
+        Other arguments have the same semantics as with :meth:`find` and
+        they apply to all locators. Returns a list containing the result
+        of each locator in the same order as `locators`.
+        """
+        if parent and not self._is_webelement(parent):
+            raise ValueError('Parent must be Selenium WebElement but it '
+                             'was {}'.format(type(parent)))
+        if not parent:
+            self._restore_frames_if_outermost()
+        if first_only:
+            window = (0, 1)
+        else:
+            window = self._get_window(first_only, None, 0)
+        if self.profiler.enabled:
+            names = ', '.join(locator for locator in locators
+                              if not self._is_webelement(locator))
+            found = self.profiler.profile(self.browser, 'batch', names,
+                                          self._find_batch, locators, tag,
+                                          parent, window)
+        else:
+            found = self._find_batch(locators, tag, parent, window)
+        results = []
+        for locator, elements in zip(locators, found):
+            if self._is_webelement(locator):
+                results.append(locator if first_only else [locator])
+                continue
+            if elements is None or not elements and \
+                    self._get_implicit_wait():
+                elements = self.find(locator, tag, False, False, parent)
+            if required and not elements:
+                raise ElementNotFound("Element with locator '{}' not found."
+                                      .format(locator))
+            if first_only:
+                elements = elements[0] if elements else None
+            else:
+                elements = self._truncate(locator, elements)
+            results.append(elements)
+        return results
+
+    def _find_batch(self, locators, tag, parent, window=None):
+        batch = []
+        for locator in locators:
+            if not (self._is_webelement(locator) or
+                    self._split_frame_path(locator)[0]):
+                compiled = self.compile(locator, tag, parent)
+                queries = self._get_browser_queries(compiled, parent)
+                if queries:
+                    item = {'queries': queries, 'tag': compiled.tag,
+                            'constraints': compiled.constraints}
+                    if window:
+                        item['limit'] = window[1]
+                    batch.append(item)
+                    continue
+            batch.append(None)
+        if not any(batch):
+            return batch
+        try:
+            found = self.browser.execute_script(FIND_MANY_SCRIPT,
+                                                batch, parent)
+        except WebDriverException as err:
+            logger.debug('Finding elements in browser failed: %s' % err)
+            return [None] * len(batch)
+        if not isinstance(found, list) or len(found) != len(batch):
+            logger.debug("WebDriver batch find returned %s" % found)
+            return [None] * len(batch)
+        return found
+
+    def _get_browser_queries(self, compiled, parent=None):
+        criteria = compiled.criteria
+        if self._uses_base_url(compiled):
+            # The URL is resolved in the browser instead of reading it.
+            self.base_url_reads_saved += 1
+            return [['url xpath', [compiled.query.xpath,
+                                   list(compiled.query.url_attrs),
+                                   criteria]]]
+        if compiled.query is not None:
+            return [['xpath', compiled.query.xpath]]
+        if compiled.strategy == self._find_by_xpath:
+            return [['xpath', criteria]]
+        if compiled.strategy == self._find_by_css_selector:
+            return [['css', criteria]]
+        if compiled.strategy == self._find_by_sizzle_selector:
+            return None if self._is_webelement(parent) else [['sizzle',
+                                                              criteria]]
+        if compiled.strategy == self._find_by_tag_name:
+            return [['css', criteria]]
+        if compiled.strategy == self._find_by_class_name:
+            return [['css', '[class~=%s]' % escape_css_value(criteria)]]
+        names = {self._find_by_id: ['id'],
+                 self._find_by_name: ['name'],
+                 self._find_by_identifier: ['id', 'name']}
+        if compiled.strategy in names:
+            return [['css', '[%s=%s]' % (name, escape_css_value(criteria))]
+                    for name in names[compiled.strategy]]
+        return None
+
+    def _find(self, compiled, parent, first_only, window=None):
+        if first_only:
+            elements = self._find_first(compiled, parent)
+            if elements is not None:
+                return elements
+        elif window or self._uses_base_url(compiled) or \
+                compiled.strategy == self._find_by_identifier:
+            # The identifier strategy orders elements matching by id
+            # before elements matching by name, which the script does
+            # without separate calls for ordering and filtering.
+            elements = self._find_in_browser(compiled, parent,
+                                             *(window or (0, None)))
+            if elements is not None:
+                return elements
+        elements = self._find_elements(compiled, parent)
+        if window:
+            offset, limit = window
+            elements = elements[offset:offset + limit if limit else None]
+        return elements
+
+    def _find_first(self, compiled, parent):
+        # Returns a list containing at most the first matching element, or
+        # None if all matching elements need to be searched. Locators not
+        # needing client side filtering use the singular WebDriver find and
+        # others a script that stops at the first match. Scripts do not
+        # honor the implicit wait, so a failed script search is repeated
+        # with a normal search if an implicit wait is set. Default strategy
+        # queries depending on the page URL also use a script so that the
+        # URL does not need to be read separately.
+        if self._uses_base_url(compiled):
+            elements = self._find_in_browser(compiled, parent, 0, 1)
+            if elements is not None:
+                return elements
+        if compiled.query is not None:
+            return self._find_by_default_query(compiled.query,
+                                               compiled.criteria, parent,
+                                               first_only=True)
+        native = self._get_native_first_finder(compiled, parent)
+        if native:
+            return self._find_first_natively(*native)
+        return self._find_in_browser(compiled, parent, 0, 1)
+
+    def _find_in_browser(self, compiled, parent, offset, limit):
+        # Returns at most `limit` elements after skipping `offset` elements
+        # using a script, or None if the locator cannot be searched with
+        # a script or the elements need to be searched normally.
+        queries = self._get_browser_queries(compiled, parent)
+        if not queries:
+            return None
+        item = {'queries': queries, 'tag': compiled.tag,
+                'constraints': compiled.constraints}
+        if offset:
+            item['offset'] = offset
+        if limit:
+            item['limit'] = limit
+        root = parent if self._is_webelement(parent) else None
+        try:
+            found = self.browser.execute_script(FIND_MANY_SCRIPT, [item],
+                                                root)
+        except WebDriverException as err:
+            logger.debug('Finding elements in browser failed: %s' % err)
+            return None
+        if not isinstance(found, list) or len(found) != 1:
+            logger.debug("WebDriver element find returned %s" % found)
+            return None
+        elements = found[0]
+        if elements is None or not elements and self._get_implicit_wait():
+            return None
+        return self._normalize(elements)
+
+    def _get_native_first_finder(self, compiled, parent):
+        strategy = compiled.strategy
+        criteria = compiled.criteria
+        tag = compiled.tag
+        if compiled.constraints or not (tag is None or
+                                        self._is_simple_tag(tag)):
+            return None
+        if strategy == self._find_by_xpath:
+            if tag:
+                return (parent.find_element_by_xpath,
+                        self._get_xpath_with_tag(criteria, tag))
+            return parent.find_element_by_xpath, criteria
+        if strategy == self._find_by_css_selector and not tag:
+            return parent.find_element_by_css_selector, criteria
+        attributes = {self._find_by_id: ('id', parent.find_element_by_id),
+                      self._find_by_name: ('name',
+                                           parent.find_element_by_name)}
+        if strategy in attributes:
+            name, finder = attributes[strategy]
+            if tag:
+                return (parent.find_element_by_css_selector,
+                        self._get_css_attribute_selector(tag, name, criteria))
+            return finder, criteria
+        if strategy == self._find_by_class_name:
+            if tag:
+                return (parent.find_element_by_css_selector,
+                        '%s[class~=%s]' % (tag, escape_css_value(criteria)))
+            return parent.find_element_by_class_name, criteria
+        if strategy == self._find_by_tag_name and tag in (None,
+                                                          criteria.lower()):
+            return parent.find_element_by_tag_name, criteria
+        if tag in (None, 'a'):
+            if strategy == self._find_by_link_text:
+                return parent.find_element_by_link_text, criteria
+            if strategy == self._find_by_partial_link_text:
+                return parent.find_element_by_partial_link_text, criteria
+        return None
+
+    def _find_first_natively(self, finder, value):
+        # NoSuchElementException is raised only after the implicit wait,
+        # so there is no need to search again with the plural find.
+        try:
+            element = finder(value)
+        except NoSuchElementException:
+            return []
+        return [element] if element is not None else []
+
+    def _find_elements(self, compiled, parent):
+        if compiled.query is not None:
+            return self._find_by_default_query(compiled.query,
+                                               compiled.criteria, parent)
+        return compiled.strategy(compiled.criteria, compiled.tag,
+                                 compiled.constraints, parent=parent)
+
     def register(self, strategy_name, strategy_keyword, persist=False):
         strategy = CustomLocator(self.ctx, strategy_name, strategy_keyword)
         if strategy.name in self._strategies:
             raise RuntimeError("The custom locator '%s' cannot be registered. "
                                "A locator of that name already exists."
                                % strategy.name)
-        self._strategies[strategy.name] = strategy.find
+        if strategy.template is not None:
+            self._templates[strategy.name] = strategy
+        if strategy.script is not None:
+            # Scripts do not get the tag and constraints.
+            self._strategies[strategy.name] = partial(
+                self._find_by_script_strategy, strategy)
+        else:
+            self._strategies[strategy.name] = strategy.find
+        self._compiled.clear()
         if is_falsy(persist):
             # Unregister after current scope ends
             events.on('scope_end', 'current', self.unregister, strategy.name)
@@ -98,6 +1317,15 @@ class ElementFinder(ContextAware):
             raise RuntimeError("Cannot unregister the non-registered strategy '%s'."
                                % strategy_name)
         del self._strategies[strategy_name]
+        if strategy_name in self._templates:
+            del self._templates[strategy_name]
+        self._compiled.clear()
+
+    def _find_by_script_strategy(self, strategy, criteria, tag, constraints,
+                                 parent):
+        return self._filter_elements(
+            list(strategy.find(criteria, tag, constraints, parent)), tag,
+            constraints)
 
     def _is_webelement(self, element):
         # Hook for unit tests
@@ -108,22 +1336,53 @@ class ElementFinder(ContextAware):
             raise ValueError('This method does not allow WebElement as parent')
 
     def _find_by_identifier(self, criteria, tag, constraints, parent):
-        elements = self._normalize(parent.find_elements_by_id(criteria)) \
-            + self._normalize(parent.find_elements_by_name(criteria))
-        return self._filter_elements(elements, tag, constraints)
+        simple_tag = self._is_simple_tag(tag)
+        xpath_criteria = escape_xpath_value(criteria)
+        xpath = "%s//%s[@id=%s or @name=%s]" % (
+            '.' if self._is_webelement(parent) else '',
+            tag if simple_tag else '*',
+            xpath_criteria, xpath_criteria
+        )
+        elements = self._normalize(parent.find_elements_by_xpath(xpath))
+        if len(elements) < 2:
+            return self._filter_elements(elements, tag, constraints,
+                                         tag_matched=simple_tag)
+        try:
+            return self._normalize(self.browser.execute_script(
+                ORDER_BY_IDENTIFIER_SCRIPT, elements, criteria,
+                None if simple_tag else tag, constraints))
+        except WebDriverException as err:
+            logger.debug('Ordering elements in browser failed: %s' % err)
+        elements = self._filter_elements(elements, tag, constraints,
+                                         tag_matched=simple_tag)
+        ids = [element for element in elements
+               if element.get_attribute('id') == criteria]
+        return ids + [element for element in elements if element not in ids]
 
     def _find_by_id(self, criteria, tag, constraints, parent):
-        return self._filter_elements(parent.find_elements_by_id(criteria),
-                                     tag, constraints)
+        return self._find_by_attribute('id', criteria, tag, constraints,
+                                       parent, parent.find_elements_by_id)
 
     def _find_by_name(self, criteria, tag, constraints, parent):
-        return self._filter_elements(parent.find_elements_by_name(criteria),
-                                     tag, constraints)
+        return self._find_by_attribute('name', criteria, tag, constraints,
+                                       parent, parent.find_elements_by_name)
 
     def _find_by_xpath(self, criteria, tag, constraints, parent):
+        if self._is_simple_tag(tag):
+            xpath = self._get_xpath_with_tag(criteria, tag)
+            return self._filter_elements(parent.find_elements_by_xpath(xpath),
+                                         tag, constraints, tag_matched=True)
         return self._filter_elements(parent.find_elements_by_xpath(criteria),
                                      tag, constraints)
 
+    def _get_xpath_with_tag(self, xpath, tag):
+        # In HTML documents, self::tag matches only elements in the HTML
+        # namespace. Local names are compared in lower case like tag
+        # names are compared elsewhere, so that SVG and MathML elements
+        # match too.
+        return "(%s)[translate(local-name(), '%s', '%s')='%s']" % (
+            xpath, string.ascii_uppercase, string.ascii_lowercase, tag)
+
     def _find_by_dom(self, criteria, tag, constraints, parent):
         self._disallow_webelement_parent(parent)
         result = self.browser.execute_script("return %s;" % criteria)
@@ -135,20 +1394,19 @@ class ElementFinder(ContextAware):
 
     def _find_by_sizzle_selector(self, criteria, tag, constraints, parent):
         self._disallow_webelement_parent(parent)
-        js = "return jQuery('%s').get();" % criteria.replace("'", "\\'")
         return self._filter_elements(
-            self.browser.execute_script(js),
+            self.page_runtime.call('sizzle', criteria),
             tag, constraints)
 
     def _find_by_link_text(self, criteria, tag, constraints, parent):
         return self._filter_elements(
             parent.find_elements_by_link_text(criteria),
-            tag, constraints)
+            tag, constraints, tag_matched=tag == 'a')
 
     def _find_by_partial_link_text(self, criteria, tag, constraints, parent):
         return self._filter_elements(
             parent.find_elements_by_partial_link_text(criteria),
-            tag, constraints)
+            tag, constraints, tag_matched=tag == 'a')
 
     def _find_by_css_selector(self, criteria, tag, constraints, parent):
         return self._filter_elements(
@@ -156,22 +1414,68 @@ class ElementFinder(ContextAware):
             tag, constraints)
 
     def _find_by_class_name(self, criteria, tag, constraints, parent):
+        if self._is_simple_tag(tag):
+            selector = '%s[class~=%s]' % (tag, escape_css_value(criteria))
+            return self._filter_elements(
+                parent.find_elements_by_css_selector(selector),
+                tag, constraints, tag_matched=True)
         return self._filter_elements(
             parent.find_elements_by_class_name(criteria),
             tag, constraints)
 
     def _find_by_tag_name(self, criteria, tag, constraints, parent):
+        if tag is not None and criteria.lower() != tag:
+            return []
         return self._filter_elements(
             parent.find_elements_by_tag_name(criteria),
-            tag, constraints)
+            tag, constraints, tag_matched=True)
+
+    def _find_by_attribute(self, name, criteria, tag, constraints, parent,
+                           find_elements):
+        if self._is_simple_tag(tag):
+            selector = self._get_css_attribute_selector(tag, name, criteria)
+            return self._filter_elements(
+                parent.find_elements_by_css_selector(selector),
+                tag, constraints, tag_matched=True)
+        return self._filter_elements(find_elements(criteria), tag,
+                                     constraints)
+
+    def _get_css_attribute_selector(self, tag, name, value):
+        return '%s[%s=%s]' % (tag, name, escape_css_value(value))
+
+    def _is_simple_tag(self, tag):
+        return tag is not None and self._simple_tag.match(tag) is not None
 
     def _find_by_sc_locator(self, criteria, tag, constraints, parent):
         self._disallow_webelement_parent(parent)
-        js = "return isc.AutoTest.getElement('%s')" % criteria.replace("'", "\\'")
-        return self._filter_elements([self.browser.execute_script(js)],
-                                     tag, constraints)
+        element = self.page_runtime.call('scLocator', criteria)
+        if element is None:
+            return []
+        return self._filter_elements([element], tag, constraints)
 
     def _find_by_default(self, criteria, tag, constraints, parent):
+        query = self._compile_default_query(criteria, tag, constraints)
+        return self._find_by_default_query(query, criteria, parent)
+
+    def _find_by_default_query(self, query, criteria, parent,
+                               first_only=False):
+        xpath = self._get_default_xpath(query, criteria)
+        return self._find_by_default_xpath(xpath, parent, first_only)
+
+    def _find_by_default_xpath(self, xpath, parent, first_only):
+        if first_only:
+            return self._find_first_natively(parent.find_element_by_xpath,
+                                             xpath)
+        return self._normalize(parent.find_elements_by_xpath(xpath))
+
+    def _get_default_xpath(self, query, criteria):
+        if not query.url_attrs:
+            return query.xpath
+        url_searchers = self._get_attrs_with_url(query.url_attrs, criteria)
+        return query.xpath[:-2] + ''.join(' or ' + searcher for searcher
+                                          in url_searchers) + ')]'
+
+    def _compile_default_query(self, criteria, tag, constraints):
         if tag in self._key_attrs:
             key_attrs = self._key_attrs[tag]
         else:
@@ -180,14 +1484,15 @@ class ElementFinder(ContextAware):
         xpath_tag = tag if tag is not None else '*'
         xpath_constraints = self._get_xpath_constraints(constraints)
         xpath_searchers = ["%s=%s" % (attr, xpath_criteria) for attr in key_attrs]
-        xpath_searchers.extend(self._get_attrs_with_url(key_attrs, criteria))
         xpath = "//%s[%s%s(%s)]" % (
             xpath_tag,
             ' and '.join(xpath_constraints),
             ' and ' if xpath_constraints else '',
             ' or '.join(xpath_searchers)
         )
-        return self._normalize(parent.find_elements_by_xpath(xpath))
+        url_attrs = tuple(attr for attr in ['@src', '@href']
+                          if attr in key_attrs)
+        return DefaultQuery(xpath, url_attrs)
 
     def _get_xpath_constraints(self, constraints):
         xpath_constraints = [self._get_xpath_constraint(name, value)
@@ -259,12 +1564,21 @@ class ElementFinder(ContextAware):
                 return False
         return True
 
-    def _filter_elements(self, elements, tag, constraints):
+    def _filter_elements(self, elements, tag, constraints,
+                         tag_matched=False):
         elements = self._normalize(elements)
-        if tag is None:
+        if tag is None or not elements or tag_matched and not constraints:
             return elements
-        return [element for element in elements
-                if self._element_matches(element, tag, constraints)]
+        try:
+            matches = self.browser.execute_script(FILTER_ELEMENTS_SCRIPT,
+                                                  elements, tag, constraints)
+        except WebDriverException as err:
+            # The webdriver implementation doesn't support JavaScript so
+            # elements must be filtered one by one.
+            logger.debug('Filtering elements in browser failed: %s' % err)
+            return [element for element in elements
+                    if self._element_matches(element, tag, constraints)]
+        return self._normalize(matches)
 
     def _get_attrs_with_url(self, key_attrs, criteria):
         attrs = []
@@ -278,10 +1592,19 @@ class ElementFinder(ContextAware):
                 attrs.append("%s=%s" % (attr, xpath_url))
         return attrs
 
+    def _uses_base_url(self, compiled):
+        # Only default strategy queries matching src or href attributes
+        # depend on the URL of the page.
+        return compiled.query is not None and bool(compiled.query.url_attrs)
+
     def _get_base_url(self):
+        if self._lookup_depth and self._base_url is not None:
+            return self._base_url
         url = self.browser.current_url
         if '/' in url:
             url = '/'.join(url.split('/')[:-1])
+        if self._lookup_depth:
+            self._base_url = url
         return url
 
     def _normalize(self, elements):
@@ -0,0 +1,302 @@
+# Copyright 2008-2011 Nokia Networks
+# Copyright 2011-2016 Ryan Tomac, Ed Manlove and contributors
+# Copyright 2016-     Robot Framework Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rewrites XPath locators to equivalent faster forms.
+
+Can also be used from the command line to report the estimated cost of
+locators used in Robot Framework test data:
+
+    python -m SeleniumLibrary.locators.locatoroptimizer path [path ...]
+
+Paths can be files or directories. Directories are searched recursively
+for ``.robot`` files.
+"""
+
+import os
+import re
+import sys
+from collections import namedtuple
+
+from SeleniumLibrary.utils import escape_css_value
+
+
+COST_FAST = 'fast'
+COST_MEDIUM = 'medium'
+COST_SLOW = 'slow'
+
+LocatorCost = namedtuple('LocatorCost', 'cost, strategy, suggestion')
+
+# Values of these attributes are matched case-insensitively by CSS
+# selectors in HTML documents, but case-sensitively by XPath.
+CASE_INSENSITIVE_ATTRIBUTES = frozenset('''
+accept accept-charset align alink axis bgcolor charset checked clear codetype
+color compact declare defer dir direction disabled enctype face frame
+hreflang http-equiv lang language link media method multiple nohref noresize
+noshade nowrap readonly rel rev rules scope scrolling selected shape target
+text type valign valuetype vlink
+'''.split())
+
+# Names of HTML elements. In HTML documents, XPath name tests match only
+# elements in the HTML namespace, but CSS type selectors match elements
+# in any namespace. Names also used by SVG elements (a, font, script,
+# style and title) are left out for that reason.
+HTML_ELEMENTS = frozenset('''
+abbr acronym address applet area article aside audio b base basefont bdi bdo
+big blink blockquote body br button canvas caption center cite code col
+colgroup data datalist dd del details dfn dialog dir div dl dt em embed
+fieldset figcaption figure footer form frame frameset h1 h2 h3 h4 h5 h6 head
+header hgroup hr html i iframe img input ins isindex kbd keygen label legend
+li link listing main map mark marquee menu meta meter nav nobr noembed
+noframes noscript object ol optgroup option output p param picture plaintext
+pre progress q rb rp rt rtc ruby s samp search section select slot small
+source spacer span strike strong sub summary sup table tbody td template
+textarea tfoot th thead time tr track tt u ul var video wbr xmp
+'''.split())
+
+
+class LocatorOptimizer(object):
+    _step = re.compile(r'(//?)(\*|[a-z][a-z0-9-]*)')
+    _predicate = re.compile(r'\[([^\[\]]+)\]')
+    _condition = re.compile(
+        r'''^\s*(?:'''
+        r'''@(?P<attr>[a-z_][a-z0-9_-]*)\s*=\s*(?P<value>'[^']*'|"[^"]*")|'''
+        r'''(?P<function>contains|starts-with)\(\s*@(?P<function_attr>'''
+        r'''[a-z_][a-z0-9_-]*)\s*,\s*(?P<function_value>'[^']*'|"[^"]*")\s*\)|'''
+        r'''@(?P<exists>[a-z_][a-z0-9_-]*)'''
+        r''')\s*$''')
+    _operators = {'contains': '*=', 'starts-with': '^='}
+    _slow_xpath = re.compile(r'//\*|text\(\)|normalize-space|contains\(|'
+                             r'ancestor|following|preceding|^\(')
+
+    def __init__(self):
+        """Rewrites XPath locators to equivalent ``id`` or CSS locators.
+
+        Only XPath expressions that are provably equivalent are rewritten.
+        They must start with ``//``, consist of ``*`` or lower case HTML
+        element names not shared with SVG joined with ``/`` or ``//`` and
+        use only predicates comparing, testing existence or matching the
+        start of or a substring in attribute values. Because XPath
+        expressions are not relative to a parent element, rewriting must
+        not be used when searching elements under a parent.
+        """
+        self.enabled = False
+        self.rewrites = 0
+
+    def optimize(self, prefix, criteria):
+        """Returns `prefix` and `criteria` possibly rewritten."""
+        if prefix.lower() != 'xpath':
+            return prefix, criteria
+        rewritten = self.xpath_to_css(criteria)
+        if rewritten is None:
+            return prefix, criteria
+        self.rewrites += 1
+        return rewritten
+
+    def xpath_to_css(self, xpath):
+        """Returns `xpath` as ``(prefix, criteria)`` or ``None``.
+
+        ``prefix`` is ``id`` if the expression matches any element by its
+        id and ``css`` otherwise. ``None`` is returned if the expression
+        cannot be rewritten.
+        """
+        if not xpath.startswith('//'):
+            return None
+        parts = []
+        conditions = []
+        index = 0
+        while index < len(xpath):
+            step = self._step.match(xpath, index)
+            if not step:
+                return None
+            separator, name = step.groups()
+            if name != '*' and name not in HTML_ELEMENTS:
+                return None
+            index = step.end()
+            selectors = []
+            while index < len(xpath) and xpath[index] == '[':
+                predicate = self._predicate.match(xpath, index)
+                if not predicate:
+                    return None
+                for condition in re.split(r'\s+and\s+', predicate.group(1)):
+                    selector = self._condition_to_css(condition)
+                    if selector is None:
+                        return None
+                    selectors.append(selector)
+                    conditions.append(condition)
+                index = predicate.end()
+            if parts:
+                parts.append(' ' if separator == '//' else ' > ')
+            parts.append((name if name != '*' or not selectors else '') +
+                         ''.join(selectors))
+        if len(parts) == 1 and name == '*' and len(conditions) == 1:
+            match = self._condition.match(conditions[0])
+            if match.group('attr') == 'id':
+                return 'id', match.group('value')[1:-1]
+        return 'css', ''.join(parts)
+
+    def _condition_to_css(self, condition):
+        match = self._condition.match(condition)
+        if not match:
+            return None
+        if match.group('exists'):
+            return '[%s]' % match.group('exists')
+        if match.group('attr'):
+            attr, value = match.group('attr'), match.group('value')
+            operator = '='
+        else:
+            attr = match.group('function_attr')
+            value = match.group('function_value')
+            operator = self._operators[match.group('function')]
+        if attr in CASE_INSENSITIVE_ATTRIBUTES:
+            return None
+        value = value[1:-1]
+        if operator != '=' and not value:
+            # XPath matches empty substrings, CSS does not.
+            return None
+        return '[%s%s%s]' % (attr, operator, escape_css_value(value))
+
+    def cost(self, prefix, criteria):
+        """Returns estimated `LocatorCost` of a locator.
+
+        ``cost`` is ``fast``, ``medium`` or ``slow``. ``suggestion`` is a
+        faster equivalent locator or ``None``.
+        """
+        prefix = prefix.lower()
+        if prefix in ('id', 'name', 'css', 'class', 'tag'):
+            return LocatorCost(COST_FAST, prefix, None)
+        if prefix in ('identifier', 'link', 'partial link'):
+            return LocatorCost(COST_MEDIUM, prefix, None)
+        if prefix == 'xpath':
+            rewritten = self.xpath_to_css(criteria)
+            if rewritten:
+                return LocatorCost(COST_MEDIUM, prefix,
+                                   '%s:%s' % rewritten)
+            if self._slow_xpath.search(criteria):
+                return LocatorCost(COST_SLOW, prefix, None)
+            return LocatorCost(COST_MEDIUM, prefix, None)
+        # The default strategy matches several attributes, and possibly
+        # also text, of all elements. Other strategies run JavaScript or
+        # custom keywords.
+        return LocatorCost(COST_SLOW, prefix, None)
+
+
+class LocatorScanner(object):
+    _separator = re.compile(r'\s{2,}|\t')
+    _variable = re.compile(r'^[$@&]\{.*\}$')
+
+    def __init__(self, finder, keywords):
+        """Finds locators in Robot Framework test data.
+
+        `finder` is an `ElementFinder` used for parsing locators and
+        `keywords` is a set of normalized names of keywords whose first
+        argument is a locator. In addition to these arguments, all cells
+        having an explicit locator strategy prefix are considered
+        locators.
+        """
+        self.finder = finder
+        self.keywords = keywords
+        self.optimizer = LocatorOptimizer()
+
+    def scan(self, path):
+        """Yields ``(line number, locator, LocatorCost)`` for file `path`."""
+        with open(path, 'rb') as source:
+            lines = source.read().decode('UTF-8').splitlines()
+        for number, line in enumerate(lines, start=1):
+            for locator in self._find_locators(self._split(line)):
+                prefix, criteria = self.finder._parse_locator(locator)
+                yield number, locator, self.optimizer.cost(prefix, criteria)
+
+    def _split(self, line):
+        if line.startswith('| '):
+            cells = line.strip().strip('|').split(' | ')
+        else:
+            cells = self._separator.split(line)
+        return [cell.strip() for cell in cells if cell.strip()]
+
+    def _find_locators(self, cells):
+        if not cells or cells[0].startswith(('#', '*', '[')):
+            return
+        argument = None
+        for index, cell in enumerate(cells[:-1]):
+            if self._normalize(cell) in self.keywords:
+                argument = index + 1
+                break
+        for index, cell in enumerate(cells):
+            if self._variable.match(cell):
+                continue
+            if index == argument or self._has_explicit_strategy(cell):
+                yield cell
+
+    def _has_explicit_strategy(self, cell):
+        if cell.startswith(('//', '(//')):
+            return True
+        prefix, _ = self.finder._parse_locator(cell)
+        return prefix != 'default' or re.match(r'^default\s*[:=]', cell)
+
+    def _normalize(self, name):
+        name = name.lower().replace(' ', '').replace('_', '')
+        if name.startswith('seleniumlibrary.'):
+            name = name[len('seleniumlibrary.'):]
+        return name
+
+
+def get_locator_keywords():
+    """Returns normalized names of keywords taking a locator argument."""
+    from SeleniumLibrary import SeleniumLibrary
+    library = SeleniumLibrary()
+    keywords = set()
+    for name, method in library.keywords.items():
+        code = method.__code__
+        arguments = code.co_varnames[1:code.co_argcount]
+        if arguments and arguments[0] in ('locator', 'xpath'):
+            keywords.add(name.lower().replace(' ', '').replace('_', ''))
+    return keywords
+
+
+def find_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith('.robot'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def main(paths, output=sys.stdout):
+    from .elementfinder import ElementFinder
+    if not paths:
+        output.write(__doc__)
+        return 251
+    scanner = LocatorScanner(ElementFinder(None), get_locator_keywords())
+    counts = {COST_FAST: 0, COST_MEDIUM: 0, COST_SLOW: 0}
+    for path in find_files(paths):
+        for number, locator, cost in scanner.scan(path):
+            counts[cost.cost] += 1
+            suggestion = (' -> %s' % cost.suggestion
+                          if cost.suggestion else '')
+            output.write('%s:%d: %s (%s) %s%s\n'
+                         % (path, number, cost.cost, cost.strategy, locator,
+                            suggestion))
+    output.write('%d fast, %d medium and %d slow locators.\n'
+                 % (counts[COST_FAST], counts[COST_MEDIUM], counts[COST_SLOW]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+# Copyright 2008-2011 Nokia Networks
+# Copyright 2011-2016 Ryan Tomac, Ed Manlove and contributors
+# Copyright 2016-     Robot Framework Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import os
+import time
+from collections import OrderedDict
+
+from robot.api import logger
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+from robot.utils import is_integer, is_unicode
+
+from SeleniumLibrary.base.robotlibcore import PY2
+
+
+FIELDS = ('strategy', 'locator', 'calls', 'time', 'commands', 'elements')
+
+
+class LocatorProfiler(object):
+
+    def __init__(self, report=None):
+        """Collects statistics about locating elements.
+
+        Statistics are collected per strategy and locator when `enabled`
+        is true. They contain number of calls, total wall time in seconds,
+        number of WebDriver commands and number of elements returned.
+        Only the outermost lookup is recorded. Nested lookups, for example,
+        done by custom locator keywords or when using parent elements or
+        frame paths, are included in the statistics of the outer lookup.
+
+        If `report` is given, it is a path to a JSON or CSV file where
+        :meth:`write_report` writes the statistics.
+        """
+        self.enabled = False
+        self.report = report
+        self._statistics = OrderedDict()
+        self._commands = 0
+        self._depth = 0
+
+    def profile(self, browser, strategy, locator, find, *args):
+        """Calls `find` with `args` and records statistics of the call."""
+        if not self._depth:
+            self._count_commands(browser)
+        self._depth += 1
+        start_time = time.time()
+        start_commands = self._commands
+        elements = 0
+        try:
+            result = find(*args)
+            elements = self._count_elements(result)
+            return result
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._stop_counting_commands(browser)
+                self._record(strategy, locator, time.time() - start_time,
+                             self._commands - start_commands, elements)
+
+    def _count_elements(self, result):
+        # Batch lookups return a list of results and counting lookups
+        # the number of elements.
+        if isinstance(result, list):
+            return sum(self._count_elements(item) for item in result)
+        if is_integer(result) and not isinstance(result, bool):
+            return result
+        return int(result is not None)
+
+    def _count_commands(self, browser):
+        execute = browser.execute
+
+        def counting_execute(command, params=None):
+            self._commands += 1
+            return execute(command, params)
+
+        browser.execute = counting_execute
+
+    def _stop_counting_commands(self, browser):
+        del browser.execute
+
+    def _record(self, strategy, locator, elapsed, commands, elements):
+        key = (strategy, locator)
+        if key not in self._statistics:
+            self._statistics[key] = [0, 0.0, 0, 0]
+        statistics = self._statistics[key]
+        statistics[0] += 1
+        statistics[1] += elapsed
+        statistics[2] += commands
+        statistics[3] += elements
+
+    def clear(self):
+        self._statistics.clear()
+
+    def statistics(self):
+        """Returns statistics per strategy and per locator.
+
+        The returned dictionary contains lists ``strategies`` and
+        ``locators``. Their items are dictionaries containing ``strategy``,
+        ``calls``, ``time``, ``commands`` and ``elements``. Items in
+        ``locators`` also contain ``locator``. Both lists are sorted by
+        the total time, slowest first.
+        """
+        strategies = OrderedDict()
+        locators = []
+        for (strategy, locator), values in self._statistics.items():
+            locators.append(self._to_dict(strategy, locator, values))
+            if strategy not in strategies:
+                strategies[strategy] = [0, 0.0, 0, 0]
+            for index, value in enumerate(values):
+                strategies[strategy][index] += value
+        strategies = [self._to_dict(strategy, None, values)
+                      for strategy, values in strategies.items()]
+        return {
+            'strategies': sorted(strategies, key=lambda s: -s['time']),
+            'locators': sorted(locators, key=lambda s: -s['time'])
+        }
+
+    def _to_dict(self, strategy, locator, values):
+        stats = OrderedDict(zip(FIELDS, (strategy, locator, values[0],
+                                         round(values[1], 6), values[2],
+                                         values[3])))
+        if locator is None:
+            del stats['locator']
+        return stats
+
+    def write_report(self):
+        """Writes statistics to the report file, if one is configured.
+
+        A relative path is considered relative to the output directory.
+        The format is CSV if the path ends with ``.csv`` and JSON
+        otherwise. In CSV reports rows without a locator contain totals
+        of a strategy.
+        """
+        if not (self.enabled and self.report):
+            return
+        path = self._get_report_path()
+        statistics = self.statistics()
+        if path.lower().endswith('.csv'):
+            self._write_csv(path, statistics)
+        else:
+            with open(path, 'w') as report:
+                json.dump(statistics, report, indent=2)
+        logger.info('Locator statistics written to %s.' % path)
+
+    def _write_csv(self, path, statistics):
+        rows = [dict(stats, locator='') for stats in statistics['strategies']]
+        rows.extend(statistics['locators'])
+        if PY2:
+            report = open(path, 'wb')
+            rows = [dict((name, self._encode(value))
+                         for name, value in row.items()) for row in rows]
+        else:
+            report = open(path, 'w', newline='')
+        with report:
+            writer = csv.DictWriter(report, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def _encode(self, value):
+        return value.encode('UTF-8') if is_unicode(value) else value
+
+    def _get_report_path(self):
+        if os.path.isabs(self.report):
+            return self.report
+        try:
+            directory = BuiltIn().get_variable_value('${OUTPUTDIR}')
+        except RobotNotRunningError:
+            directory = os.getcwdu() if PY2 else os.getcwd()
+        return os.path.join(directory, self.report)
@@ -0,0 +1,274 @@
+# Copyright 2008-2011 Nokia Networks
+# Copyright 2011-2016 Ryan Tomac, Ed Manlove and contributors
+# Copyright 2016-     Robot Framework Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    from selenium.webdriver.remote.webelement import isDisplayed_js
+except ImportError:    # Selenium < 3.5
+    isDisplayed_js = None
+
+from SeleniumLibrary.base import ContextAware
+
+
+RUNTIME_MISSING = 'SeleniumLibrary runtime missing'
+
+# Start of scripts using the runtime. The first argument is the runtime
+# version and the installed runtime is available as `runtime`.
+RUNTIME_CHECK = """
+var runtime = window.__seleniumLibraryRuntime;
+if (!runtime || runtime.version !== arguments[0]) {
+    return '%s';
+}
+""" % RUNTIME_MISSING
+
+# Start of asynchronous scripts using the runtime. Same as RUNTIME_CHECK
+# but a missing runtime is reported using the callback.
+ASYNC_RUNTIME_CHECK = """
+var runtime = window.__seleniumLibraryRuntime;
+if (!runtime || runtime.version !== arguments[0]) {
+    arguments[arguments.length - 1]('%s');
+    return;
+}
+""" % RUNTIME_MISSING
+
+# Calls a runtime function with the given arguments. Arguments are the
+# runtime version, the function name and the function arguments.
+CALL_SCRIPT = RUNTIME_CHECK + """
+return runtime.call(arguments[1], arguments[2]);
+"""
+
+# Installs the runtime into the current document. The minimal selector
+# engine is used with the sizzle strategy when jQuery is not available.
+# It supports CSS selectors extended with the most common jQuery specific
+# pseudo-classes, but not with the sibling combinators. Element state uses
+# the same displayed atom as WebElement.is_displayed when it is available.
+RUNTIME_SCRIPT = """
+window.__seleniumLibraryRuntime = (function (version, isDisplayed) {
+    var PSEUDO = /:(contains|visible|hidden|first|last|even|odd|eq|gt|lt)(?![\\w-])(?:\\((?:(["'])(.*?)\\2|([^)]*))\\))?/;
+
+    function isVisible(element) {
+        return !!(element.offsetWidth || element.offsetHeight ||
+                  element.getClientRects().length);
+    }
+
+    var filters = {
+        contains: function (element, index, arg) {
+            return (element.textContent || '').indexOf(arg) !== -1;
+        },
+        visible: function (element) { return isVisible(element); },
+        hidden: function (element) { return !isVisible(element); },
+        first: function (element, index) { return index === 0; },
+        last: function (element, index, arg, count) { return index === count - 1; },
+        even: function (element, index) { return index % 2 === 0; },
+        odd: function (element, index) { return index % 2 === 1; },
+        eq: function (element, index, arg, count) {
+            arg = parseInt(arg, 10);
+            return index === (arg < 0 ? count + arg : arg);
+        },
+        gt: function (element, index, arg) { return index > parseInt(arg, 10); },
+        lt: function (element, index, arg) { return index < parseInt(arg, 10); }
+    };
+
+    function toArray(nodes) {
+        return Array.prototype.slice.call(nodes);
+    }
+
+    function inDocumentOrder(elements) {
+        var result = [];
+        for (var i = 0; i < elements.length; i++) {
+            if (result.indexOf(elements[i]) === -1) {
+                result.push(elements[i]);
+            }
+        }
+        return result.sort(function (a, b) {
+            return a.compareDocumentPosition(b) & 2 ? 1 : -1;
+        });
+    }
+
+    // Splits `css` at the first top level character matching `separator`.
+    function split(css, separator) {
+        var depth = 0, quote = null;
+        for (var i = 0; i < css.length; i++) {
+            var c = css.charAt(i);
+            if (quote) {
+                if (c === '\\\\') {
+                    i++;
+                } else if (c === quote) {
+                    quote = null;
+                }
+            } else if (c === '"' || c === "'") {
+                quote = c;
+            } else if (c === '[' || c === '(') {
+                depth++;
+            } else if (c === ']' || c === ')') {
+                depth--;
+            } else if (!depth && separator.test(c)) {
+                return [css.slice(0, i), css.slice(i)];
+            }
+        }
+        return [css, ''];
+    }
+
+    // Pseudo-classes without a preceding selector apply to all elements.
+    function withUniversal(css) {
+        return /(^|[\\s>+~])$/.test(css) ? css + '*' : css;
+    }
+
+    function narrow(elements, css, root) {
+        if (elements === null) {
+            return toArray(root.querySelectorAll(withUniversal(css).trim()));
+        }
+        var parts = split(css, /[\\s>+~]/), head = parts[0], tail = parts[1];
+        if (head) {
+            elements = elements.filter(function (element) {
+                return element.matches(head);
+            });
+        }
+        if (!tail) {
+            return elements;
+        }
+        tail = withUniversal(tail).trim();
+        if (tail.charAt(0) === '+' || tail.charAt(0) === '~') {
+            throw new Error('Sibling combinators are not supported without jQuery.');
+        }
+        var found = [];
+        for (var i = 0; i < elements.length; i++) {
+            found = found.concat(toArray(elements[i].querySelectorAll(':scope ' + tail)));
+        }
+        return inDocumentOrder(found);
+    }
+
+    function selectOne(selector, root) {
+        var elements = null, rest = selector;
+        while (rest) {
+            var match = PSEUDO.exec(rest);
+            elements = narrow(elements, match ? rest.slice(0, match.index) : rest, root);
+            if (!match) {
+                break;
+            }
+            var filter = filters[match[1]], count = elements.length,
+                arg = match[3] !== undefined ? match[3] : match[4];
+            elements = elements.filter(function (element, index) {
+                return filter(element, index, arg, count);
+            });
+            rest = rest.slice(match.index + match[0].length);
+        }
+        return elements || [];
+    }
+
+    function select(selector, root) {
+        try {
+            return toArray(root.querySelectorAll(selector));
+        } catch (error) {
+            // Not a CSS selector, possibly uses jQuery extensions.
+        }
+        var found = [], rest = selector;
+        while (rest) {
+            var parts = split(rest, /,/);
+            found = found.concat(selectOne(parts[0].trim(), root));
+            rest = parts[1].slice(1);
+        }
+        return inDocumentOrder(found);
+    }
+
+    var functions = {
+        sizzle: function (selector, root) {
+            root = root || document;
+            if (window.jQuery) {
+                return window.jQuery(selector, root).get();
+            }
+            return select(selector, root);
+        },
+        scLocator: function (locator) {
+            return window.isc ? window.isc.AutoTest.getElement(locator) : null;
+        },
+        elementState: function (element) {
+            // Like WebElement.text, elements that are not displayed have
+            // no text. innerText of them would be their textContent. Text
+            // is trimmed and non-breaking spaces are normal spaces.
+            var displayed = isDisplayed ? isDisplayed(element) : null,
+                text = element.innerText !== undefined ? element.innerText
+                                                       : element.textContent;
+            text = displayed === false ? '' : text || '';
+            return {
+                displayed: displayed,
+                enabled: !(element.matches ? element.matches(':disabled')
+                                           : element.disabled === true),
+                readonly: element.hasAttribute('readonly') ||
+                          element.readOnly === true,
+                text: text.replace(/\\u00a0/g, ' ').replace(/^\\s+|\\s+$/g, '')
+            };
+        }
+    };
+
+    return {
+        version: version,
+        call: function (name, args) {
+            return functions[name].apply(null, args);
+        }
+    };
+})(arguments[0], """ + (isDisplayed_js or 'null') + """);
+"""
+
+INSTALL_SCRIPT = RUNTIME_SCRIPT + CALL_SCRIPT
+
+
+class PageRuntime(ContextAware):
+    """Helper functions installed into the page once per document.
+
+    Functions are called with :meth:`call` which sends only a short
+    constant script with the function name and its arguments. If the
+    runtime is not installed in the current document, or an older version
+    of it is, the runtime is installed and the call retried in the same
+    script.
+    """
+    version = 5
+
+    def __init__(self, ctx):
+        ContextAware.__init__(self, ctx)
+        self.installs = 0
+
+    @property
+    def displayed_atom(self):
+        """True if the runtime checks visibility like WebDriver does."""
+        return isDisplayed_js is not None
+
+    def call(self, function, *args):
+        return self.run(CALL_SCRIPT, function, list(args))
+
+    def run(self, script, *args):
+        """Runs `script` starting with ``RUNTIME_CHECK``.
+
+        The script gets the runtime version and then `args` as arguments.
+        The runtime is installed and the script retried if needed.
+        """
+        result = self.browser.execute_script(script, self.version, *args)
+        if result == RUNTIME_MISSING:
+            self.installs += 1
+            result = self.browser.execute_script(RUNTIME_SCRIPT + script,
+                                                 self.version, *args)
+        return result
+
+    def run_async(self, script, *args):
+        """Runs asynchronous `script` starting with ``ASYNC_RUNTIME_CHECK``.
+
+        Otherwise same as :meth:`run`.
+        """
+        execute = self.browser.execute_async_script
+        result = execute(script, self.version, *args)
+        if result == RUNTIME_MISSING:
+            self.installs += 1
+            result = execute(RUNTIME_SCRIPT + script, self.version, *args)
+        return result
@@ -28,27 +28,68 @@ WindowInfo = namedtuple('WindowInfo', 'handle, id, name, title, url')
 class WindowManager(ContextAware):
 
     def __init__(self, ctx):
+        """Selects windows and reads information about them.
+
+        Window information is cached per browser session and keyed by
+        window handle, so that selecting windows does not need to switch
+        to every window each time. `get_window_infos` used by keywords
+        listing windows always reads information about all windows again
+        and updates the cache. When selecting windows, information about
+        the current window is always read again and information about
+        other windows is read again after selecting them based on it. The
+        cache of a session is discarded when its window handles change,
+        when cached information turns out to be outdated or no window
+        matches a locator and when `clear` is called by keywords that
+        navigate or change the current window.
+        """
         self._strategies = {
             'title': self._select_by_title,
             'name': self._select_by_name,
             'url': self._select_by_url,
             None: self._select_by_default
         }
+        self._cache = {}
         ContextAware.__init__(self, ctx)
 
     def get_window_infos(self):
-        infos = []
+        # Windows may have changed after they were cached, for example,
+        # when a popup has finished loading.
+        self._cache.pop(self.browser.session_id, None)
+        return self._get_window_infos(self.browser)[1]
+
+    def _get_window_infos(self, browser):
+        # Returns the handle of the current window and infos of all windows.
+        handles = browser.window_handles
+        cached = self._get_cached_infos(browser, handles)
         try:
-            starting_handle = self.browser.current_window_handle
+            starting_handle = browser.current_window_handle
         except NoSuchWindowException:
             starting_handle = None
+        if starting_handle in handles:
+            cached[starting_handle] = self._get_current_window_info(browser)
+        switched = False
         try:
-            for handle in self.browser.window_handles:
-                self.browser.switch_to.window(handle)
-                infos.append(self._get_current_window_info(self.browser))
+            for handle in handles:
+                if handle not in cached:
+                    browser.switch_to.window(handle)
+                    switched = True
+                    cached[handle] = self._get_current_window_info(browser)
         finally:
-            if starting_handle:
-                self.browser.switch_to.window(starting_handle)
+            if starting_handle and switched:
+                browser.switch_to.window(starting_handle)
+        return starting_handle, [cached[handle] for handle in handles]
+
+    def clear(self):
+        """Discards cached information about windows of all sessions."""
+        self._cache.clear()
+
+    def _get_cached_infos(self, browser, handles):
+        handles = tuple(handles)
+        session = browser.session_id
+        cached_handles, infos = self._cache.get(session, (None, None))
+        if cached_handles != handles:
+            infos = {}
+            self._cache[session] = (handles, infos)
         return infos
 
     def select(self, locator):
@@ -90,20 +131,14 @@ class WindowManager(ContextAware):
             handles = browser.window_handles
             browser.switch_to.window(handles[0])
             return
-        try:
-            starting_handle = browser.current_window_handle
-        except NoSuchWindowException:
-            starting_handle = None
-        for handle in browser.window_handles:
-            browser.switch_to.window(handle)
-            if criteria == handle:
-                return
-            for item in self._get_current_window_info(browser)[2:4]:
-                if item.strip().lower() == criteria.lower():
-                    return
-        if starting_handle:
-            browser.switch_to.window(starting_handle)
-        raise ValueError("Unable to locate window with handle or name or title or URL '" + criteria + "'")
+        if criteria in browser.window_handles:
+            browser.switch_to.window(criteria)
+            return
+        self._select_matching(
+            browser,
+            lambda window_info: criteria.lower() in
+            (item.strip().lower() for item in window_info[2:4]),
+            "Unable to locate window with handle or name or title or URL '" + criteria + "'")
 
     def _select_by_last_index(self, browser):
         handles = browser.window_handles
@@ -137,18 +172,31 @@ class WindowManager(ContextAware):
         return (prefix, criteria)
 
     def _select_matching(self, browser, matcher, error):
-        try:
-            starting_handle = browser.current_window_handle
-        except NoSuchWindowException:
-            starting_handle = None
-        for handle in browser.window_handles:
-            browser.switch_to.window(handle)
-            if matcher(self._get_current_window_info(browser)):
+        starting_handle, infos = self._get_window_infos(browser)
+        for info in infos:
+            if matcher(info):
+                browser.switch_to.window(info.handle)
+                # Information about other than the current window is
+                # cached and must be checked after switching to it.
+                if info.handle == starting_handle or \
+                        matcher(self._refresh_window_info(browser, info)):
+                    return
+                if starting_handle:
+                    browser.switch_to.window(starting_handle)
+                break
+        for info in self.get_window_infos():
+            if matcher(info):
+                browser.switch_to.window(info.handle)
                 return
-        if starting_handle:
-            browser.switch_to.window(starting_handle)
         raise ValueError(error)
 
+    def _refresh_window_info(self, browser, info):
+        # Updates cached information of the current window.
+        fresh = self._get_current_window_info(browser)
+        handles, infos = self._cache.get(browser.session_id, (None, {}))
+        infos[info.handle] = fresh
+        return fresh
+
     def _get_current_window_info(self, browser):
         try:
             id, name = browser.execute_script("return [ window.id, window.name ];")
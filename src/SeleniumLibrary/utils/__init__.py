@@ -19,6 +19,8 @@ from robot.utils import plural_or_not, secs_to_timestr, timestr_to_secs
 from .browsercache import BrowserCache
 from .deprecated import Deprecated
 from .librarylistener import LibraryListener
+from .lrucache import LRUCache
+from .pollstrategy import PollStrategy
 from .seleniumversion import SELENIUM_VERSION
 from .types import is_falsy, is_noney, is_string, is_truthy
 
@@ -30,3 +32,8 @@ def escape_xpath_value(value):
     if '\'' in value:
         return "\"%s\"" % value
     return "'%s'" % value
+
+
+def escape_css_value(value):
+    value = value.replace('\\', '\\\\').replace('"', '\\"')
+    return '"%s"' % value.replace('\n', '\\a ')
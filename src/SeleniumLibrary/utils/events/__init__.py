@@ -15,6 +15,7 @@
 # limitations under the License.
 
 from .scope_event import ScopeStart, ScopeEnd
+from .suite_event import SuiteEnd
 
 
 __all__ = [
@@ -23,7 +24,7 @@ __all__ = [
     "register_event"
 ]
 
-_registered_events = [ScopeStart, ScopeEnd]
+_registered_events = [ScopeStart, ScopeEnd, SuiteEnd]
 _events = []
 
 
@@ -25,6 +25,7 @@ class LibraryListener(object):
 
     def end_suite(self, name, attrs):
         dispatch('scope_end', attrs['longname'])
+        dispatch('suite_end', attrs['longname'])
 
     def start_test(self, name, attrs):
         dispatch('scope_start', attrs['longname'])
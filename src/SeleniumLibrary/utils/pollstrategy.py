@@ -0,0 +1,100 @@
+# Copyright 2008-2011 Nokia Networks
+# Copyright 2011-2016 Ryan Tomac, Ed Manlove and contributors
+# Copyright 2016-     Robot Framework Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+from robot.utils import timestr_to_secs
+
+from .types import is_noney
+
+
+class PollStrategy(object):
+    _names = ('initial', 'backoff', 'max_interval', 'jitter')
+
+    def __init__(self, initial=0.2, backoff=1.0, max_interval=None,
+                 jitter=0.0):
+        """Intervals between checks done by ``Wait ...`` keywords.
+
+        The first interval is `initial` seconds and each following interval
+        is `backoff` times the previous one, but at most `max_interval`
+        seconds. If `jitter` is given, each interval is randomly changed by
+        at most that fraction of it. The defaults poll every 0.2 seconds.
+        """
+        self.initial = timestr_to_secs(initial)
+        self.backoff = float(backoff)
+        self.max_interval = (None if is_noney(max_interval)
+                             else timestr_to_secs(max_interval))
+        self.jitter = float(jitter)
+        if self.initial <= 0:
+            raise ValueError('Initial poll interval must be positive, got %s.'
+                             % initial)
+        if self.backoff < 1:
+            raise ValueError('Poll backoff must be at least 1, got %s.'
+                             % backoff)
+        if self.max_interval is not None and \
+                self.max_interval < self.initial:
+            raise ValueError('Maximum poll interval must not be smaller '
+                             'than the initial interval, got %s.'
+                             % max_interval)
+        if not 0 <= self.jitter < 1:
+            raise ValueError('Poll jitter must be at least 0 and less than '
+                             '1, got %s.' % jitter)
+
+    @classmethod
+    def parse(cls, value):
+        """Creates a strategy from a string like ``initial=0.1, backoff=2``.
+
+        Items are separated with commas and they can be given in any
+        order. Omitted items get their default values.
+        """
+        if isinstance(value, PollStrategy):
+            return value
+        options = {}
+        for item in value.split(','):
+            if not item.strip():
+                continue
+            name, separator, option = item.partition('=')
+            name = name.strip().lower().replace(' ', '_')
+            if not separator or name not in cls._names:
+                raise ValueError("Invalid poll strategy item '%s'. Valid "
+                                 "items are %s." % (item.strip(),
+                                                    ', '.join(cls._names)))
+            options[name] = option.strip()
+        return cls(**options)
+
+    def intervals(self):
+        """Generates intervals to sleep between checks, in seconds."""
+        interval = self.initial
+        while True:
+            if self.jitter:
+                yield interval * random.uniform(1 - self.jitter,
+                                                1 + self.jitter)
+            else:
+                yield interval
+            interval *= self.backoff
+            if self.max_interval is not None:
+                interval = min(interval, self.max_interval)
+
+    def __str__(self):
+        return ('initial=%s, backoff=%s, max_interval=%s, jitter=%s'
+                % (self.initial, self.backoff, self.max_interval,
+                   self.jitter))
+
+    def __eq__(self, other):
+        return isinstance(other, PollStrategy) and str(self) == str(other)
+
+    def __ne__(self, other):
+        return not self == other
@@ -3,6 +3,7 @@ import unittest
 from mockito import mock, unstub, when
 
 from SeleniumLibrary.keywords import ElementKeywords
+from SeleniumLibrary.locators import ElementFinder
 
 
 class KeywordArgumentsElementTest(unittest.TestCase):
@@ -17,13 +18,24 @@ class KeywordArgumentsElementTest(unittest.TestCase):
 
     def test_locator_should_match_x_times(self):
         locator = '//div'
-        when(self.element).find_elements(locator).thenReturn([])
+        when(self.element).count_elements(locator).thenReturn(0)
         with self.assertRaisesRegexp(AssertionError, 'should have matched'):
             self.element.locator_should_match_x_times(locator, 1)
 
         with self.assertRaisesRegexp(AssertionError, 'foobar'):
             self.element.locator_should_match_x_times(locator, 1, 'foobar')
 
+    def test_get_webelements(self):
+        locator = '//div'
+        when(self.element).find_elements(locator, limit=None, offset=0) \
+            .thenReturn([])
+        when(self.element).find_elements(locator, limit=5, offset=10) \
+            .thenReturn([])
+        self.assertEqual(self.element.get_webelements(locator), [])
+        self.assertEqual(self.element.get_webelements(locator, '5', '10'), [])
+        self.assertEqual(
+            self.element.get_webelements(locator, 'None', '0'), [])
+
     def test_element_text_should_be(self):
         locator = '//div'
         element = mock()
@@ -50,7 +62,7 @@ class KeywordArgumentsElementTest(unittest.TestCase):
 
     def test_get_matching_xpath_count(self):
         locator = '//div'
-        when(self.element).find_elements('xpath:' + locator).thenReturn([])
+        when(self.element).count_elements('xpath:' + locator).thenReturn(0)
         count = self.element.get_matching_xpath_count(locator)
         self.assertEqual(count, '0')
         count = self.element.get_matching_xpath_count(locator, 'True')
@@ -61,9 +73,17 @@ class KeywordArgumentsElementTest(unittest.TestCase):
 
     def test_xpath_should_match_x_times(self):
         locator = '//div'
-        when(self.element).find_elements('xpath:{}'.format(locator)).thenReturn([])
+        when(self.element).count_elements('xpath:{}'.format(locator)).thenReturn(0)
         with self.assertRaisesRegexp(AssertionError, 'should have matched'):
             self.element.xpath_should_match_x_times(locator, 1)
 
         with self.assertRaisesRegexp(AssertionError, 'foobar'):
             self.element.xpath_should_match_x_times(locator, 1, 'foobar')
+
+    def test_set_element_cache(self):
+        finder = ElementFinder(self.element.ctx)
+        self.element.ctx.element_finder = finder
+        self.assertEqual(self.element.set_element_cache(), False)
+        self.assertEqual(finder.element_cache.enabled, True)
+        self.assertEqual(self.element.set_element_cache('False'), True)
+        self.assertEqual(finder.element_cache.enabled, False)
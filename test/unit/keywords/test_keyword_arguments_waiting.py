@@ -1,8 +1,25 @@
+import json
+import subprocess
+import time
 import unittest
 
-from mockito import mock, unstub, when
+try:
+    from shutil import which
+except ImportError:    # Python 2
+    from distutils.spawn import find_executable as which
+
+from mockito import any, mock, unstub, verify, when
+from robot.running.arguments import PythonArgumentParser
+from selenium.common.exceptions import (JavascriptException,
+                                        TimeoutException,
+                                        UnexpectedAlertPresentException,
+                                        WebDriverException)
 
 from SeleniumLibrary.keywords import WaitingKeywords
+from SeleniumLibrary.keywords.waiting import (CONDITIONS_SCRIPT,
+                                            NETWORK_IDLE_SCRIPT,
+                                            STABILITY_SCRIPT, WAIT_SCRIPT)
+from SeleniumLibrary.utils import PollStrategy
 
 
 class KeywordArgumentsWaitingKeywordsTest(unittest.TestCase):
@@ -11,6 +28,7 @@ class KeywordArgumentsWaitingKeywordsTest(unittest.TestCase):
         self.ctx = mock()
         self.ctx.browser = mock()
         self.ctx.timeout = 0.01
+        self.ctx.poll_strategy = PollStrategy()
         self.waiting = WaitingKeywords(self.ctx)
 
     def tearDown(self):
@@ -31,3 +49,460 @@ class KeywordArgumentsWaitingKeywordsTest(unittest.TestCase):
             self.waiting.wait_until_page_contains(text)
         with self.assertRaisesRegexp(AssertionError, "error"):
             self.waiting.wait_until_page_contains(text, 'None', 'error')
+
+
+class PollingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.poll_strategy = PollStrategy()
+        self.waiting = WaitingKeywords(self.ctx)
+        self.messages = []
+        self.waiting.debug = self.messages.append
+
+    def tearDown(self):
+        unstub()
+
+    def test_set_wait_poll_strategy(self):
+        previous = self.waiting.set_wait_poll_strategy('10ms', '2', '1s')
+        self.assertEqual(previous, str(PollStrategy()))
+        self.assertEqual(self.ctx.poll_strategy, PollStrategy(0.01, 2, 1))
+        self.waiting.set_wait_poll_strategy(previous)
+        self.assertEqual(self.ctx.poll_strategy, PollStrategy())
+
+    def test_polls_are_counted(self):
+        results = iter([False, False, True])
+        self.waiting._wait_until(lambda: next(results), 'error', 1,
+                                 poll='initial=1ms')
+        self.assertEqual(len(self.messages), 1)
+        self.assertIn('using 3 polls', self.messages[0])
+
+    def test_condition_is_checked_when_timeout_expires(self):
+        calls = []
+        start = time.time()
+        with self.assertRaisesRegexp(AssertionError, 'error'):
+            self.waiting._wait_until(lambda: calls.append(time.time()),
+                                     'error', 0.1, poll='initial=10s')
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - start, 0.1)
+        self.assertLess(time.time() - start, 1)
+
+    def test_per_call_poll_strategy_does_not_change_default(self):
+        self.waiting._wait_until(lambda: True, 'error', 1,
+                                 poll='initial=1ms')
+        self.assertEqual(self.ctx.poll_strategy, PollStrategy())
+
+
+class BrowserWaitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.element_finder = self.finder = mock()
+        self.ctx.timeout = 5.0
+        self.ctx.poll_strategy = PollStrategy()
+        self.waiting = WaitingKeywords(self.ctx)
+        self.messages = []
+        self.waiting.debug = self.messages.append
+        self.query = {'queries': [['css', '#x']], 'tag': None,
+                      'constraints': {}}
+        when(self.finder).get_browser_query('css:#x').thenReturn(self.query)
+        self.finder.page_runtime = self.runtime = mock()
+        self.runtime.displayed_atom = True
+
+    def tearDown(self):
+        unstub()
+
+    def test_element_appears(self):
+        when(self.runtime).run_async(WAIT_SCRIPT, Ellipsis) \
+            .thenReturn(True)
+        self.waiting.wait_until_page_contains_element('css:#x', 1)
+        verify(self.runtime, times=1).run_async(WAIT_SCRIPT, Ellipsis)
+        self.assertEqual(self.query['state'], 'present')
+        self.assertEqual(self.query['interval'], 200)
+
+    def test_visibility_is_confirmed(self):
+        when(self.waiting).get_element_state('css:#x') \
+            .thenReturn({'displayed': True})
+        when(self.runtime).run_async(WAIT_SCRIPT, Ellipsis) \
+            .thenReturn(True)
+        self.waiting.wait_until_element_is_visible('css:#x', 1)
+        verify(self.waiting, times=1).get_element_state('css:#x')
+
+    def test_polling_continues_when_confirmation_fails(self):
+        when(self.waiting).get_element_state('css:#x') \
+            .thenReturn({'text': 'old'})
+        when(self.runtime).run_async(WAIT_SCRIPT, Ellipsis) \
+            .thenReturn(True)
+        with self.assertRaisesRegexp(AssertionError, "did not get text"):
+            self.waiting.wait_until_element_contains('css:#x', 'new', 0.05,
+                                                     poll='initial=10ms')
+        verify(self.runtime, times=1).run_async(WAIT_SCRIPT, Ellipsis)
+
+    def test_falls_back_to_polling_on_navigation(self):
+        results = iter([None, None, mock()])
+        when(self.runtime).run_async(WAIT_SCRIPT, Ellipsis) \
+            .thenRaise(WebDriverException('document unloaded'))
+        when(self.waiting).find_element('css:#x', required=False) \
+            .thenAnswer(lambda *args, **kwargs: next(results))
+        self.waiting.wait_until_page_contains_element('css:#x', 1,
+                                                      poll='initial=1ms')
+        self.assertIn('document unloaded', self.messages[0])
+        self.assertIn('using 3 polls', self.messages[-1])
+
+    def test_script_calls_are_shorter_than_script_timeout(self):
+        self.ctx.timeout = 0.02
+        timeouts = []
+        when(self.runtime).run_async(WAIT_SCRIPT, Ellipsis) \
+            .thenAnswer(lambda script, query, timeout:
+                        timeouts.append(timeout) or time.sleep(0.015) or False)
+        when(self.waiting)._page_does_not_contain_element('css:#x') \
+            .thenReturn(False)
+        with self.assertRaisesRegexp(AssertionError, 'did not disappear'):
+            self.waiting.wait_until_page_does_not_contain_element('css:#x',
+                                                                  0.05)
+        self.assertGreater(len(timeouts), 1)
+        self.assertTrue(all(0 < timeout <= 18 for timeout in timeouts))
+
+    def test_polling_when_locator_not_supported(self):
+        when(self.finder).get_browser_query('foo').thenReturn(None)
+        when(self.waiting)._page_does_not_contain_element('foo') \
+            .thenReturn(True)
+        self.waiting.wait_until_page_does_not_contain_element('foo', 1)
+        verify(self.runtime, times=0).run_async(Ellipsis)
+
+    def test_polling_without_displayed_atom(self):
+        self.runtime.displayed_atom = False
+        when(self.waiting).get_element_state('css:#x') \
+            .thenReturn({'displayed': True})
+        self.waiting.wait_until_element_is_visible('css:#x', 1)
+        verify(self.runtime, times=0).run_async(Ellipsis)
+
+
+class MultiConditionWaitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.element_finder = self.finder = mock()
+        self.ctx.timeout = 5.0
+        self.ctx.poll_strategy = PollStrategy(0.001)
+        self.waiting = WaitingKeywords(self.ctx)
+        self.query = {'queries': [['css', '#x']], 'tag': None,
+                      'constraints': {}}
+        when(self.finder).get_browser_query('css:#x').thenReturn(self.query)
+        self.finder.page_runtime = self.runtime = mock()
+        self.state = {'displayed': True, 'enabled': True, 'readonly': False,
+                      'text': 'Done'}
+        when(self.waiting).get_element_state('css:#x', required=False) \
+            .thenReturn(self.state)
+
+    def tearDown(self):
+        unstub()
+
+    def test_conditions_are_checked_in_one_script(self):
+        results = iter([[False, True, True], [True, True, True]])
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenAnswer(lambda script, items: next(results))
+        self.waiting.wait_until_all('visible:css:#x', 'js:window.ready',
+                                    'text:css:#x=Done', 'timeout=1s')
+        verify(self.runtime, times=2).run(CONDITIONS_SCRIPT, Ellipsis)
+        verify(self.waiting, times=0).get_element_state('css:#x',
+                                                        required=False)
+        verify(self.browser, times=0).execute_script('return (window.ready);')
+
+    def test_items(self):
+        items = []
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenAnswer(lambda script, conditions:
+                        items.extend(conditions) or [True, True])
+        self.waiting.wait_until_all('enabled:css:#x', 'js:return 1 === 1')
+        self.assertEqual(items, [
+            {'kind': 'enabled', 'value': None, 'query': self.query},
+            {'kind': 'js', 'value': 'return 1 === 1'}])
+
+    def test_all_fails_with_false_conditions(self):
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenReturn([True, False])
+        with self.assertRaisesRegexp(
+                AssertionError, "All conditions did not become true in 10 "
+                                "milliseconds. False condition: 'js:b'."):
+            self.waiting.wait_until_all('js:a', 'js:b', 'timeout=10ms')
+        with self.assertRaisesRegexp(AssertionError, '^my error$'):
+            self.waiting.wait_until_all('js:a', 'js:b', 'timeout=10ms',
+                                        'error=my error')
+
+    def test_any(self):
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenReturn([False, True])
+        self.waiting.wait_until_any('js:a', 'js:b')
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenReturn([False, False])
+        with self.assertRaisesRegexp(AssertionError, "Any of the conditions"):
+            self.waiting.wait_until_any('js:a', 'js:b', 'timeout=10ms')
+
+    def test_unsupported_locators_are_checked_separately(self):
+        when(self.finder).get_browser_query('foo').thenReturn(None)
+        when(self.waiting).get_element_state('foo', required=False) \
+            .thenReturn(None).thenReturn(dict(self.state, readonly=True)) \
+            .thenReturn(self.state)
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenReturn([True])
+        self.waiting.wait_until_all('js:a', 'enabled:foo')
+        verify(self.waiting, times=3).get_element_state('foo',
+                                                        required=False)
+
+    def test_falls_back_to_separate_checks_when_script_fails(self):
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenRaise(WebDriverException('navigated'))
+        when(self.browser).execute_script('return (a);').thenReturn(True)
+        self.state['text'] = 'x = y'
+        self.waiting.wait_until_all('js:a', 'text:css:#x= y')
+
+    def test_unknown_results_are_checked_separately(self):
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenReturn([None, False])
+        self.waiting.wait_until_any('visible:css:#x', 'enabled:css:#x',
+                                    'timeout=10ms')
+        verify(self.waiting, times=1).get_element_state('css:#x',
+                                                        required=False)
+
+    def test_equal_signs_in_conditions_are_not_named_arguments(self):
+        spec = PythonArgumentParser().parse(WaitingKeywords.wait_until_all)
+        arguments = ['text:css:#x=Done', 'text:css:#x=Done', 'js:a',
+                     'timeout=10ms']
+        positional, named = spec.resolve(arguments)
+        self.assertEqual((positional, named), (arguments, []))
+        items = []
+        when(self.runtime).run(CONDITIONS_SCRIPT, Ellipsis) \
+            .thenAnswer(lambda script, conditions:
+                        items.append(conditions) or [True, True, False])
+        with self.assertRaisesRegexp(AssertionError, "condition: 'js:a'"):
+            self.waiting.wait_until_all(*positional)
+        self.assertEqual([(item['kind'], item['value'])
+                          for item in items[0]],
+                         [('text', 'Done'), ('text', 'Done'),
+                          ('js', 'return (a);')])
+
+    def test_invalid_conditions(self):
+        for spec in ('foo', 'invalid:x', 'text:css:#x'):
+            self.assertRaises(ValueError, self.waiting.wait_until_all, spec)
+        self.assertRaises(ValueError, self.waiting.wait_until_any)
+
+
+class NetworkIdleTest(unittest.TestCase):
+    idle = {'requests': 0, 'timers': 0, 'idle': 600, 'loaded': True}
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.timeout = 5.0
+        self.ctx.poll_strategy = PollStrategy(0.001)
+        self.ctx.network_idle_wait = None
+        self.waiting = WaitingKeywords(self.ctx)
+        self.warnings = []
+        self.waiting.warn = self.warnings.append
+
+    def tearDown(self):
+        unstub()
+
+    def test_wait_until_network_is_idle(self):
+        when(self.browser).execute_script(NETWORK_IDLE_SCRIPT, 1000) \
+            .thenReturn(dict(self.idle, requests=2)) \
+            .thenReturn(dict(self.idle, timers=1)) \
+            .thenRaise(WebDriverException('unloaded')) \
+            .thenReturn(dict(self.idle, idle=100)) \
+            .thenReturn(dict(self.idle, loaded=False)) \
+            .thenReturn(self.idle)
+        self.waiting.wait_until_network_is_idle('0.5s')
+        verify(self.browser, times=6).execute_script(NETWORK_IDLE_SCRIPT,
+                                                     1000)
+
+    def test_wait_until_network_is_idle_fails(self):
+        when(self.browser).execute_script(NETWORK_IDLE_SCRIPT, 1000) \
+            .thenReturn(dict(self.idle, requests=1))
+        with self.assertRaisesRegexp(AssertionError,
+                                     'Network did not become idle in 10 '
+                                     'milliseconds.'):
+            self.waiting.wait_until_network_is_idle(timeout='10ms')
+
+    def test_set_auto_wait_for_network_idle(self):
+        self.assertIs(self.waiting.set_auto_wait_for_network_idle(
+            idle_time='200ms', timeout='2s'), False)
+        self.assertEqual(self.ctx.network_idle_wait, (0.2, '2s'))
+        self.assertIs(self.waiting.set_auto_wait_for_network_idle('False'),
+                      True)
+        self.assertIsNone(self.ctx.network_idle_wait)
+
+    def test_wait_after_keyword(self):
+        when(self.browser).execute_script(NETWORK_IDLE_SCRIPT, 1000) \
+            .thenReturn(self.idle)
+        self.waiting.wait_after_keyword('click_element')
+        verify(self.browser, times=0).execute_script(Ellipsis)
+        self.waiting.set_auto_wait_for_network_idle()
+        self.waiting.wait_after_keyword('get_title')
+        verify(self.browser, times=0).execute_script(Ellipsis)
+        self.waiting.wait_after_keyword('click_element')
+        verify(self.browser, times=1).execute_script(NETWORK_IDLE_SCRIPT,
+                                                     1000)
+
+    def test_wait_after_keyword_warns_on_timeout(self):
+        when(self.browser).execute_script(NETWORK_IDLE_SCRIPT, 1000) \
+            .thenReturn(dict(self.idle, requests=1))
+        self.waiting.set_auto_wait_for_network_idle(timeout='10ms')
+        self.waiting.wait_after_keyword('go_to')
+        self.assertEqual(self.warnings, [
+            'Network did not become idle in 10 milliseconds after keyword '
+            'Go To.'])
+
+    @unittest.skipUnless(which('node'), 'Requires Node.js.')
+    def test_library_timers_are_not_counted(self):
+        # Runs the scripts with Node.js using the global object as the
+        # window. The framework wait polls jQuery with a short timer while
+        # the network state is checked.
+        script = """
+var window = globalThis, active = 1;
+window.document = {readyState: 'complete',
+                   querySelector: function () { return null; }};
+window.XMLHttpRequest = function () {};
+window.jQuery = {};
+Object.defineProperty(window.jQuery, 'active', {
+    get: function () { return active; }
+});
+function network() {
+    return (function () { %s }).call(null, 1000);
+}
+network();
+(function () { %s }).call(null, ['jquery'], 2000, function (result) {
+    console.log(JSON.stringify({timers: timers, result: result}));
+});
+var timers = network().timers;
+active = 0;
+""" % (NETWORK_IDLE_SCRIPT, STABILITY_SCRIPT)
+        output = subprocess.check_output(['node', '-e', script])
+        output = json.loads(output.decode('UTF-8'))
+        self.assertEqual(output['timers'], 0)
+        self.assertEqual(output['result'], {'checked': ['jquery'],
+                                            'pending': []})
+
+
+class FrameworkStabilityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.timeout = 5.0
+        self.ctx.poll_strategy = PollStrategy(0.001)
+        self.ctx.framework_sync = None
+        self.waiting = WaitingKeywords(self.ctx)
+        self.warnings = []
+        self.waiting.warn = self.warnings.append
+
+    def tearDown(self):
+        unstub()
+
+    def test_frameworks_are_waited_in_one_script(self):
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, Ellipsis) \
+            .thenReturn({'checked': ['angular', 'jquery'], 'pending': []})
+        self.waiting.wait_until_frameworks_are_stable('Angular, jQuery', '2s')
+        verify(self.browser, times=1).execute_async_script(
+            STABILITY_SCRIPT, ['angular', 'jquery'], any(int))
+
+    def test_auto(self):
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, [], any(int)) \
+            .thenReturn({'checked': [], 'pending': []})
+        self.waiting.wait_until_frameworks_are_stable(timeout='2s')
+
+    def test_script_call_is_shorter_than_script_timeout(self):
+        self.ctx.timeout = 1.0
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, [], 900) \
+            .thenReturn({'checked': [], 'pending': []})
+        self.waiting.wait_until_frameworks_are_stable(timeout='10s')
+
+    def test_retried_after_navigation_and_errors(self):
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, Ellipsis) \
+            .thenRaise(JavascriptException('document unloaded')) \
+            .thenRaise(TimeoutException('script timeout')) \
+            .thenReturn(None) \
+            .thenReturn({'error': 'ReferenceError'}) \
+            .thenReturn({'checked': ['jquery'], 'pending': []})
+        self.waiting.wait_until_frameworks_are_stable('jquery')
+        verify(self.browser, times=5).execute_async_script(STABILITY_SCRIPT,
+                                                           Ellipsis)
+
+    def test_fails_immediately_when_frameworks_cannot_be_checked(self):
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, Ellipsis) \
+            .thenRaise(UnexpectedAlertPresentException('alert open'))
+        with self.assertRaisesRegexp(AssertionError,
+                                     '^Checking frameworks failed: '
+                                     'alert open.$'):
+            self.waiting.wait_until_frameworks_are_stable(timeout='10s')
+        self.waiting.set_auto_sync_with_frameworks('auto', '10s')
+        self.waiting.wait_before_keyword('click_element')
+        self.assertEqual(self.warnings, [
+            'Checking frameworks failed: alert open. Running keyword '
+            'Click Element anyway.'])
+        verify(self.browser, times=2).execute_async_script(STABILITY_SCRIPT,
+                                                           Ellipsis)
+
+    def test_failure_lists_pending_frameworks(self):
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, Ellipsis) \
+            .thenReturn({'checked': ['angular', 'jquery'],
+                         'pending': ['jquery']})
+        with self.assertRaisesRegexp(AssertionError,
+                                     '^Frameworks did not become stable in '
+                                     '10 milliseconds. Pending: jquery.$'):
+            self.waiting.wait_until_frameworks_are_stable(timeout='10ms')
+        with self.assertRaisesRegexp(AssertionError, '^my error$'):
+            self.waiting.wait_until_frameworks_are_stable('auto', '10ms',
+                                                          'my error')
+
+    def test_invalid_framework(self):
+        with self.assertRaisesRegexp(ValueError, "Unsupported framework 'vue'"):
+            self.waiting.wait_until_frameworks_are_stable('jquery, vue')
+
+    def test_set_auto_sync_with_frameworks(self):
+        self.assertIs(self.waiting.set_auto_sync_with_frameworks(), False)
+        self.assertEqual(self.ctx.framework_sync, ([], None))
+        self.assertIs(self.waiting.set_auto_sync_with_frameworks(
+            'angular', '3s'), True)
+        self.assertEqual(self.ctx.framework_sync, (['angular'], '3s'))
+        self.waiting.set_auto_sync_with_frameworks('None')
+        self.assertIsNone(self.ctx.framework_sync)
+
+    def test_wait_before_keyword(self):
+        when(self.browser).execute_async_script(STABILITY_SCRIPT, Ellipsis) \
+            .thenReturn({'checked': ['jquery'], 'pending': ['jquery']})
+        self.waiting.wait_before_keyword('input_text')
+        self.waiting.set_auto_sync_with_frameworks('jquery', '10ms')
+        self.waiting.wait_before_keyword('get_title')
+        verify(self.browser, times=0).execute_async_script(Ellipsis)
+        self.waiting.wait_before_keyword('input_text')
+        self.assertEqual(self.warnings, [
+            'Frameworks did not become stable in 10 milliseconds. Pending: '
+            'jquery. Running keyword Input Text anyway.'])
+
+    @unittest.skipUnless(which('node'), 'Requires Node.js.')
+    def test_polling_stops_after_timeout(self):
+        # Runs the script with Node.js against a page where jQuery never
+        # becomes idle and counts checks done after the wait finished.
+        script = """
+var checks = 0,
+    window = {jQuery: {}, setTimeout: setTimeout, clearTimeout: clearTimeout},
+    document = {querySelector: function () { return null; }};
+Object.defineProperty(window.jQuery, 'active', {
+    get: function () { checks++; return 1; }
+});
+(function () { %s }).call(null, ['jquery'], 30, function (result) {
+    var after = checks;
+    setTimeout(function () {
+        console.log(JSON.stringify({result: result, extra: checks - after}));
+        process.exit(0);
+    }, 100);
+});
+""" % STABILITY_SCRIPT
+        output = subprocess.check_output(['node', '-e', script])
+        output = json.loads(output.decode('UTF-8'))
+        self.assertEqual(output['result'],
+                         {'checked': ['jquery'], 'pending': ['jquery']})
+        self.assertEqual(output['extra'], 0)
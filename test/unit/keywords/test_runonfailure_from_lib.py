@@ -1,9 +1,10 @@
 import unittest
 
-from mockito import when, unstub, verify
+from mockito import mock, when, unstub, verify
 
 from SeleniumLibrary import SeleniumLibrary
 from SeleniumLibrary.keywords import RunOnFailureKeywords
+from SeleniumLibrary.locators.elementfinder import FRAME_PATH_SCRIPT
 
 
 class SeleniumLibraryRunOnFailureTest(unittest.TestCase):
@@ -22,3 +23,49 @@ class SeleniumLibraryRunOnFailureTest(unittest.TestCase):
         sl = SeleniumLibrary()
         sl._run_on_failure()
         verify(SeleniumLibrary, times=1).failure_occurred()
+
+    def test_automatic_waits_around_keywords(self):
+        sl = SeleniumLibrary()
+        when(sl._waiting).wait_before_keyword('click_element') \
+            .thenReturn(None)
+        when(sl._waiting).wait_after_keyword('click_element').thenReturn(None)
+        sl.keywords['click_element'] = lambda locator: None
+        sl.run_keyword('click_element', ['id:x'], {})
+        verify(sl._waiting).wait_before_keyword('click_element')
+        verify(sl._waiting).wait_after_keyword('click_element')
+
+    def test_frames_selected_by_keyword_are_restored(self):
+        sl = SeleniumLibrary()
+        browser = mock()
+        browser.switch_to = switch_to = mock()
+        sl.register_browser(browser, None)
+        when(browser).execute_script(FRAME_PATH_SCRIPT, ['#f']) \
+            .thenReturn({'indices': [0], 'missing': None})
+        when(browser).find_element_by_css_selector('button') \
+            .thenReturn(mock())
+        sl.keywords['click_element'] = sl.element_finder.find
+        sl.keywords['execute_javascript'] = lambda code: \
+            verify(switch_to, times=2).default_content()
+        sl.run_keyword('click_element', ['frame:#f >> css:button'], {})
+        verify(switch_to).frame(0)
+        sl.run_keyword('execute_javascript', ['return 1;'], {})
+
+    def test_nested_keyword_does_not_restore_frames(self):
+        sl = SeleniumLibrary()
+        browser = mock()
+        browser.switch_to = switch_to = mock()
+        sl.register_browser(browser, None)
+        when(browser).execute_script(FRAME_PATH_SCRIPT, ['#f']) \
+            .thenReturn({'indices': [0], 'missing': None})
+        when(browser).find_element_by_css_selector('button') \
+            .thenReturn(mock())
+        sl.keywords['execute_javascript'] = lambda code: None
+
+        def click_element(locator):
+            sl.element_finder.find(locator)
+            sl.run_keyword('execute_javascript', ['return 1;'], {})
+            verify(switch_to, times=1).default_content()
+
+        sl.keywords['click_element'] = click_element
+        sl.run_keyword('click_element', ['frame:#f >> css:button'], {})
+        verify(switch_to, times=2).default_content()
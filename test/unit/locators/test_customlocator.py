@@ -0,0 +1,120 @@
+import unittest
+
+from mockito import mock, unstub, verify, when
+from robot.libraries.BuiltIn import BuiltIn
+
+from SeleniumLibrary.locators.elementfinder import (
+    ElementFinder, FILTER_ELEMENTS_SCRIPT, FIND_MANY_SCRIPT)
+
+
+class CustomLocatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_template_is_compiled_as_expanded_locator(self):
+        self.finder.register('data', 'css:[data-test="{criteria}"]',
+                             persist=True)
+        compiled = self.finder.compile('data:submit')
+        self.assertEqual(compiled.prefix, 'css')
+        self.assertEqual(compiled.criteria, '[data-test="submit"]')
+        self.assertEqual(compiled.strategy, self.finder._find_by_css_selector)
+
+    def test_template_uses_native_find(self):
+        element = mock()
+        self.finder.register('data', 'css:[data-test="{criteria}"]',
+                             persist=True)
+        when(self.browser).find_element_by_css_selector(
+            '[data-test="submit"]').thenReturn(element)
+        self.assertEqual(self.finder.find('data:submit'), element)
+        verify(self.browser, times=0).execute_script(Ellipsis)
+
+    def test_templates_are_batched(self):
+        self.finder.register('data', 'xpath://*[@data-test="{criteria}"]',
+                             persist=True)
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[], []])
+        self.finder.find_many(['data:a', 'data:b'], required=False)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['xpath', "//*[@data-test='a']"]], 'tag': None,
+             'constraints': {}, 'limit': 1},
+            {'queries': [['xpath', "//*[@data-test='b']"]], 'tag': None,
+             'constraints': {}, 'limit': 1}], None)
+
+    def test_quoted_criteria_is_escaped_for_template_strategy(self):
+        self.finder.register('data', 'css:[data-test="{criteria}"]',
+                             persist=True)
+        self.finder.register('label', "//label[text()='{criteria}']",
+                             persist=True)
+        self.finder.register('plain', 'id:{criteria}-button', persist=True)
+        self.assertEqual(self.finder.compile('data:say "hi"').criteria,
+                         '[data-test="say \\"hi\\""]')
+        self.assertEqual(self.finder.compile('label:it\'s').criteria,
+                         '//label[text()="it\'s"]')
+        self.assertEqual(self.finder.compile('plain:"x"').criteria,
+                         '"x"-button')
+
+    def test_template_referring_to_itself(self):
+        self.finder.register('loop', 'loop:{criteria}', persist=True)
+        with self.assertRaisesRegexp(ValueError, "'loop' refers to itself"):
+            self.finder.find('loop:x')
+
+    def test_unregister_template(self):
+        self.finder.register('data', 'css:[data-test="{criteria}"]',
+                             persist=True)
+        self.finder.unregister('data')
+        self.assertEqual(self.finder.compile('data:x').prefix, 'default')
+
+    def test_javascript_strategy(self):
+        elements = [mock(), mock()]
+        script = "return document.querySelectorAll(arguments[0]);"
+        self.finder.register('js', 'JavaScript: ' + script, persist=True)
+        when(self.browser).execute_script(script, 'p', None).thenReturn(
+            elements)
+        self.assertEqual(self.finder.find('js:p', first_only=False), elements)
+
+    def test_javascript_strategy_with_parent(self):
+        parent, element = mock(), mock()
+        when(self.finder)._is_webelement(parent).thenReturn(True)
+        when(self.finder)._is_webelement('js:p').thenReturn(False)
+        self.finder.register('js', 'js:return arguments[1].firstChild;',
+                             persist=True)
+        when(self.browser).execute_script(
+            'return arguments[1].firstChild;', 'p', parent).thenReturn(element)
+        self.assertEqual(self.finder.find('js:p', parent=parent), element)
+
+    def test_javascript_strategy_finding_nothing(self):
+        self.finder.register('js', 'js:return null;', persist=True)
+        when(self.browser).execute_script(
+            'return null;', 'p', None).thenReturn(None)
+        self.assertIsNone(self.finder.find('js:p', required=False))
+
+    def test_javascript_strategy_results_are_filtered(self):
+        button, div = mock(), mock()
+        self.finder.register('js', 'js:return arguments[0];', persist=True)
+        when(self.browser).execute_script(
+            'return arguments[0];', 'p', None).thenReturn([div, button])
+        when(self.browser).execute_script(
+            FILTER_ELEMENTS_SCRIPT, [div, button], 'button',
+            {}).thenReturn([button])
+        self.assertEqual(self.finder.find('js:p', tag='button'), button)
+
+    def test_keyword_strategy(self):
+        element = mock()
+        when(BuiltIn).run_keyword('My Strategy', self.browser, 'x', None,
+                                  {}).thenReturn(element)
+        self.finder.register('kw', 'My Strategy', persist=True)
+        self.assertEqual(self.finder.find('kw:x'), element)
+        self.assertEqual(self.finder.find('kw:x'), element)
+        verify(BuiltIn, times=2).run_keyword(Ellipsis)
+
+    def test_callable_strategy(self):
+        element = mock()
+        self.finder.register('callable', lambda *args: element, persist=True)
+        self.assertEqual(self.finder.find('callable:x'), element)
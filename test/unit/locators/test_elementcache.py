@@ -0,0 +1,131 @@
+import unittest
+
+from mockito import mock, unstub, verify, when
+from selenium.common.exceptions import (StaleElementReferenceException,
+                                        WebDriverException)
+
+from SeleniumLibrary.locators.elementcache import DOM_GENERATION_SCRIPT
+from SeleniumLibrary.locators.elementfinder import ElementFinder
+
+
+class ElementCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.browser.session_id = 'session'
+        self.browser.current_window_handle = 'window'
+        self.finder = ElementFinder(self.ctx)
+        self.cache = self.finder.element_cache
+        self.cache.enabled = True
+        self.element = mock()
+        when(self.browser).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]").thenReturn(self.element)
+
+    def tearDown(self):
+        unstub()
+
+    def test_disabled_by_default(self):
+        finder = ElementFinder(self.ctx)
+        finder.find('foo')
+        finder.find('foo')
+        verify(self.browser, times=0).execute_script(Ellipsis)
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+
+    def test_cached_element_is_used_when_generation_is_unchanged(self):
+        self._mock_generation('page:1')
+        self.assertEqual(self.finder.find('foo'), self.element)
+        self.assertEqual(self.finder.find('foo'), self.element)
+        verify(self.browser, times=1).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+        self.assertEqual(self.cache.statistics(),
+                         {'hits': 1, 'misses': 1, 'stale retries': 0,
+                          'hit rate': 0.5})
+
+    def test_changed_generation_causes_new_lookup(self):
+        self._mock_generation('page:1', 'page:2')
+        self.finder.find('foo')
+        self.finder.find('foo')
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_stale_element_causes_new_lookup(self):
+        self._mock_generation('page:1')
+        self.finder.find('foo')
+        when(self.browser).execute_script(
+            DOM_GENERATION_SCRIPT, [self.element]).thenRaise(
+            StaleElementReferenceException('stale'))
+        self.assertEqual(self.finder.find('foo'), self.element)
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+        self.assertEqual(self.cache.stale_retries, 1)
+
+    def test_detached_element_is_replaced(self):
+        new = mock()
+        when(self.browser).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]").thenReturn(self.element) \
+            .thenReturn(new)
+        when(self.browser).execute_script(
+            DOM_GENERATION_SCRIPT, []).thenReturn('page:1', 'page:2')
+        when(self.browser).execute_script(
+            DOM_GENERATION_SCRIPT, [self.element]).thenReturn(None)
+        when(self.browser).execute_script(
+            DOM_GENERATION_SCRIPT, [new]).thenReturn('page:2')
+        for _ in range(4):
+            self.finder.find('foo')
+        self.assertEqual(self.finder.find('foo'), new)
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+        self.assertEqual(self.cache.hits, 3)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_entry_is_removed_when_lookup_finds_nothing(self):
+        self._mock_generation('page:1', 'page:2')
+        self.finder.find('foo')
+        when(self.browser).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]").thenReturn(None)
+        self.finder.find('foo', required=False)
+        self.assertEqual(len(self.cache._entries), 0)
+
+    def test_page_changed_clears_cache(self):
+        self._mock_generation('page:1')
+        self.finder.find('foo')
+        self.finder.page_changed()
+        self.finder.find('foo')
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+
+    def test_frame_changes_frame_path_and_clears_cache(self):
+        self._mock_generation('page:1')
+        self.finder.find('foo')
+        self.finder.frame_changed('outer')
+        self.finder.frame_changed('inner')
+        self.assertEqual(self.cache.frame_path, ('outer', 'inner'))
+        self.finder.find('foo')
+        self.finder.frame_changed()
+        self.assertEqual(self.cache.frame_path, ())
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+
+    def test_elements_are_not_cached_without_javascript(self):
+        when(self.browser).execute_script(Ellipsis).thenRaise(
+            WebDriverException('no javascript'))
+        self.finder.find('foo')
+        self.finder.find('foo')
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]")
+
+    def test_lookups_with_parent_are_not_cached(self):
+        parent = mock()
+        when(self.finder)._is_webelement(parent).thenReturn(True)
+        when(self.finder)._is_webelement('foo').thenReturn(False)
+        when(parent).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]").thenReturn(self.element)
+        self.finder.find('foo', parent=parent)
+        verify(self.browser, times=0).execute_script(Ellipsis)
+
+    def _mock_generation(self, *generations):
+        when(self.browser).execute_script(
+            DOM_GENERATION_SCRIPT, Ellipsis).thenReturn(*generations)
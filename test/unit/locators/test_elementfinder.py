@@ -1,9 +1,43 @@
+import json
+import subprocess
 import unittest
 
+try:
+    from shutil import which
+except ImportError:    # Python 2
+    from distutils.spawn import find_executable as which
+
 from mockito import any, mock, verify, when, unstub
 
+from selenium.common.exceptions import (NoSuchElementException,
+                                        NoSuchFrameException,
+                                        WebDriverException)
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
 from SeleniumLibrary.errors import ElementNotFound
-from SeleniumLibrary.locators.elementfinder import ElementFinder
+from SeleniumLibrary.locators.elementfinder import (
+    COUNT_SCRIPT, ELEMENT_STATE_SCRIPT, ElementFinder, FILTER_ELEMENTS_SCRIPT,
+    FIND_MANY_SCRIPT, FRAME_PATH_SCRIPT, ORDER_BY_IDENTIFIER_SCRIPT,
+    PAGE_TEXT_SCRIPT, QUERY_JS, TEXT_PRESENT_SCRIPT)
+
+
+class CommandCountingDriver(WebDriver):
+    """WebDriver recording commands instead of sending them anywhere."""
+
+    def __init__(self, *results):
+        self.w3c = True
+        self.commands = []
+        self._results = list(results)
+
+    def execute(self, command, params=None):
+        self.commands.append((command, params))
+        return {'value': self._results.pop(0) if self._results else None}
+
+
+def xpath_with_tag(xpath, tag):
+    return ("(%s)[translate(local-name(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', "
+            "'abcdefghijklmnopqrstuvwxyz')='%s']" % (xpath, tag))
 
 
 class ParseLocatorTests(unittest.TestCase):
@@ -76,35 +110,35 @@ class ElementFinderParentTests(unittest.TestCase):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('//div').thenReturn(False)
-        when(webelement).find_elements_by_xpath('//div').thenReturn([mock()])
+        when(webelement).find_element_by_xpath('//div').thenReturn(mock())
         self.finder.find('//div', parent=webelement)
-        verify(webelement).find_elements_by_xpath('//div')
+        verify(webelement).find_element_by_xpath('//div')
 
     def test_find_by_identifier_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('identifier=value').thenReturn(False)
-        when(webelement).find_elements_by_id('value').thenReturn([mock()])
-        when(webelement).find_elements_by_name('value').thenReturn([mock()])
+        when(webelement).find_elements_by_xpath(
+            ".//*[@id='value' or @name='value']").thenReturn([mock()])
         self.finder.find('identifier=value', parent=webelement)
-        verify(webelement).find_elements_by_name('value')
-        verify(webelement).find_elements_by_id('value')
+        verify(webelement).find_elements_by_xpath(
+            ".//*[@id='value' or @name='value']")
 
     def test_find_by_id_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('id=value').thenReturn(False)
-        when(webelement).find_elements_by_id('value').thenReturn([mock()])
+        when(webelement).find_element_by_id('value').thenReturn(mock())
         self.finder.find('id=value', parent=webelement)
-        verify(webelement).find_elements_by_id("value")
+        verify(webelement).find_element_by_id("value")
 
     def test_find_by_name_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('name=value').thenReturn(False)
-        when(webelement).find_elements_by_name('value').thenReturn([mock()])
+        when(webelement).find_element_by_name('value').thenReturn(mock())
         self.finder.find('name=value', parent=webelement)
-        verify(webelement).find_elements_by_name("value")
+        verify(webelement).find_element_by_name("value")
 
     def test_find_by_dom__parent_is_webelement(self):
         webelement = mock()
@@ -128,46 +162,46 @@ class ElementFinderParentTests(unittest.TestCase):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('link=My Link').thenReturn(False)
-        when(webelement).find_elements_by_link_text(
-            'My Link').thenReturn([mock()])
+        when(webelement).find_element_by_link_text(
+            'My Link').thenReturn(mock())
         self.finder.find('link=My Link', parent=webelement)
-        verify(webelement).find_elements_by_link_text("My Link")
+        verify(webelement).find_element_by_link_text("My Link")
 
     def test_find_by_partial_link_text_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('partial link=My L').thenReturn(False)
-        when(webelement).find_elements_by_partial_link_text(
-            'My L').thenReturn([mock()])
+        when(webelement).find_element_by_partial_link_text(
+            'My L').thenReturn(mock())
         self.finder.find('partial link=My L', parent=webelement)
-        verify(webelement).find_elements_by_partial_link_text("My L")
+        verify(webelement).find_element_by_partial_link_text("My L")
 
     def test_find_by_css_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('css=div').thenReturn(False)
-        when(webelement).find_elements_by_css_selector(
-            'div').thenReturn([mock()])
+        when(webelement).find_element_by_css_selector(
+            'div').thenReturn(mock())
         self.finder.find('css=div', parent=webelement)
-        verify(webelement).find_elements_by_css_selector("div")
+        verify(webelement).find_element_by_css_selector("div")
 
     def test_find_by_class_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('class=name').thenReturn(False)
-        when(webelement).find_elements_by_class_name(
-            'name').thenReturn([mock()])
+        when(webelement).find_element_by_class_name(
+            'name').thenReturn(mock())
         self.finder.find('class=name', parent=webelement)
-        verify(webelement).find_elements_by_class_name("name")
+        verify(webelement).find_element_by_class_name("name")
 
     def test_find_by_tag_name_parent_is_webelement(self):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('tag=name').thenReturn(False)
-        when(webelement).find_elements_by_tag_name(
-            'name').thenReturn([mock()])
+        when(webelement).find_element_by_tag_name(
+            'name').thenReturn(mock())
         self.finder.find('tag=name', parent=webelement)
-        verify(webelement).find_elements_by_tag_name("name")
+        verify(webelement).find_element_by_tag_name("name")
 
     def test_find_sc_locator_parent_is_webelement(self):
         webelement = mock()
@@ -183,10 +217,10 @@ class ElementFinderParentTests(unittest.TestCase):
         webelement = mock()
         when(self.finder)._is_webelement(webelement).thenReturn(True)
         when(self.finder)._is_webelement('default=name').thenReturn(False)
-        when(webelement).find_elements_by_xpath(
-            xpath).thenReturn([mock()])
+        when(webelement).find_element_by_xpath(
+            xpath).thenReturn(mock())
         self.finder.find('default=name', parent=webelement)
-        verify(webelement).find_elements_by_xpath(xpath)
+        verify(webelement).find_element_by_xpath(xpath)
 
 
 class ElementFinderTests(unittest.TestCase):
@@ -207,18 +241,18 @@ class ElementFinderTests(unittest.TestCase):
 
     def test_find_with_no_tag(self):
         self.finder.find("test1", required=False)
-        verify(self.browser).find_elements_by_xpath("//*[(@id='test1' or "
+        verify(self.browser).find_element_by_xpath("//*[(@id='test1' or "
                                                          "@name='test1')]")
 
     def test_find_with_explicit_default_strategy(self):
         self.finder.find("default=test1", required=False)
-        verify(self.browser).find_elements_by_xpath("//*[(@id='test1' or "
+        verify(self.browser).find_element_by_xpath("//*[(@id='test1' or "
                                                          "@name='test1')]")
 
     def test_find_with_explicit_default_strategy_and_equals(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("default=page.do?foo=bar", tag='a', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//a[(@id='page.do?foo=bar' or @name='page.do?foo=bar' or "
             "@href='page.do?foo=bar' or "
             "normalize-space(descendant-or-self::text())='page.do?foo=bar' or "
@@ -226,29 +260,29 @@ class ElementFinderTests(unittest.TestCase):
 
     def test_find_with_tag(self):
         self.finder.find("test1", tag='div', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//div[(@id='test1' or @name='test1')]")
 
     def test_find_with_locator_with_apos(self):
         self.finder.find("test '1'", required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//*[(@id=\"test '1'\" or @name=\"test '1'\")]")
 
     def test_find_with_locator_with_quote(self):
         self.finder.find("test \"1\"", required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//*[(@id='test \"1\"' or @name='test \"1\"')]")
 
     def test_find_with_locator_with_quote_and_apos(self):
         self.finder.find("test \"1\" and '2'", required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//*[(@id=concat('test \"1\" and ', \"'\", '2', \"'\", '') "
             "or @name=concat('test \"1\" and ', \"'\", '2', \"'\", ''))]")
 
     def test_find_with_a(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='a', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//a[(@id='test1' or @name='test1' or @href='test1' or "
             "normalize-space(descendant-or-self::text())='test1' or "
             "@href='http://localhost/test1')]")
@@ -256,7 +290,7 @@ class ElementFinderTests(unittest.TestCase):
     def test_find_with_link_synonym(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='link', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//a[(@id='test1' or @name='test1' or @href='test1' or "
             "normalize-space(descendant-or-self::text())='test1' or "
             "@href='http://localhost/test1')]")
@@ -264,28 +298,28 @@ class ElementFinderTests(unittest.TestCase):
     def test_find_with_img(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='img', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//img[(@id='test1' or @name='test1' or @src='test1' or "
             "@alt='test1' or @src='http://localhost/test1')]")
 
     def test_find_with_image_synonym(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='image', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//img[(@id='test1' or @name='test1' or @src='test1' or "
             "@alt='test1' or @src='http://localhost/test1')]")
 
     def test_find_with_input(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='input', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//input[(@id='test1' or @name='test1' or @value='test1' or "
             "@src='test1' or @src='http://localhost/test1')]")
 
     def test_find_with_radio_button_synonym(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='radio button', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//input[@type='radio' and (@id='test1' or @name='test1' or "
             "@value='test1' or @src='test1' or "
             "@src='http://localhost/test1')]")
@@ -293,7 +327,7 @@ class ElementFinderTests(unittest.TestCase):
     def test_find_with_checkbox_synonym(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='checkbox', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//input[@type='checkbox' and (@id='test1' or @name='test1' or "
             "@value='test1' or @src='test1' or "
             "@src='http://localhost/test1')]")
@@ -301,7 +335,7 @@ class ElementFinderTests(unittest.TestCase):
     def test_find_with_file_upload_synonym(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='file upload', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//input[@type='file' and (@id='test1' or @name='test1' or "
             "@value='test1' or @src='test1' or "
             "@src='http://localhost/test1')]")
@@ -309,7 +343,7 @@ class ElementFinderTests(unittest.TestCase):
     def test_find_with_text_field_synonym(self):
         self.browser.current_url = "http://localhost/mypage.html"
         self.finder.find("test1", tag='text field', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//input[@type[. = 'date' or . = 'datetime-local' or . = 'email' or "
             ". = 'month' or . = 'number' or . = 'password' or . = 'search' or "
             ". = 'tel' or . = 'text' or . = 'time' or . = 'url' or . = 'week' or . = 'file'] and "
@@ -318,24 +352,27 @@ class ElementFinderTests(unittest.TestCase):
 
     def test_find_with_button(self):
         self.finder.find("test1", tag='button', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//button[(@id='test1' or @name='test1' or @value='test1' or "
             "normalize-space(descendant-or-self::text())='test1')]")
 
     def test_find_with_select(self):
         self.finder.find("test1", tag='select', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//select[(@id='test1' or @name='test1')]")
 
     def test_find_with_list_synonym(self):
         self.finder.find("test1", tag='list', required=False)
-        verify(self.browser).find_elements_by_xpath(
+        verify(self.browser).find_element_by_xpath(
             "//select[(@id='test1' or @name='test1')]")
 
     def test_find_with_implicit_xpath(self):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
         when(self.browser).find_elements_by_xpath(
             "//*[(@test='1')]").thenReturn(elements)
+        when(self.browser).find_elements_by_xpath(
+            xpath_with_tag("//*[(@test='1')]", 'a')).thenReturn(
+            [elements[1], elements[3]])
         result = self.finder.find("//*[(@test='1')]", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("//*[(@test='1')]", tag='a',
@@ -343,33 +380,74 @@ class ElementFinderTests(unittest.TestCase):
         self.assertEqual(result, [elements[1], elements[3]])
 
     def test_find_by_identifier(self):
-        id_elements = self._make_mock_elements('div', 'a')
-        name_elements = self._make_mock_elements('span', 'a')
-        when(self.browser).find_elements_by_id("test1").thenReturn(
-            list(id_elements)).thenReturn(list(id_elements))
-        when(self.browser).find_elements_by_name("test1").thenReturn(
-            list(name_elements)).thenReturn(list(name_elements))
-        all_elements = list(id_elements)
-        all_elements.extend(name_elements)
+        elements = self._make_mock_elements('div', 'a', 'span', 'a')
+        elements[0].set_attribute('id', 'other')
+        elements[1].set_attribute('id', 'other')
+        elements[2].set_attribute('id', 'test1')
+        elements[3].set_attribute('id', 'test1')
+        when(self.browser).find_elements_by_xpath(
+            "//*[@id='test1' or @name='test1']").thenReturn(elements)
+        when(self.browser).find_elements_by_xpath(
+            "//a[@id='test1' or @name='test1']").thenReturn(
+            [elements[1], elements[3]])
+        self._mock_order_by_identifier_script()
         result = self.finder.find("identifier=test1", first_only=False)
-        self.assertEqual(result, all_elements)
+        self.assertEqual(result, [elements[2], elements[3], elements[0],
+                                  elements[1]])
         result = self.finder.find("identifier=test1", tag='a',
                                   first_only=False)
-        self.assertEqual(result, [id_elements[1], name_elements[1]])
+        self.assertEqual(result, [elements[3], elements[1]])
+
+    def test_find_by_identifier_with_one_match(self):
+        elements = self._make_mock_elements('a')
+        when(self.browser).find_elements_by_xpath(
+            "//a[@id='test1' or @name='test1']").thenReturn(elements)
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenRaise(WebDriverException())
+        result = self.finder.find("identifier=test1", tag='link',
+                                  first_only=False)
+        self.assertEqual(result, elements)
+        verify(self.browser, times=0).execute_script(
+            ORDER_BY_IDENTIFIER_SCRIPT, Ellipsis)
+        verify(self.browser, times=0).execute_script(
+            FILTER_ELEMENTS_SCRIPT, Ellipsis)
+
+    def test_find_by_identifier_uses_one_driver_command(self):
+        elements = [mock(), mock(), mock()]
+        element = mock()
+        driver = CommandCountingDriver([elements], [element])
+        self.ctx.browser = driver
+        result = self.finder.find("identifier=test1", tag='checkbox',
+                                  first_only=False)
+        self.assertEqual(result, elements)
+        self.assertEqual(len(driver.commands), 1)
+        command, params = driver.commands[0]
+        self.assertEqual(params['args'][0], [
+            {'queries': [['css', '[id="test1"]'], ['css', '[name="test1"]']],
+             'tag': 'input', 'constraints': {'type': 'checkbox'}}])
+        driver.commands = []
+        self.assertEqual(self.finder.find("test1", tag='div',
+                                          first_only=False), [element])
+        self.assertEqual(len(driver.commands), 1)
 
     def test_find_by_id(self):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
         when(self.browser).find_elements_by_id("test1").thenReturn(
             elements)
+        when(self.browser).find_elements_by_css_selector(
+            'a[id="test1"]').thenReturn([elements[1], elements[3]])
         result = self.finder.find("id=test1", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("id=test1", tag='a', first_only=False)
         self.assertEqual(result, [elements[1], elements[3]])
+        verify(self.browser, times=0).execute_script(Ellipsis)
 
     def test_find_by_name(self):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
         when(self.browser).find_elements_by_name("test1").thenReturn(
             elements)
+        when(self.browser).find_elements_by_css_selector(
+            'a[name="test1"]').thenReturn([elements[1], elements[3]])
         result = self.finder.find("name=test1", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("name=test1", tag='a', first_only=False)
@@ -379,6 +457,9 @@ class ElementFinderTests(unittest.TestCase):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
         when(self.browser).find_elements_by_xpath(
             "//*[(@test='1')]").thenReturn(elements)
+        when(self.browser).find_elements_by_xpath(
+            xpath_with_tag("//*[(@test='1')]", 'a')).thenReturn(
+            [elements[1], elements[3]])
         result = self.finder.find("xpath=//*[(@test='1')]", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("xpath=//*[(@test='1')]", tag='a',
@@ -395,28 +476,31 @@ class ElementFinderTests(unittest.TestCase):
         self.assertEqual(result, [elements[1], elements[3]])
 
     def test_find_by_link_text(self):
-        elements = self._make_mock_elements('div', 'a', 'span', 'a')
+        elements = self._make_mock_elements('a', 'a', 'a', 'a')
         when(self.browser).find_elements_by_link_text(
             "my link").thenReturn(elements)
         result = self.finder.find("link=my link", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("link=my link", tag='a', first_only=False)
-        self.assertEqual(result, [elements[1], elements[3]])
+        self.assertEqual(result, elements)
+        verify(self.browser, times=0).execute_script(Ellipsis)
 
     def test_find_by_partial_link_text(self):
-        elements = self._make_mock_elements('div', 'a', 'span', 'a')
+        elements = self._make_mock_elements('a', 'a', 'a', 'a')
         when(self.browser).find_elements_by_partial_link_text(
             "my link").thenReturn(elements)
         result = self.finder.find("partial link=my link", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("partial link=my link", tag='a',
                                   first_only=False)
-        self.assertEqual(result, [elements[1], elements[3]])
+        self.assertEqual(result, elements)
+        verify(self.browser, times=0).execute_script(Ellipsis)
 
     def test_find_by_css_selector(self):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
         when(self.browser).find_elements_by_css_selector(
             "#test1").thenReturn(elements)
+        self._mock_filter_script()
         result = self.finder.find("css=#test1", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("css=#test1", tag='a', first_only=False)
@@ -426,19 +510,26 @@ class ElementFinderTests(unittest.TestCase):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
         when(self.browser).find_elements_by_class_name(
             "test1").thenReturn(elements)
+        when(self.browser).find_elements_by_css_selector(
+            'a[class~="test1"]').thenReturn([elements[1], elements[3]])
         result = self.finder.find("class=test1", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("class=test1", tag='a', first_only=False)
         self.assertEqual(result, [elements[1], elements[3]])
 
     def test_find_by_tag_name(self):
-        elements = self._make_mock_elements('div', 'a', 'span', 'a')
+        elements = self._make_mock_elements('div', 'div')
         when(self.browser).find_elements_by_tag_name(
             "div").thenReturn(elements)
         result = self.finder.find("tag=div", first_only=False)
         self.assertEqual(result, elements)
-        result = self.finder.find("tag=div", tag='a', first_only=False)
-        self.assertEqual(result, [elements[1], elements[3]])
+        result = self.finder.find("tag=div", tag='div', first_only=False)
+        self.assertEqual(result, elements)
+        result = self.finder.find("tag=div", tag='a', first_only=False,
+                                  required=False)
+        self.assertEqual(result, [])
+        verify(self.browser, times=2).find_elements_by_tag_name(any())
+        verify(self.browser, times=0).execute_script(Ellipsis)
 
     def test_find_with_sloppy_prefix(self):
         elements = self._make_mock_elements('div', 'a', 'span', 'a')
@@ -475,13 +566,17 @@ class ElementFinderTests(unittest.TestCase):
         elements[5].set_attribute('type', 'text')
         elements[7].set_attribute('type', 'file')
         elements[8].set_attribute('type', 'email')
+        inputs = [elements[1], elements[3], elements[5], elements[7],
+                  elements[8]]
         when(self.browser).find_elements_by_id("test1").thenReturn(
             elements)
+        when(self.browser).find_elements_by_css_selector(
+            'input[id="test1"]').thenReturn(inputs)
+        self._mock_filter_script()
         result = self.finder.find("id=test1", first_only=False)
         self.assertEqual(result, elements)
         result = self.finder.find("id=test1", tag='input', first_only=False)
-        self.assertEqual(result, [elements[1], elements[3], elements[5],
-                                  elements[7], elements[8]])
+        self.assertEqual(result, inputs)
         result = self.finder.find("id=test1", tag='radio button',
                                   first_only=False)
         self.assertEqual(result, [elements[1]])
@@ -494,6 +589,36 @@ class ElementFinderTests(unittest.TestCase):
                                   first_only=False)
         self.assertEqual(result, [elements[7]])
 
+    def test_filtering_is_done_with_one_script_call(self):
+        elements = self._make_mock_elements(*(['input'] * 300))
+        for element in elements:
+            element.set_attribute('type', 'text')
+        when(self.browser).find_elements_by_css_selector(
+            "input").thenReturn(elements)
+        self._mock_filter_script()
+        result = self.finder.find("css=input", tag='text field',
+                                  first_only=False)
+        self.assertEqual(result, elements)
+        verify(self.browser, times=1).execute_script(Ellipsis)
+
+    def test_filtering_without_javascript_support(self):
+        elements = self._make_mock_elements('div', 'a', 'span', 'a')
+        when(self.browser).find_elements_by_css_selector(
+            "#test1").thenReturn(elements)
+        when(self.browser).execute_script(Ellipsis).thenRaise(
+            WebDriverException('JavaScript not supported'))
+        result = self.finder.find("css=#test1", tag='a', first_only=False)
+        self.assertEqual(result, [elements[1], elements[3]])
+
+    def test_tag_is_not_compiled_into_query_when_not_simple(self):
+        elements = self._make_mock_elements('div', 'a')
+        when(self.browser).find_elements_by_id("test1").thenReturn(elements)
+        self._mock_filter_script()
+        result = self.finder.find("id=test1", tag='a b', first_only=False,
+                                  required=False)
+        self.assertEqual(result, [])
+        verify(self.browser, times=0).find_elements_by_css_selector(any())
+
     def test_find_returns_bad_values(self):
         # selenium.webdriver.ie.webdriver.WebDriver sometimes returns these
         # and ChromeDriver has also returned None:
@@ -515,6 +640,77 @@ class ElementFinderTests(unittest.TestCase):
                                           first_only=False)
                 self.assertEqual(result, [])
 
+    def test_compiled_locators_are_cached(self):
+        self.finder.find("test1", required=False)
+        self.finder.find("test1", required=False)
+        self.finder.find("test1", tag='div', required=False)
+        info = self.finder.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 2))
+        verify(self.browser, times=2).find_element_by_xpath(
+            "//*[(@id='test1' or @name='test1')]")
+
+    def test_compiled_locator_contents(self):
+        compiled = self.finder.compile("css=div.foo", tag='text area')
+        self.assertEqual(compiled.prefix, 'css')
+        self.assertEqual(compiled.criteria, 'div.foo')
+        self.assertEqual(compiled.tag, 'textarea')
+        self.assertEqual(compiled.constraints, {})
+        self.assertEqual(compiled.query, None)
+        compiled = self.finder.compile("test1", tag='a')
+        self.assertEqual(compiled.query.xpath,
+                         "//a[(@id='test1' or @name='test1' or "
+                         "@href='test1' or "
+                         "normalize-space(descendant-or-self::text())"
+                         "='test1')]")
+        self.assertEqual(compiled.query.url_attrs, ('@href',))
+
+    def test_cached_default_locator_uses_current_url(self):
+        self.browser.current_url = "http://localhost/mypage.html"
+        self.finder.find("test1", tag='img', required=False)
+        self.browser.current_url = "http://remote/other/page.html"
+        self.finder.find("test1", tag='img', required=False)
+        verify(self.browser).find_element_by_xpath(
+            "//img[(@id='test1' or @name='test1' or @src='test1' or "
+            "@alt='test1' or @src='http://remote/other/test1')]")
+
+    def test_register_and_unregister_clear_compiled_cache(self):
+        self.finder.compile("custom=foo")
+        self.assertEqual(self.finder.compile("custom=foo").prefix, 'default')
+        self.finder.register('custom', lambda *args: None, persist=True)
+        self.assertEqual(self.finder.compile("custom=foo").prefix, 'custom')
+        self.finder.unregister('custom')
+        self.assertEqual(self.finder.compile("custom=foo").prefix, 'default')
+
+    def test_compiled_cache_is_bounded(self):
+        self.finder._compiled.maxsize = 2
+        for locator in ('id:a', 'id:b', 'id:c', 'id:a'):
+            self.finder.compile(locator)
+        info = self.finder.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 4, 2))
+
+    def _mock_order_by_identifier_script(self):
+        def order_elements(script, elements, criteria, tag, constraints):
+            elements = [element for element in elements
+                        if tag is None or
+                        self.finder._element_matches(element, tag,
+                                                     constraints)]
+            ids = [element for element in elements
+                   if element.get_attribute('id') == criteria]
+            return ids + [element for element in elements
+                          if element not in ids]
+        when(self.browser).execute_script(
+            ORDER_BY_IDENTIFIER_SCRIPT, any(), any(), any(),
+            any()).thenAnswer(order_elements)
+
+    def _mock_filter_script(self):
+        def filter_elements(script, elements, tag, constraints):
+            return [element for element in elements
+                    if self.finder._element_matches(element, tag,
+                                                    constraints)]
+        when(self.browser).execute_script(
+            FILTER_ELEMENTS_SCRIPT, any(), any(), any()).thenAnswer(
+            filter_elements)
+
     def _make_mock_elements(self, *tags):
         elements = []
         for tag in tags:
@@ -532,7 +728,1019 @@ class ElementFinderTests(unittest.TestCase):
         element.set_attribute = set_attribute
 
         def get_attribute(name):
-            return element.attributes[name]
+            return element.attributes.get(name)
         element.get_attribute = get_attribute
 
         return element
+
+
+class FindManyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_compilable_locators_are_found_with_one_call(self):
+        elements = [mock(), mock(), mock()]
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn(
+            [[elements[0]], [elements[1], elements[2]], [], [], [], [], []])
+        result = self.finder.find_many(
+            ['id:foo', 'css:div.bar', 'name:x', 'identifier:y', '//p',
+             'class:z', 'default'], first_only=False, required=False)
+        self.assertEqual(result, [[elements[0]], [elements[1], elements[2]],
+                                  [], [], [], [], []])
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            self._item(['css', '[id="foo"]']),
+            self._item(['css', 'div.bar']),
+            self._item(['css', '[name="x"]']),
+            self._item(['css', '[id="y"]'], ['css', '[name="y"]']),
+            self._item(['xpath', '//p']),
+            self._item(['css', '[class~="z"]']),
+            self._item(['xpath', "//*[(@id='default' or @name='default')]"])
+        ], None)
+        verify(self.browser, times=0).find_elements_by_xpath(any())
+
+    def test_tag_and_constraints_are_passed_to_script(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[element]])
+        result = self.finder.find_many(['css:input'], tag='checkbox')
+        self.assertEqual(result, [element])
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', 'input']], 'tag': 'input',
+             'constraints': {'type': 'checkbox'}, 'limit': 1}], None)
+
+    def test_non_compilable_locators_use_normal_lookup(self):
+        link, element = mock(), mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[element], None])
+        when(self.browser).find_elements_by_link_text(
+            'Home').thenReturn([link])
+        result = self.finder.find_many(['id:foo', 'link:Home'])
+        self.assertEqual(result, [element, link])
+        verify(self.browser).execute_script(
+            FIND_MANY_SCRIPT, [dict(self._item(['css', '[id="foo"]']), limit=1),
+                               None], None)
+
+    def test_failing_queries_use_normal_lookup(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([None])
+        when(self.browser).find_elements_by_xpath(
+            '//invalid[').thenReturn([element])
+        self.assertEqual(self.finder.find_many(['//invalid[']), [element])
+
+    def test_no_javascript_support(self):
+        element = mock()
+        when(self.browser).execute_script(Ellipsis).thenRaise(
+            WebDriverException('no javascript'))
+        when(self.browser).find_elements_by_css_selector(
+            'div').thenReturn([element])
+        self.assertEqual(self.finder.find_many(['css:div']), [element])
+
+    def test_misses_are_retried_when_implicit_wait_is_set(self):
+        element = mock()
+        self.ctx.implicit_wait = 1
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[]])
+        when(self.browser).find_elements_by_css_selector(
+            'div').thenReturn([element])
+        self.assertEqual(self.finder.find_many(['css:div']), [element])
+
+    def test_required(self):
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[], []])
+        with self.assertRaisesRegexp(ElementNotFound, "'id:bar' not found"):
+            self.finder.find_many(['id:bar', 'id:foo'])
+        self.assertEqual(self.finder.find_many(['id:bar', 'id:foo'],
+                                               required=False),
+                         [None, None])
+
+    @unittest.skipUnless(which('node'), 'Requires Node.js.')
+    def test_only_results_of_multiple_queries_are_deduplicated(self):
+        # Runs FIND_MANY_SCRIPT with Node.js and counts searches from the
+        # found elements.
+        script = """
+var a = {tagName: 'DIV', id: 'a'}, b = {tagName: 'DIV', id: 'b'}, searches = 0;
+var document = {querySelectorAll: function (selector) {
+    return selector === 'first' ? [a, b] : [b, a];
+}};
+var indexOf = Array.prototype.indexOf;
+Array.prototype.indexOf = function () {
+    searches++;
+    return indexOf.apply(this, arguments);
+};
+function run(queries) {
+    var item = {queries: queries, tag: 'div', constraints: {}};
+    var found = (function () { %s }).apply(null, [[item], null])[0];
+    return [found.map(function (element) { return element.id; }), searches];
+}
+var results = [run([['css', 'first']])];
+results.push(run([['css', 'second'], ['css', 'first']]));
+Array.prototype.indexOf = indexOf;
+console.log(JSON.stringify(results));
+""" % FIND_MANY_SCRIPT
+        output = subprocess.check_output(['node', '-e', script])
+        self.assertEqual(json.loads(output.decode('UTF-8')),
+                         [[['a', 'b'], 0], [['b', 'a'], 4]])
+
+    def _item(self, *queries):
+        return {'queries': list(queries), 'tag': None, 'constraints': {}}
+
+
+class CountTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_counted_in_browser(self):
+        when(self.browser).execute_script(COUNT_SCRIPT, Ellipsis) \
+            .thenReturn(10000)
+        self.assertEqual(self.finder.count('//tr'), 10000)
+        self.assertEqual(self.finder.count('identifier:x', tag='checkbox'),
+                         10000)
+        verify(self.browser).execute_script(COUNT_SCRIPT, {
+            'queries': [['xpath', '//tr']], 'tag': None, 'constraints': {}},
+            None)
+        verify(self.browser).execute_script(COUNT_SCRIPT, {
+            'queries': [['css', '[id="x"]'], ['css', '[name="x"]']],
+            'tag': 'input', 'constraints': {'type': 'checkbox'}}, None)
+        verify(self.browser, times=0).find_elements_by_xpath(any())
+
+    def test_non_compilable_locators_are_found(self):
+        when(self.browser).find_elements_by_link_text('foo') \
+            .thenReturn([mock(), mock()])
+        self.assertEqual(self.finder.count('link:foo'), 2)
+        verify(self.browser, times=0).execute_script(COUNT_SCRIPT, Ellipsis)
+
+    def test_script_failure_falls_back_to_find(self):
+        when(self.browser).execute_script(COUNT_SCRIPT, Ellipsis) \
+            .thenRaise(WebDriverException())
+        when(self.browser).find_elements_by_css_selector('div') \
+            .thenReturn([mock()])
+        self.assertEqual(self.finder.count('css:div'), 1)
+
+    def test_zero_uses_find_with_implicit_wait(self):
+        self.ctx.implicit_wait = 1
+        when(self.browser).execute_script(COUNT_SCRIPT, Ellipsis) \
+            .thenReturn(0)
+        when(self.browser).find_elements_by_css_selector('div') \
+            .thenReturn([mock()])
+        self.assertEqual(self.finder.count('css:div'), 1)
+
+    def test_zero_without_implicit_wait(self):
+        when(self.browser).execute_script(COUNT_SCRIPT, Ellipsis) \
+            .thenReturn(0)
+        self.assertEqual(self.finder.count('css:div'), 0)
+        verify(self.browser, times=0).find_elements_by_css_selector('div')
+
+    def test_webelement(self):
+        element = mock()
+        when(self.finder)._is_webelement(element).thenReturn(True)
+        self.assertEqual(self.finder.count(element), 1)
+
+    def test_parent(self):
+        parent = mock()
+        when(self.finder)._is_webelement(parent).thenReturn(True)
+        when(self.finder)._is_webelement('css:td').thenReturn(False)
+        when(self.finder)._is_webelement('css:table').thenReturn(False)
+        when(self.browser).execute_script(COUNT_SCRIPT, Ellipsis) \
+            .thenReturn(3)
+        self.assertEqual(self.finder.count('css:td', parent=parent), 3)
+        verify(self.browser).execute_script(COUNT_SCRIPT, {
+            'queries': [['css', 'td']], 'tag': None, 'constraints': {}},
+            parent)
+        with self.assertRaises(ValueError):
+            self.finder.count('css:td', parent='css:table')
+
+    def test_statistics(self):
+        self.finder.profiler.enabled = True
+        self.browser.execute = lambda command, params=None: None
+        when(self.browser).execute_script(COUNT_SCRIPT, Ellipsis) \
+            .thenReturn(5)
+        self.finder.count('css:div')
+        stats = self.finder.profiler.statistics()['locators'][0]
+        self.assertEqual((stats['locator'], stats['elements']),
+                         ('css:div', 5))
+
+
+class StateTests(unittest.TestCase):
+    state = {'displayed': True, 'enabled': True, 'readonly': False,
+             'text': 'x'}
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+        self.version = self.finder.page_runtime.version
+
+    def tearDown(self):
+        unstub()
+
+    def test_state_with_one_script(self):
+        when(self.browser).execute_script(ELEMENT_STATE_SCRIPT, Ellipsis) \
+            .thenReturn(self.state)
+        self.assertEqual(self.finder.get_state('id:x'), self.state)
+        verify(self.browser).execute_script(ELEMENT_STATE_SCRIPT,
+                                            self.version, {
+            'queries': [['css', '[id="x"]']], 'tag': None,
+            'constraints': {}}, None)
+        verify(self.browser, times=0).find_element_by_id(any())
+
+    def test_not_found(self):
+        when(self.browser).execute_script(ELEMENT_STATE_SCRIPT, Ellipsis) \
+            .thenReturn(None)
+        with self.assertRaisesRegexp(ElementNotFound, "'id:x' not found"):
+            self.finder.get_state('id:x')
+        self.assertIsNone(self.finder.get_state('id:x', required=False))
+        verify(self.browser, times=0).find_element_by_id(any())
+
+    def test_not_found_uses_find_with_implicit_wait(self):
+        self.ctx.implicit_wait = 1
+        when(self.browser).execute_script(ELEMENT_STATE_SCRIPT, Ellipsis) \
+            .thenReturn(None)
+        when(self.finder).find('id:x', None, required=False).thenReturn(None)
+        self.assertIsNone(self.finder.get_state('id:x', required=False))
+        verify(self.finder).find('id:x', None, required=False)
+
+    def test_element_is_found_when_locator_not_supported_in_browser(self):
+        element = mock()
+        when(self.browser).find_element_by_link_text('x') \
+            .thenReturn(element)
+        when(self.browser).execute_script(ELEMENT_STATE_SCRIPT, self.version,
+                                          None, element) \
+            .thenReturn(self.state)
+        self.assertEqual(self.finder.get_state('link:x'), self.state)
+
+    def test_webdriver_is_used_when_script_fails(self):
+        element = mock()
+        element.text = 'x'
+        when(element).is_displayed().thenReturn(False)
+        when(element).is_enabled().thenReturn(True)
+        when(element).get_attribute('readonly').thenReturn('true')
+        when(self.browser).execute_script(ELEMENT_STATE_SCRIPT, Ellipsis) \
+            .thenRaise(WebDriverException('no JavaScript'))
+        when(self.browser).find_element_by_id('x').thenReturn(element)
+        self.assertEqual(self.finder.get_state('id:x'),
+                         {'displayed': False, 'enabled': True,
+                          'readonly': True, 'text': 'x'})
+
+
+class PageTextTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.browser.switch_to = self.switch_to = mock()
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_found_with_one_script(self):
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'textContent',
+                                          True) \
+            .thenReturn({'found': True, 'documents': 3, 'inaccessible': []})
+        self.assertIs(self.finder.page_contains('x'), True)
+        verify(self.switch_to, times=0).default_content()
+        verify(self.switch_to, times=0).frame(any())
+
+    def test_top_level_document_is_selected(self):
+        self.finder.frame_changed('css:iframe')
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'textContent',
+                                          True) \
+            .thenReturn(None) \
+            .thenReturn({'found': False, 'documents': 1, 'inaccessible': []})
+        self.assertIs(self.finder.page_contains('x'), False)
+        verify(self.switch_to, times=1).default_content()
+        self.assertEqual(self.finder.element_cache.frame_path, ())
+
+    def test_inaccessible_frames_are_selected(self):
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'textContent',
+                                          True) \
+            .thenReturn({'found': False, 'documents': 2,
+                         'inaccessible': [[0, 1], [2]]})
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'textContent',
+                                          False) \
+            .thenReturn({'found': False, 'documents': 1, 'inaccessible': []}) \
+            .thenReturn({'found': True, 'documents': 1, 'inaccessible': []})
+        self.assertIs(self.finder.page_contains('x'), True)
+        verify(self.switch_to, times=1).frame(0)
+        verify(self.switch_to, times=1).frame(1)
+        verify(self.switch_to, times=1).frame(2)
+        verify(self.switch_to, times=4).default_content()
+
+    def test_nested_inaccessible_frames_are_selected_from_top(self):
+        switches = []
+        self.browser.switch_to = Switches(switches)
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'textContent',
+                                          True) \
+            .thenReturn({'found': False, 'documents': 1,
+                         'inaccessible': [[0]]})
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'textContent',
+                                          False) \
+            .thenReturn({'found': False, 'documents': 1,
+                         'inaccessible': [[1]]}) \
+            .thenReturn({'found': True, 'documents': 1, 'inaccessible': []})
+        self.assertIs(self.finder.page_contains('x'), True)
+        self.assertEqual(switches, ['top', 0, 'top', 0, 1, 'top', 'top'])
+
+    def test_script_failure_falls_back_to_xpath(self):
+        frame = mock()
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, Ellipsis) \
+            .thenRaise(WebDriverException('no JavaScript'))
+        when(self.finder).find("xpath://*[contains(., 'x')]",
+                               required=False) \
+            .thenReturn(None).thenReturn(mock())
+        when(self.finder).find('xpath://frame|//iframe', first_only=False,
+                               required=False).thenReturn([frame])
+        self.assertIs(self.finder.page_contains('x'), True)
+        verify(self.switch_to).frame(frame)
+
+    @unittest.skipUnless(which('node'), 'Requires Node.js.')
+    def test_frame_tree_is_rebuilt_when_frame_document_changes(self):
+        # Runs PAGE_TEXT_SCRIPT with Node.js. The cached frame tree must
+        # notice frames navigating by themselves, which mutation observers
+        # of the parent document do not see.
+        script = """
+function MutationObserver() {
+    this.observe = function () {};
+    this.disconnect = function () {};
+}
+function doc(text) {
+    return {documentElement: {textContent: text}};
+}
+var blocked = true, inner = {document: doc('inner'), frames: []};
+var frame = {document: doc('old'), frames: []}, other = {frames: []};
+Object.defineProperty(other, 'document', {get: function () {
+    if (blocked) {
+        throw new Error('cross-origin');
+    }
+    return doc('other');
+}});
+var window = {document: doc('top'), frames: [frame, other]};
+window.top = window;
+function run(text) {
+    return (function () { %s }).apply(null, [text, 'textContent', true]);
+}
+var results = [run('inner'), run('other')];
+frame.document = doc('new');
+frame.frames = [inner];
+results.push(run('inner'));
+blocked = false;
+results.push(run('other'));
+console.log(JSON.stringify(results.map(function (result) {
+    return [result.found, result.documents];
+})));
+""" % PAGE_TEXT_SCRIPT
+        output = subprocess.check_output(['node', '-e', script])
+        self.assertEqual(json.loads(output.decode('UTF-8')),
+                         [[False, 2], [False, 2], [True, 3], [True, 4]])
+
+    def test_text_mode_is_passed_to_script(self):
+        self.finder.text_mode = 'innerText'
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, 'x', 'innerText',
+                                          True) \
+            .thenReturn({'found': True, 'documents': 1, 'inaccessible': []})
+        self.assertIs(self.finder.page_contains('x'), True)
+
+    def test_text_present_with_one_script(self):
+        when(self.browser).execute_script(TEXT_PRESENT_SCRIPT, 'x',
+                                          'textContent').thenReturn(True)
+        when(self.browser).execute_script(TEXT_PRESENT_SCRIPT, 'y',
+                                          'textContent').thenReturn(False)
+        self.assertIs(self.finder.is_text_present('x'), True)
+        self.assertIs(self.finder.is_text_present('y'), False)
+        verify(self.browser, times=0).find_elements_by_xpath(any())
+
+    def test_text_present_uses_xpath_with_implicit_wait(self):
+        self.ctx.implicit_wait = 5
+        when(self.browser).execute_script(TEXT_PRESENT_SCRIPT, Ellipsis) \
+            .thenReturn(False)
+        when(self.finder).find("xpath://*[contains(., 'x')]",
+                               required=False).thenReturn(mock())
+        self.assertIs(self.finder.is_text_present('x'), True)
+
+    def test_xpath_is_not_used_with_inner_text(self):
+        self.ctx.implicit_wait = 5
+        self.finder.text_mode = 'innerText'
+        when(self.browser).execute_script(TEXT_PRESENT_SCRIPT, Ellipsis) \
+            .thenReturn(False)
+        when(self.browser).execute_script(PAGE_TEXT_SCRIPT, Ellipsis) \
+            .thenReturn({'found': False, 'documents': 1, 'inaccessible': []})
+        self.assertIs(self.finder.is_text_present('x'), False)
+        self.assertIs(self.finder.page_contains('x'), False)
+        verify(self.browser, times=0).find_elements_by_xpath(Ellipsis)
+        verify(self.browser, times=0).find_element_by_xpath(Ellipsis)
+
+    def test_text_present_script_failure_falls_back_to_xpath(self):
+        when(self.browser).execute_script(TEXT_PRESENT_SCRIPT, Ellipsis) \
+            .thenRaise(WebDriverException('no JavaScript'))
+        when(self.finder).find("xpath://*[contains(., 'x')]",
+                               required=False).thenReturn(None)
+        self.assertIs(self.finder.is_text_present('x'), False)
+
+
+class Switches(object):
+    """Records frames switched to, the top level document as ``'top'``."""
+
+    def __init__(self, switches):
+        self.switches = switches
+
+    def frame(self, frame):
+        self.switches.append(frame)
+
+    def default_content(self):
+        self.switches.append('top')
+
+
+class LimitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_limit_and_offset_are_applied_in_browser(self):
+        elements = [mock(), mock()]
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([elements])
+        result = self.finder.find('css:tr', first_only=False, limit=2,
+                                  offset=10)
+        self.assertEqual(result, elements)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', 'tr']], 'tag': None, 'constraints': {},
+             'offset': 10, 'limit': 2}], None)
+        verify(self.browser, times=0).find_elements_by_css_selector(any())
+
+    def test_limit_and_offset_with_other_strategies(self):
+        elements = [mock() for _ in range(5)]
+        when(self.browser).find_elements_by_link_text('x') \
+            .thenReturn(elements)
+        self.assertEqual(self.finder.find('link:x', first_only=False,
+                                          limit=2, offset=1),
+                         elements[1:3])
+        self.assertEqual(self.finder.find('link:x', first_only=False,
+                                          offset=3),
+                         elements[3:])
+
+    def test_without_limit_all_elements_are_found_normally(self):
+        elements = [mock(), mock()]
+        when(self.browser).find_elements_by_css_selector('tr') \
+            .thenReturn(elements)
+        self.assertEqual(self.finder.find('css:tr', first_only=False),
+                         elements)
+        verify(self.browser, times=0).execute_script(Ellipsis)
+
+    def test_invalid_limit_and_offset(self):
+        for limit, offset in [(0, 0), (-1, 0), (None, -1)]:
+            with self.assertRaises(ValueError):
+                self.finder.find('css:tr', first_only=False, limit=limit,
+                                 offset=offset)
+
+    def test_max_elements_truncates(self):
+        self.finder.max_elements = 2
+        elements = [mock(), mock(), mock()]
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([elements])
+        self.assertEqual(self.finder.find('css:tr', first_only=False),
+                         elements[:2])
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', 'tr']], 'tag': None, 'constraints': {},
+             'limit': 3}], None)
+
+    def test_smaller_limit_is_used_with_max_elements(self):
+        self.finder.max_elements = 10
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[mock()]])
+        self.finder.find('css:tr', first_only=False, limit=1)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', 'tr']], 'tag': None, 'constraints': {},
+             'limit': 1}], None)
+
+    def test_max_elements_with_find_many(self):
+        self.finder.max_elements = 1
+        elements = [mock(), mock()]
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([elements])
+        self.assertEqual(self.finder.find_many(['css:tr'], first_only=False),
+                         [elements[:1]])
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', 'tr']], 'tag': None, 'constraints': {},
+             'limit': 2}], None)
+
+    def test_max_elements_does_not_affect_first_only(self):
+        self.finder.max_elements = 1
+        element = mock()
+        when(self.browser).find_element_by_css_selector('tr') \
+            .thenReturn(element)
+        self.assertEqual(self.finder.find('css:tr'), element)
+
+
+class ProbeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 5
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_implicit_wait_is_disabled_and_restored(self):
+        with self.assertRaises(RuntimeError):
+            with self.finder.probe():
+                verify(self.browser).implicitly_wait(0)
+                raise RuntimeError()
+        verify(self.browser).implicitly_wait(5)
+
+    def test_nested_probes_set_wait_once(self):
+        with self.finder.probe():
+            with self.finder.probe():
+                pass
+        verify(self.browser, times=1).implicitly_wait(0)
+        verify(self.browser, times=1).implicitly_wait(5)
+
+    def test_nothing_is_done_without_implicit_wait(self):
+        self.ctx.implicit_wait = 0
+        with self.finder.probe():
+            pass
+        verify(self.browser, times=0).implicitly_wait(Ellipsis)
+
+    def test_browser_specific_wait_is_restored(self):
+        self.finder.implicit_waits[self.browser] = 2
+        with self.finder.probe():
+            pass
+        verify(self.browser).implicitly_wait(2)
+
+    def test_script_miss_is_not_searched_again(self):
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[]])
+        with self.finder.probe():
+            self.assertIsNone(self.finder.find('css:.row', tag='div',
+                                               required=False))
+        verify(self.browser, times=0).find_elements_by_css_selector(any())
+
+
+class TagTupleTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 5
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_all_tags_are_searched_with_one_script(self):
+        button = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[], [button]])
+        self.assertEqual(self.finder.find('id:x', tag=('input', 'button')),
+                         button)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', '[id="x"]']], 'tag': 'input',
+             'constraints': {}, 'limit': 1},
+            {'queries': [['css', '[id="x"]']], 'tag': 'button',
+             'constraints': {}, 'limit': 1}], None)
+        verify(self.browser, times=0).implicitly_wait(Ellipsis)
+
+    def test_earlier_tag_has_priority(self):
+        image, input = mock(), mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[image], [input]])
+        self.assertEqual(self.finder.find('id:x', tag=('image', 'input')),
+                         image)
+        self.assertEqual(self.finder.find('id:x', tag=('image', 'input'),
+                                          first_only=False),
+                         [image, input])
+
+    def test_default_strategy_uses_key_attributes_of_each_tag(self):
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[], [mock()]])
+        self.browser.current_url = 'http://x/page.html'
+        self.finder.find('foo', tag=('input', 'button'))
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['url xpath', ["//input[(@id='foo' or "
+                                        "@name='foo' or @value='foo' or "
+                                        "@src='foo')]", ['@src'], 'foo']]],
+             'tag': 'input', 'constraints': {}, 'limit': 1},
+            {'queries': [['xpath', "//button[(@id='foo' or @name='foo' or "
+                                   "@value='foo' or normalize-space("
+                                   "descendant-or-self::text())='foo')]"]],
+             'tag': 'button', 'constraints': {}, 'limit': 1}], None)
+
+    def test_tags_are_probed_one_by_one_without_script(self):
+        button = mock()
+        when(self.browser).find_element_by_link_text('x').thenRaise(
+            NoSuchElementException())
+        when(self.browser).execute_script(
+            FILTER_ELEMENTS_SCRIPT, Ellipsis).thenReturn([button])
+        when(self.browser).find_elements_by_link_text('x').thenReturn(
+            [button])
+        self.assertEqual(self.finder.find('link:x', tag=('a', 'button')),
+                         button)
+        verify(self.browser).implicitly_wait(0)
+        verify(self.browser).implicitly_wait(5)
+
+    def test_implicit_wait_is_used_when_nothing_is_found(self):
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[], []])
+        when(self.browser).find_element_by_css_selector(Ellipsis).thenRaise(
+            NoSuchElementException())
+        with self.assertRaises(ElementNotFound):
+            self.finder.find('id:x', tag=('input', 'button'))
+        verify(self.browser).find_element_by_css_selector('input[id="x"]')
+        verify(self.browser).find_element_by_css_selector('button[id="x"]')
+
+    def test_not_searched_again_without_implicit_wait(self):
+        self.ctx.implicit_wait = 0
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[], []])
+        self.assertIsNone(self.finder.find('id:x', tag=('input', 'button'),
+                                           required=False))
+        verify(self.browser, times=0).find_element_by_css_selector(Ellipsis)
+
+
+class FindFirstTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_singular_find_is_used_when_no_filtering_is_needed(self):
+        element = mock()
+        driver = CommandCountingDriver(element)
+        self.ctx.browser = driver
+        self.assertEqual(self.finder.find('css:.row'), element)
+        self.assertEqual(driver.commands, [
+            (Command.FIND_ELEMENT,
+             {'using': 'css selector', 'value': '.row'})
+        ])
+
+    def test_singular_find_with_simple_tag(self):
+        element = mock()
+        when(self.browser).find_element_by_css_selector(
+            'div[class~="row"]').thenReturn(element)
+        when(self.browser).find_element_by_xpath(
+            xpath_with_tag('//p', 'div')).thenReturn(element)
+        when(self.browser).find_element_by_xpath(
+            xpath_with_tag('//*[@id="icon"]', 'svg')).thenReturn(element)
+        self.assertEqual(self.finder.find('class:row', tag='div'), element)
+        self.assertEqual(self.finder.find('//p', tag='div'), element)
+        self.assertEqual(self.finder.find('//*[@id="icon"]', tag='svg'),
+                         element)
+        verify(self.browser, times=0).execute_script(Ellipsis)
+
+    def test_not_found_is_not_searched_again(self):
+        when(self.browser).find_element_by_css_selector('.row').thenRaise(
+            NoSuchElementException('no such element'))
+        self.ctx.implicit_wait = 10
+        with self.assertRaises(ElementNotFound):
+            self.finder.find('css:.row')
+        self.assertIsNone(self.finder.find('css:.row', required=False))
+        verify(self.browser, times=0).find_elements_by_css_selector(any())
+
+    def test_filtering_stops_at_first_match_in_browser(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[element]])
+        self.assertEqual(self.finder.find('css:.row', tag='checkbox'),
+                         element)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', '.row']], 'tag': 'input',
+             'constraints': {'type': 'checkbox'}, 'limit': 1}], None)
+        verify(self.browser, times=0).find_elements_by_css_selector(any())
+
+    def test_first_match_with_constraint_is_found_without_parent(self):
+        element = mock()
+        driver = CommandCountingDriver([[element]])
+        self.ctx.browser = driver
+        self.assertEqual(self.finder.find('css:.row', tag='checkbox'),
+                         element)
+        command, params = driver.commands[0]
+        self.assertEqual(params['args'][1], None)
+        json.dumps(params)
+
+    def test_identifier_prefers_id_over_name(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[element]])
+        self.assertEqual(self.finder.find('identifier:foo'), element)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['css', '[id="foo"]'], ['css', '[name="foo"]']],
+             'tag': None, 'constraints': {}, 'limit': 1}], None)
+
+    def test_normal_find_is_used_when_script_finds_nothing_with_wait(self):
+        element = mock()
+        self.ctx.implicit_wait = 10
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[]])
+        when(self.browser).find_elements_by_css_selector(
+            '.row').thenReturn([element])
+        when(self.browser).execute_script(
+            FILTER_ELEMENTS_SCRIPT, Ellipsis).thenReturn([element])
+        self.assertEqual(self.finder.find('css:.row', tag='div'), element)
+
+    def test_script_not_finding_anything_without_wait(self):
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[]])
+        self.assertIsNone(self.finder.find('css:.row', tag='div',
+                                           required=False))
+        verify(self.browser, times=0).find_elements_by_css_selector(any())
+
+    def test_normal_find_is_used_without_javascript(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenRaise(WebDriverException())
+        when(self.browser).find_elements_by_xpath(
+            "//*[@id='foo' or @name='foo']").thenReturn([element])
+        self.assertEqual(self.finder.find('identifier:foo'), element)
+
+    def test_first_only_false_finds_all_elements(self):
+        elements = [mock(), mock()]
+        when(self.browser).find_elements_by_css_selector(
+            '.row').thenReturn(elements)
+        self.assertEqual(self.finder.find('css:.row', first_only=False),
+                         elements)
+        verify(self.browser, times=0).find_element_by_css_selector(any())
+
+
+class FramePathTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.browser.switch_to = self.switch_to = mock()
+        self.finder = ElementFinder(self.ctx)
+        self.button = mock()
+        when(self.browser).find_element_by_css_selector(
+            'button').thenReturn(self.button)
+
+    def tearDown(self):
+        unstub()
+
+    def test_split_frame_path(self):
+        split = self.finder._split_frame_path
+        self.assertEqual(split('frame:#outer >> Frame = #inner >> css:b'),
+                         (('#outer', '#inner'), 'css:b'))
+        self.assertEqual(split('frame:#f >> xpath://a[. = " >> "]'),
+                         (('#f',), 'xpath://a[. = " >> "]'))
+        self.assertEqual(split('css:a >> b'), ((), 'css:a >> b'))
+        self.assertEqual(split('frame:#outer'), ((), 'frame:#outer'))
+
+    def test_same_origin_frames_are_resolved_with_one_script(self):
+        self._mock_frames(['#outer', '#inner'], [0, 1])
+        self.assertEqual(
+            self.finder.find('frame:#outer >> frame:#inner >> css:button'),
+            self.button)
+        verify(self.switch_to).default_content()
+        verify(self.switch_to).frame(0)
+        verify(self.switch_to).frame(1)
+        verify(self.browser, times=0).find_element_by_css_selector('#outer')
+
+    def test_selected_frames_are_reused(self):
+        self._mock_frames(['#outer'], [3])
+        self.finder.find('frame:#outer >> css:button')
+        self.finder.find('frame:#outer >> css:button')
+        verify(self.browser, times=1).execute_script(FRAME_PATH_SCRIPT,
+                                                     Ellipsis)
+        verify(self.switch_to, times=1).default_content()
+        verify(self.switch_to, times=1).frame(3)
+
+    def test_cross_origin_frame_is_resolved_after_switching(self):
+        self._mock_frames(['#outer', '#inner'], [0])
+        self._mock_frames(['#inner'], [2])
+        self.finder.find('frame:#outer >> frame:#inner >> css:button')
+        verify(self.switch_to).frame(0)
+        verify(self.switch_to).frame(2)
+
+    def test_frame_not_found(self):
+        self._mock_frames(['#outer', '#bad'], [0], missing=1)
+        locator = 'frame:#outer >> frame:#bad >> css:button'
+        self.assertIsNone(self.finder.find(locator, required=False))
+        with self.assertRaisesRegexp(ElementNotFound, locator):
+            self.finder.find(locator)
+        verify(self.switch_to, times=0).frame(Ellipsis)
+
+    def test_normal_locator_returns_to_previously_selected_frame(self):
+        frame = mock()
+        when(self.browser).find_element_by_xpath(
+            "//*[(@id='top' or @name='top')]").thenReturn(frame)
+        self.finder.frame_changed('top')
+        self._mock_frames(['#outer'], [0])
+        self.finder.find('frame:#outer >> css:button')
+        self.assertEqual(self.finder.element_cache.frame_path,
+                         ('css:#outer',))
+        self.assertEqual(self.finder.find('css:button'), self.button)
+        self.assertEqual(self.finder.element_cache.frame_path, ('top',))
+        verify(self.switch_to, times=2).default_content()
+        verify(self.switch_to).frame(frame)
+        self.finder.find('css:button')
+        verify(self.switch_to, times=2).default_content()
+
+    def test_frame_selected_with_frame_path_is_restored(self):
+        outer, inner = mock(), mock()
+        self._mock_frames(['#outer'], [0])
+        self._mock_frames(['#other'], [1])
+        when(self.browser).find_element_by_id('inner').thenReturn(inner)
+        when(self.browser).find_element_by_css_selector(
+            '#outer').thenReturn(outer)
+        locator = 'frame:#outer >> id:inner'
+        self.finder.find(locator)
+        self.finder.frame_changed(locator)
+        self.finder.find('frame:#other >> css:button')
+        self.assertEqual(self.finder.find('css:button'), self.button)
+        self.assertEqual(self.finder.element_cache.frame_path,
+                         ('css:#outer', locator))
+        verify(self.switch_to).frame(outer)
+        verify(self.switch_to).frame(inner)
+
+    def test_top_document_is_selected_if_frame_cannot_be_restored(self):
+        self.finder.frame_changed('css:#gone')
+        self._mock_frames(['#outer'], [0])
+        self.finder.find('frame:#outer >> css:button')
+        when(self.browser).find_element_by_css_selector('#gone') \
+            .thenReturn(None)
+        self.finder.restore_frames()
+        self.assertEqual(self.finder.element_cache.frame_path, ())
+        verify(self.switch_to, times=3).default_content()
+
+    def test_text_is_searched_from_previously_selected_frame(self):
+        events = []
+        self.browser.switch_to = Switches(events)
+        self._mock_frames(['#outer'], [0])
+        when(self.browser).execute_script(
+            TEXT_PRESENT_SCRIPT, 'x', 'textContent').thenAnswer(
+            lambda *args: events.append('search') or True)
+        self.finder.find('frame:#outer >> css:button')
+        self.assertIs(self.finder.is_text_present('x'), True)
+        self.assertEqual(events, ['top', 0, 'top', 'search'])
+        self.assertEqual(self.finder.element_cache.frame_path, ())
+
+    def test_nested_lookup_does_not_restore_frames(self):
+        events = []
+        self.browser.switch_to = Switches(events)
+        self._mock_frames(['#outer'], [0])
+        when(self.browser).find_elements_by_css_selector('button') \
+            .thenAnswer(lambda *args: events.append('find') or [self.button])
+
+        def strategy(parent, criteria, tag, constraints):
+            return self.finder.find('css:button', first_only=False)
+
+        self.finder.register('custom', strategy, persist=True)
+        self.assertEqual(self.finder.find('frame:#outer >> custom:x'),
+                         self.button)
+        self.assertEqual(events, ['top', 0, 'find'])
+        self.finder.find('css:button', first_only=False)
+        self.assertEqual(events, ['top', 0, 'find', 'top', 'find'])
+
+    def test_removed_frame_is_selected_again(self):
+        self._mock_frames(['#outer'], [0])
+        self.finder.find('frame:#outer >> css:button')
+        when(self.browser).find_element_by_css_selector('button').thenRaise(
+            NoSuchFrameException('gone')).thenReturn(self.button)
+        self.assertEqual(self.finder.find('frame:#outer >> css:button'),
+                         self.button)
+        verify(self.switch_to, times=2).frame(0)
+
+    def test_frames_without_javascript(self):
+        frame = mock()
+        when(self.browser).execute_script(
+            FRAME_PATH_SCRIPT, Ellipsis).thenRaise(WebDriverException())
+        when(self.browser).find_elements_by_css_selector(
+            '#outer').thenReturn([frame])
+        self.finder.find('frame:#outer >> css:button')
+        verify(self.switch_to).frame(frame)
+
+    def test_frame_path_with_parent(self):
+        parent = mock()
+        when(self.finder)._is_webelement(Ellipsis).thenReturn(False)
+        when(self.finder)._is_webelement(parent).thenReturn(True)
+        with self.assertRaises(ValueError):
+            self.finder.find('frame:#outer >> css:button', parent=parent)
+
+    def _mock_frames(self, selectors, indices, missing=None):
+        when(self.browser).execute_script(
+            FRAME_PATH_SCRIPT, selectors).thenReturn(
+            {'indices': indices, 'missing': missing})
+
+
+class BaseUrlTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.implicit_wait = 0
+        self.ctx.browser = self.browser = CurrentUrlCountingBrowser(
+            "http://localhost/mypage.html")
+        self.finder = ElementFinder(self.ctx)
+        self.xpath = "//img[(@id='foo' or @name='foo' or @src='foo' or " \
+                     "@alt='foo')]"
+
+    def test_page_url_is_resolved_in_browser(self):
+        self.assertIs(self.finder.find('foo', tag='img'),
+                      self.browser.element)
+        self.assertEqual(self.finder.find('foo', tag='img',
+                                          first_only=False),
+                         [self.browser.element])
+        self.assertEqual(self.browser.url_reads, 0)
+        self.assertEqual(self.browser.scripts, [
+            [{'queries': [['url xpath', [self.xpath, ['@src'], 'foo']]],
+              'tag': 'img', 'constraints': {}, 'limit': 1}],
+            [{'queries': [['url xpath', [self.xpath, ['@src'], 'foo']]],
+              'tag': 'img', 'constraints': {}}]])
+        self.assertEqual(self.finder.base_url_reads_saved, 2)
+
+    def test_page_url_is_read_without_javascript(self):
+        self.browser.javascript = False
+        self.finder.find('foo', tag='img')
+        self.assertEqual(self.browser.url_reads, 1)
+        self.assertEqual(self.browser.xpaths, [
+            self.xpath[:-2] + " or @src='http://localhost/foo')]"])
+
+    def test_tags_resolve_page_url_with_one_script(self):
+        self.assertIs(self.finder.find('foo', tag=('image', 'input')),
+                      self.browser.element)
+        self.assertEqual(len(self.browser.scripts), 1)
+        self.assertEqual(self.browser.url_reads, 0)
+
+    def test_tags_read_page_url_once_per_lookup(self):
+        self.browser.javascript = False
+        self.finder.find('foo', tag=('image', 'input'))
+        self.assertEqual(self.browser.url_reads, 1)
+        self.assertEqual(len(self.browser.xpaths), 2)
+        self.finder.find('foo', tag=('image', 'input'))
+        self.assertEqual(self.browser.url_reads, 2)
+
+    @unittest.skipUnless(which('node'), 'Requires Node.js.')
+    def test_url_xpath_in_browser_matches_url_xpath_in_python(self):
+        # Runs the XPath building of QUERY_JS with Node.js.
+        script = """
+var window = {top: {location: {href: arguments[0]}}};
+%s
+console.log(JSON.stringify(arguments[1].map(urlXpath)));
+"""
+        finder = ElementFinder(self.ctx)
+        parts, expected = [], []
+        for criteria in ['foo', "it's", 'say "it\'s"']:
+            query = finder.compile(criteria, tag='a').query
+            parts.append([query.xpath, list(query.url_attrs), criteria])
+            expected.append(finder._get_default_xpath(query, criteria))
+        code = '(function () { %s }).apply(null, %s);' % (
+            script % QUERY_JS,
+            json.dumps(["http://localhost/mypage.html", parts]))
+        output = subprocess.check_output(['node', '-e', code])
+        self.assertEqual(json.loads(output.decode('UTF-8')), expected)
+
+
+class CurrentUrlCountingBrowser(object):
+
+    def __init__(self, url):
+        self.session_id = 'session'
+        self.url = url
+        self.url_reads = 0
+        self.javascript = True
+        self.element = object()
+        self.scripts = []
+        self.xpaths = []
+
+    @property
+    def current_url(self):
+        self.url_reads += 1
+        return self.url
+
+    def execute_script(self, script, batch, root):
+        if not self.javascript:
+            raise WebDriverException('no JavaScript')
+        self.scripts.append(batch)
+        return [[self.element] for _ in batch]
+
+    def find_element_by_xpath(self, xpath):
+        self.xpaths.append(xpath)
+        return self.element
@@ -0,0 +1,203 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mockito import mock, unstub, verify, when
+
+from SeleniumLibrary.locators.elementfinder import ElementFinder
+from SeleniumLibrary.locators.locatoroptimizer import (LocatorOptimizer,
+                                                       LocatorScanner, main)
+
+
+class XPathRewriteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.optimizer = LocatorOptimizer()
+
+    def test_any_element_by_id(self):
+        self._verify("//*[@id='foo']", ('id', 'foo'))
+        self._verify('//*[@id="foo"]', ('id', 'foo'))
+
+    def test_element_with_attribute(self):
+        self._verify("//div[@id='foo']", ('css', 'div[id="foo"]'))
+        self._verify("//*[@name='foo']", ('css', '[name="foo"]'))
+        self._verify("//input[@data-x]", ('css', 'input[data-x]'))
+
+    def test_functions(self):
+        self._verify("//div[contains(@class, 'btn')]",
+                     ('css', 'div[class*="btn"]'))
+        self._verify("//link[starts-with(@href,'http')]",
+                     ('css', 'link[href^="http"]'))
+
+    def test_multiple_conditions(self):
+        self._verify("//input[@name='a' and @data-x][@title='b']",
+                     ('css', 'input[name="a"][data-x][title="b"]'))
+
+    def test_child_and_descendant_steps(self):
+        self._verify("//div[@id='a']/ul//li",
+                     ('css', 'div[id="a"] > ul li'))
+        self._verify("//*[@id='a']//*", ('css', '[id="a"] *'))
+
+    def test_values_are_escaped(self):
+        self._verify("//div[@title='say \"hi\"']",
+                     ('css', 'div[title="say \\"hi\\""]'))
+
+    def test_not_rewritable(self):
+        for xpath in ["//a[text()='x']",
+                      "//div[normalize-space(.)='x']",
+                      "//li[2]",
+                      "(//li)[1]",
+                      "/html/body",
+                      "//div/..",
+                      "//div[@id='a' or @id='b']",
+                      "//input[@type='text']",
+                      "//div[contains(@class, '')]",
+                      "//svg:rect",
+                      "//svg",
+                      "//circle[@r='5']",
+                      "//div//a[@href]",
+                      "//custom-element[@id='a']",
+                      "//DIV[@id='a']",
+                      "//div[@id='a']/following-sibling::p",
+                      "//div | //span"]:
+            self.assertIsNone(self.optimizer.xpath_to_css(xpath), xpath)
+
+    def test_optimize_counts_rewrites(self):
+        self.assertEqual(self.optimizer.optimize('xpath', "//*[@id='a']"),
+                         ('id', 'a'))
+        self.assertEqual(self.optimizer.optimize('xpath', '//li[2]'),
+                         ('xpath', '//li[2]'))
+        self.assertEqual(self.optimizer.optimize('css', 'a'), ('css', 'a'))
+        self.assertEqual(self.optimizer.rewrites, 1)
+
+    def _verify(self, xpath, expected):
+        self.assertEqual(self.optimizer.xpath_to_css(xpath), expected)
+
+
+class CostTests(unittest.TestCase):
+
+    def setUp(self):
+        self.optimizer = LocatorOptimizer()
+
+    def test_fast(self):
+        for prefix in ('id', 'name', 'css', 'class', 'tag'):
+            self.assertEqual(self.optimizer.cost(prefix, 'x'),
+                             ('fast', prefix, None))
+
+    def test_xpath(self):
+        self.assertEqual(self.optimizer.cost('xpath', "//*[@id='x']"),
+                         ('medium', 'xpath', 'id:x'))
+        self.assertEqual(self.optimizer.cost('xpath', '//table/tbody/tr'),
+                         ('medium', 'xpath', 'css:table > tbody > tr'))
+        self.assertEqual(self.optimizer.cost('xpath', '//li[2]'),
+                         ('medium', 'xpath', None))
+        self.assertEqual(self.optimizer.cost('xpath', "//a[text()='x']"),
+                         ('slow', 'xpath', None))
+
+    def test_slow(self):
+        for prefix in ('default', 'dom', 'sizzle', 'scLocator'):
+            self.assertEqual(self.optimizer.cost(prefix, 'x').cost, 'slow')
+
+
+class FinderIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.finder = ElementFinder(self.ctx)
+
+    def tearDown(self):
+        unstub()
+
+    def test_disabled_by_default(self):
+        element = mock()
+        when(self.browser).find_element_by_xpath("//*[@id='a']") \
+            .thenReturn(element)
+        self.assertEqual(self.finder.find("//*[@id='a']"), element)
+
+    def test_rewritten_when_enabled(self):
+        self.finder.optimizer.enabled = True
+        element = mock()
+        when(self.browser).find_element_by_id('a').thenReturn(element)
+        self.assertEqual(self.finder.find("//*[@id='a']"), element)
+        self.assertEqual(self.finder.find("xpath://*[@id='a']"), element)
+        verify(self.browser, times=2).find_element_by_id('a')
+        self.assertEqual(self.finder.optimizer.rewrites, 2)
+
+    def test_not_rewritten_with_parent(self):
+        self.finder.optimizer.enabled = True
+        parent, element = mock(), mock()
+        when(self.finder)._is_webelement(parent).thenReturn(True)
+        when(self.finder)._is_webelement("//*[@id='a']").thenReturn(False)
+        when(parent).find_element_by_xpath("//*[@id='a']").thenReturn(element)
+        self.assertEqual(self.finder.find("//*[@id='a']", parent=parent),
+                         element)
+        self.assertEqual(self.finder.optimizer.rewrites, 0)
+
+    def test_compiled_cache_separates_optimized_locators(self):
+        plain = self.finder.compile("//div[@id='a']")
+        self.finder.optimizer.enabled = True
+        optimized = self.finder.compile("//div[@id='a']")
+        self.assertEqual((plain.prefix, plain.criteria),
+                         ('xpath', "//div[@id='a']"))
+        self.assertEqual((optimized.prefix, optimized.criteria),
+                         ('css', 'div[id="a"]'))
+
+
+class ScannerTests(unittest.TestCase):
+    data = '''\
+*** Variables ***
+${BUTTON}    xpath=//*[@id='submit']
+
+*** Test Cases ***
+Example
+    Click Element    //div[@class='btn']
+    Input Text    username    demo
+    ${el}=    SeleniumLibrary.Get WebElement    css:#foo
+    Click Element    ${BUTTON}
+    Page Should Contain Element    //a[text()='x']
+    Log    just text
+'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'example.robot')
+        with open(self.path, 'w') as data:
+            data.write(self.data)
+        self.scanner = LocatorScanner(
+            ElementFinder(None),
+            {'clickelement', 'inputtext', 'getwebelement',
+             'pageshouldcontainelement'})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_scan(self):
+        found = [(number, locator, cost.cost, cost.suggestion)
+                 for number, locator, cost in self.scanner.scan(self.path)]
+        self.assertEqual(found, [
+            (2, "xpath=//*[@id='submit']", 'medium', 'id:submit'),
+            (6, "//div[@class='btn']", 'medium', 'css:div[class="btn"]'),
+            (7, 'username', 'slow', None),
+            (8, 'css:#foo', 'fast', None),
+            (10, "//a[text()='x']", 'slow', None)
+        ])
+
+    def test_main_without_paths(self):
+        output = Output()
+        self.assertEqual(main([], output), 251)
+        self.assertIn('python -m', output.text)
+
+
+class Output(object):
+
+    def __init__(self):
+        self.text = ''
+
+    def write(self, text):
+        self.text += text
+
+
+if __name__ == '__main__':
+    unittest.main()
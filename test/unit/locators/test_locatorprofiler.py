@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mockito import mock, unstub, when
+
+from SeleniumLibrary import SeleniumLibrary
+from SeleniumLibrary.errors import ElementNotFound
+from SeleniumLibrary.locators.elementfinder import (ElementFinder,
+                                                    FIND_MANY_SCRIPT,
+                                                    FRAME_PATH_SCRIPT)
+from SeleniumLibrary.locators.locatorprofiler import LocatorProfiler
+from SeleniumLibrary.utils import events, LibraryListener
+
+
+class Browser(object):
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, command, params=None):
+        self.executed.append(command)
+        return {'value': None}
+
+
+class LocatorProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = LocatorProfiler()
+        self.browser = Browser()
+
+    def test_commands_and_elements_are_recorded(self):
+        def find(count):
+            for _ in range(count):
+                self.browser.execute('command')
+            return ['element'] * count
+        self.profiler.profile(self.browser, 'css', 'css:a', find, 2)
+        self.profiler.profile(self.browser, 'css', 'css:a', find, 1)
+        self.profiler.profile(self.browser, 'id', 'id:b', find, 0)
+        self.assertEqual(self.browser.executed, ['command'] * 3)
+        self.assertNotIn('execute', vars(self.browser))
+        statistics = self.profiler.statistics()
+        locators = dict(((s['strategy'], s['locator']), s)
+                        for s in statistics['locators'])
+        self.assertEqual(self._values(locators['css', 'css:a']), (2, 3, 3))
+        self.assertEqual(self._values(locators['id', 'id:b']), (1, 0, 0))
+        self.assertEqual(set(s['strategy'] for s in statistics['strategies']),
+                         set(['css', 'id']))
+
+    def test_nested_lookups_are_included_in_outer_lookup(self):
+        def inner():
+            self.browser.execute('inner')
+            return 'element'
+
+        def outer():
+            self.browser.execute('outer')
+            return self.profiler.profile(self.browser, 'id', 'id:x', inner)
+        self.profiler.profile(self.browser, 'custom', 'custom:x', outer)
+        locators = dict((s['strategy'], s)
+                        for s in self.profiler.statistics()['locators'])
+        self.assertEqual(self._values(locators['custom']), (1, 2, 1))
+        self.assertNotIn('id', locators)
+        self.assertNotIn('execute', vars(self.browser))
+
+    def test_failures_are_recorded(self):
+        def find():
+            self.browser.execute('command')
+            raise ElementNotFound('not found')
+        with self.assertRaises(ElementNotFound):
+            self.profiler.profile(self.browser, 'id', 'id:x', find)
+        stats = self.profiler.statistics()['locators'][0]
+        self.assertEqual(self._values(stats), (1, 1, 0))
+        self.assertNotIn('execute', vars(self.browser))
+
+    def test_batch_results_are_counted(self):
+        self.profiler.profile(self.browser, 'batch', 'a, b, c',
+                              lambda: [['x', 'y'], [], None])
+        stats = self.profiler.statistics()['strategies'][0]
+        self.assertEqual(self._values(stats), (1, 0, 2))
+
+    def test_report_is_written_only_when_enabled(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.profiler.report = os.path.join(directory, 'stats.json')
+        self.profiler.write_report()
+        self.assertFalse(os.path.exists(self.profiler.report))
+
+    def test_json_report(self):
+        path = self._write_report('stats.json')
+        with open(path) as report:
+            statistics = json.load(report)
+        self.assertEqual(statistics['strategies'][0]['strategy'], 'xpath')
+        self.assertEqual(statistics['locators'][0]['locator'], '//div')
+        self.assertEqual(statistics['locators'][0]['elements'], 1)
+
+    def test_csv_report(self):
+        path = self._write_report('stats.csv')
+        with open(path) as report:
+            rows = list(csv.DictReader(report))
+        self.assertEqual([(row['strategy'], row['locator'], row['calls'])
+                          for row in rows],
+                         [('xpath', '', '1'), ('xpath', '//div', '1')])
+
+    def _write_report(self, name):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.profiler.enabled = True
+        self.profiler.report = os.path.join(directory, name)
+        self.profiler.profile(self.browser, 'xpath', '//div',
+                              lambda: 'element')
+        self.profiler.write_report()
+        return self.profiler.report
+
+    def _values(self, stats):
+        return stats['calls'], stats['commands'], stats['elements']
+
+
+class ElementFinderProfilingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+        self.finder.profiler.enabled = True
+
+    def tearDown(self):
+        unstub()
+
+    def test_lookups_are_recorded_per_strategy_and_locator(self):
+        element = mock()
+        when(self.browser).find_element_by_css_selector(
+            'div').thenReturn(element)
+        when(self.browser).find_element_by_xpath(
+            "//*[(@id='foo' or @name='foo')]").thenReturn(None)
+        self.finder.find('CSS:div')
+        self.finder.find('foo', required=False)
+        statistics = self.finder.profiler.statistics()
+        self.assertEqual(
+            sorted((s['strategy'], s['locator'], s['calls'], s['elements'])
+                   for s in statistics['locators']),
+            [('css', 'CSS:div', 1, 1), ('default', 'foo', 1, 0)])
+
+    def test_frame_path_lookup_is_recorded_once(self):
+        self.browser.switch_to = mock()
+        when(self.browser).execute_script(FRAME_PATH_SCRIPT, ['#f']) \
+            .thenReturn({'indices': [0], 'missing': None})
+        when(self.browser).find_element_by_css_selector(
+            'div').thenReturn(mock())
+        self.finder.find('frame:#f >> css:div')
+        statistics = self.finder.profiler.statistics()
+        self.assertEqual(
+            [(s['strategy'], s['locator'], s['calls'])
+             for s in statistics['locators']],
+            [('css', 'frame:#f >> css:div', 1)])
+        self.assertEqual(sum(s['calls'] for s in statistics['strategies']),
+                         1)
+
+    def test_batch_lookups(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[element], []])
+        self.finder.find_many(['id:a', 'id:b'], required=False)
+        stats = self.finder.profiler.statistics()['locators'][0]
+        self.assertEqual((stats['strategy'], stats['locator'],
+                          stats['elements']), ('batch', 'id:a, id:b', 1))
+
+    def test_disabled_by_default(self):
+        self.assertFalse(ElementFinder(self.ctx).profiler.enabled)
+
+
+class LibraryImportTests(unittest.TestCase):
+
+    def test_collecting_without_report(self):
+        library = SeleniumLibrary(locator_statistics='True')
+        self.assertTrue(library.element_finder.profiler.enabled)
+        self.assertIsNone(library.element_finder.profiler.report)
+        library = SeleniumLibrary()
+        self.assertFalse(library.element_finder.profiler.enabled)
+
+    def test_report_is_written_at_suite_end(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        registered = list(events._events)
+        self.addCleanup(setattr, events, '_events', registered)
+        path = os.path.join(directory, 'stats.json')
+        SeleniumLibrary(locator_statistics=path)
+        LibraryListener().end_suite('Suite', {'longname': 'Suite'})
+        with open(path) as report:
+            self.assertEqual(json.load(report),
+                             {'strategies': [], 'locators': []})
@@ -0,0 +1,152 @@
+import json
+import subprocess
+import unittest
+
+try:
+    from shutil import which
+except ImportError:    # Python 2
+    from distutils.spawn import find_executable as which
+
+from mockito import mock, unstub, verify, when
+
+from SeleniumLibrary.locators.elementfinder import (ElementFinder,
+                                                    FIND_MANY_SCRIPT)
+from SeleniumLibrary.locators.pageruntime import (ASYNC_RUNTIME_CHECK,
+                                                  CALL_SCRIPT,
+                                                  INSTALL_SCRIPT,
+                                                  isDisplayed_js,
+                                                  RUNTIME_MISSING,
+                                                  RUNTIME_SCRIPT)
+
+
+class PageRuntimeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = mock()
+        self.ctx.browser = self.browser = mock()
+        self.ctx.implicit_wait = 0
+        self.finder = ElementFinder(self.ctx)
+        self.runtime = self.finder.page_runtime
+
+    def tearDown(self):
+        unstub()
+
+    def test_installed_runtime_is_called_with_arguments_only(self):
+        element = mock()
+        when(self.browser).execute_script(
+            CALL_SCRIPT, 5, 'sizzle', ['div:visible']).thenReturn([element])
+        self.assertEqual(self.runtime.call('sizzle', 'div:visible'),
+                         [element])
+        verify(self.browser, times=0).execute_script(INSTALL_SCRIPT, Ellipsis)
+        self.assertEqual(self.runtime.installs, 0)
+
+    def test_missing_runtime_is_installed_and_call_retried(self):
+        element = mock()
+        when(self.browser).execute_script(
+            CALL_SCRIPT, 5, 'sizzle', ['div']).thenReturn(RUNTIME_MISSING)
+        when(self.browser).execute_script(
+            INSTALL_SCRIPT, 5, 'sizzle', ['div']).thenReturn([element])
+        self.assertEqual(self.runtime.call('sizzle', 'div'), [element])
+        self.assertEqual(self.runtime.installs, 1)
+
+    def test_asynchronous_script_installs_missing_runtime(self):
+        script = ASYNC_RUNTIME_CHECK + 'arguments[2](arguments[1]);'
+        when(self.browser).execute_async_script(script, 5, 'x') \
+            .thenReturn(RUNTIME_MISSING)
+        when(self.browser).execute_async_script(RUNTIME_SCRIPT + script, 5,
+                                                'x').thenReturn('x')
+        self.assertEqual(self.runtime.run_async(script, 'x'), 'x')
+        self.assertEqual(self.runtime.installs, 1)
+
+    def test_sizzle_strategy_uses_runtime(self):
+        elements = [mock(), mock()]
+        when(self.browser).execute_script(
+            CALL_SCRIPT, 5, 'sizzle', ["a[title='x']"]).thenReturn(elements)
+        result = self.finder.find("sizzle:a[title='x']", first_only=False)
+        self.assertEqual(result, elements)
+
+    def test_sizzle_first_only_uses_runtime_in_batch_script(self):
+        element = mock()
+        when(self.browser).execute_script(
+            FIND_MANY_SCRIPT, Ellipsis).thenReturn([[element]])
+        self.assertEqual(self.finder.find('jquery:div:first'), element)
+        verify(self.browser).execute_script(FIND_MANY_SCRIPT, [
+            {'queries': [['sizzle', 'div:first']], 'tag': None,
+             'constraints': {}, 'limit': 1}], None)
+
+    def test_sc_locator_uses_runtime(self):
+        element = mock()
+        when(self.browser).execute_script(
+            CALL_SCRIPT, 5, 'scLocator', ['//Button[ID="b"]']).thenReturn(
+            element)
+        self.assertEqual(self.finder.find('scLocator://Button[ID="b"]'),
+                         element)
+
+    def test_sc_locator_not_found(self):
+        when(self.browser).execute_script(
+            CALL_SCRIPT, 5, 'scLocator', ['x']).thenReturn(None)
+        self.assertEqual(self.finder.find('scLocator:x', first_only=False,
+                                          required=False), [])
+
+
+@unittest.skipUnless(which('node') and isDisplayed_js,
+                     'Requires Node.js and the displayed atom.')
+class ElementStateTests(unittest.TestCase):
+    # Runs the runtime with Node.js using fake elements whose visibility is
+    # given in their `shown` attribute.
+    script = """
+var window = {};
+(function () { %s }).call(null, 5);
+function element(shown, text) {
+    return {shown: shown, innerText: text, readOnly: false,
+            matches: function () { return false; },
+            hasAttribute: function () { return false; }};
+}
+var call = window.__seleniumLibraryRuntime.call;
+console.log(JSON.stringify([call('elementState', [element(true, 'x')]),
+                            call('elementState', [element(false, 'y')]),
+                            call('elementState',
+                                 [element(true, 'a\\u00a0b\\u00a0')]),
+                            call('elementState',
+                                 [element(true, '\\n a b\\t')])]));
+"""
+
+    def test_text(self):
+        runtime = RUNTIME_SCRIPT.replace(
+            isDisplayed_js, 'function (element) { return element.shown; }')
+        output = subprocess.check_output(['node', '-e',
+                                          self.script % runtime])
+        shown, hidden, nbsp, spaces = json.loads(output.decode('UTF-8'))
+        self.assertEqual((shown['displayed'], shown['text']), (True, 'x'))
+        self.assertEqual((hidden['displayed'], hidden['text']), (False, ''))
+        self.assertEqual(nbsp['text'], 'a b')
+        self.assertEqual(spaces['text'], 'a b')
+
+
+@unittest.skipUnless(which('node'), 'Requires Node.js.')
+class SizzleFallbackTests(unittest.TestCase):
+    # Runs the selector engine used without jQuery with Node.js. The fake
+    # root supports only the native part of the selector.
+    script = """
+var window = {};
+(function () { %s }).call(null, 5);
+function item(name, size) {
+    return {name: name, offsetWidth: size, offsetHeight: size,
+            getClientRects: function () { return []; }};
+}
+var items = [item('shown', 10), item('hidden', 0)];
+var root = {querySelectorAll: function (css) {
+    if (css !== 'li:first-child') {
+        throw new Error('Invalid selector: ' + css);
+    }
+    return items;
+}};
+var found = window.__seleniumLibraryRuntime.call(
+    'sizzle', ['li:first-child:visible', root]);
+console.log(JSON.stringify(found.map(function (e) { return e.name; })));
+"""
+
+    def test_native_and_jquery_pseudo_classes(self):
+        output = subprocess.check_output(['node', '-e',
+                                          self.script % RUNTIME_SCRIPT])
+        self.assertEqual(json.loads(output.decode('UTF-8')), ['shown'])
@@ -51,5 +51,6 @@ class ElementFinderTest(unittest.TestCase):
         when(self.ctx.element_finder).find(
             'css=table', None, True, True, None).thenReturn(table)
         when(self.ctx.element_finder).find(
-            xpath[0], None, False, False, table).thenReturn(table_elements)
+            xpath[0], None, False, False, table, None, 0).thenReturn(
+            table_elements)
         self.finder._search_in_locators('css=table', xpath, 'content')
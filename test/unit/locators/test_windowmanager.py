@@ -228,6 +228,94 @@ class WindowManagerTests(unittest.TestCase):
         self.assertEqual([info.url for info in manager.get_window_infos()],
                          ['http://url.1', 'http://url.2', 'http://url.3'])
 
+    def test_window_infos_are_read_again_when_listed(self):
+        manager = WindowManagerWithMockBrowser(
+            {'handle': 'h1', 'name': 'win1', 'title': "Title 1", 'url': 'http://url.1'},
+            {'handle': 'h2', 'name': 'popup', 'title': "", 'url': 'about:blank'},
+            {'handle': 'h3', 'name': 'win3', 'title': "Title 3", 'url': 'http://url.3'}
+        )
+        manager.get_window_infos()
+        self.assertEqual(manager.switches, ['h2', 'h3', 'h1'])
+        manager.window_infos['h2'][2] = 'Popup'
+        manager.window_infos['h2'][3] = 'http://url.2'
+        infos = manager.get_window_infos()
+        self.assertEqual([info.title for info in infos],
+                         ['Title 1', 'Popup', 'Title 3'])
+        self.assertEqual([info.url for info in infos],
+                         ['http://url.1', 'http://url.2', 'http://url.3'])
+        self.assertEqual(manager.switches, ['h2', 'h3', 'h1'] * 2)
+
+    def test_select_uses_cached_window_infos(self):
+        manager = WindowManagerWithMockBrowser(
+            {'handle': 'h1', 'name': 'win1', 'title': "Title 1", 'url': 'http://url.1'},
+            {'handle': 'h2', 'name': 'win2', 'title': "Title 2", 'url': 'http://url.2'}
+        )
+        manager.get_window_infos()
+        del manager.switches[:]
+        manager.select('title=Title 2')
+        self.assertEqual(manager.switches, ['h2'])
+        manager.select('url=http://url.1')
+        manager.select('win2')
+        self.assertEqual(manager.switches, ['h2', 'h1', 'h2'])
+
+    def test_window_info_cache_is_invalidated(self):
+        manager = WindowManagerWithMockBrowser(
+            {'handle': 'h1', 'name': 'win1', 'title': "Title 1", 'url': 'http://url.1'},
+            {'handle': 'h2', 'name': 'win2', 'title': "Title 2", 'url': 'http://url.2'}
+        )
+        manager.get_window_infos()
+        manager.window_infos['h2'][2] = 'Changed'
+        manager.clear()
+        self.assertEqual([info.title for info in manager.get_window_infos()],
+                         ['Title 1', 'Changed'])
+        manager.window_infos['h2'][2] = 'Changed again'
+        manager.browser.window_handles.append('h3')
+        manager.window_infos['h3'] = ['undefined', 'win3', 'Title 3', 'http://url.3']
+        self.assertEqual([info.title for info in manager.get_window_infos()],
+                         ['Title 1', 'Changed again', 'Title 3'])
+
+    def test_outdated_window_info_is_refreshed_when_no_window_matches(self):
+        manager = WindowManagerWithMockBrowser(
+            {'handle': 'h1', 'name': 'win1', 'title': "Title 1", 'url': 'http://url.1'},
+            {'handle': 'h2', 'name': 'popup', 'title': "", 'url': 'about:blank'}
+        )
+        manager.get_window_infos()
+        manager.window_infos['h2'][2] = 'Popup'
+        manager.window_infos['h2'][3] = 'http://url.2'
+        manager.select('title=Popup')
+        self.assertEqual(manager.browser.current_window_handle, 'h2')
+        manager.select('title=Title 1')
+        manager.select('url=http://url.2')
+        self.assertEqual(manager.browser.current_window_handle, 'h2')
+        with self.assertRaises(ValueError):
+            manager.select('title=Missing')
+
+    def test_outdated_cached_title_is_not_selected(self):
+        manager = WindowManagerWithMockBrowser(
+            {'handle': 'h1', 'name': 'win1', 'title': "Title 1", 'url': 'http://url.1'},
+            {'handle': 'h2', 'name': 'win2', 'title': "Title 2", 'url': 'http://url.2'},
+            {'handle': 'h3', 'name': 'win3', 'title': "Title 3", 'url': 'http://url.3'}
+        )
+        manager.get_window_infos()
+        manager.window_infos['h2'][2] = 'Changed'
+        with self.assertRaises(ValueError):
+            manager.select('title=Title 2')
+        self.assertEqual(manager.browser.current_window_handle, 'h1')
+
+    def test_window_matching_after_cached_title_changed_is_selected(self):
+        manager = WindowManagerWithMockBrowser(
+            {'handle': 'h1', 'name': 'win1', 'title': "Title 1", 'url': 'http://url.1'},
+            {'handle': 'h2', 'name': 'win2', 'title': "Title 2", 'url': 'http://url.2'},
+            {'handle': 'h3', 'name': 'win3', 'title': "Title 3", 'url': 'http://url.3'}
+        )
+        manager.get_window_infos()
+        manager.window_infos['h2'][2] = 'Changed'
+        manager.window_infos['h3'][2] = 'Title 2'
+        manager.select('title=Title 2')
+        self.assertEqual(manager.browser.current_window_handle, 'h3')
+        manager.select('title=Changed')
+        self.assertEqual(manager.browser.current_window_handle, 'h2')
+
 
 class WindowManagerWithMockBrowser(WindowManager):
 
@@ -238,11 +326,13 @@ class WindowManagerWithMockBrowser(WindowManager):
 
     def _make_mock_browser(self, *window_specs):
         browser = mock()
+        browser.session_id = 'session'
         current_window = mock()
         browser.window_handles = []
-        window_infos = {}
+        self.switches = switches = []
+        self.window_infos = window_infos = {}
         for window_spec in window_specs:
-            handle = uuid.uuid4().hex
+            handle = window_spec.get('handle') or uuid.uuid4().hex
             browser.window_handles.append(handle)
             id_ = window_spec.get('id')
             if not id_:
@@ -257,7 +347,8 @@ class WindowManagerWithMockBrowser(WindowManager):
 
         def window(handle_):
             if handle_ in browser.window_handles:
-                browser.session_id = handle_
+                browser.current_window_handle = handle_
+                switches.append(handle_)
                 current_window.name = window_infos[handle_][1]
                 browser.current_window = current_window
                 browser.title = window_infos[handle_][2]
@@ -268,9 +359,14 @@ class WindowManagerWithMockBrowser(WindowManager):
         browser.switch_to = switch_to
 
         def execute_script(script):
-            handle_ = browser.session_id
+            self.scripts += 1
+            handle_ = browser.current_window_handle
             if handle_ in browser.window_handles:
                 return window_infos[handle_][:2]
 
         browser.execute_script = execute_script
+        self.scripts = 0
+        if browser.window_handles:
+            window(browser.window_handles[0])
+            del switches[:]
         return browser
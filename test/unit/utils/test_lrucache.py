@@ -0,0 +1,38 @@
+import unittest
+
+from SeleniumLibrary.utils import LRUCache
+
+
+class LRUCacheTests(unittest.TestCase):
+
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        self.assertEqual(cache.get('a'), None)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', 'default'), 'default')
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_least_recently_used_item_is_dropped(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+    def test_clear_keeps_statistics(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.clear()
+        self.assertEqual(cache.info(), (1, 0, 512, 0))
+
+    def test_delete(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.delete('a')
+        cache.delete('b')
+        self.assertNotIn('a', cache)
@@ -0,0 +1,46 @@
+import unittest
+
+from SeleniumLibrary.utils import PollStrategy
+
+
+class PollStrategyTests(unittest.TestCase):
+
+    def test_default_is_fixed_interval(self):
+        self.assertEqual(self._intervals(PollStrategy()), [0.2] * 4)
+
+    def test_backoff_and_max_interval(self):
+        strategy = PollStrategy('50 ms', 2, '0.3s')
+        self.assertEqual(self._intervals(strategy), [0.05, 0.1, 0.2, 0.3])
+
+    def test_jitter(self):
+        for interval in self._intervals(PollStrategy(1, jitter=0.1), 50):
+            self.assertTrue(0.9 <= interval <= 1.1, interval)
+
+    def test_parse(self):
+        self.assertEqual(PollStrategy.parse('backoff=2, initial=0.1'),
+                         PollStrategy(0.1, 2))
+        self.assertEqual(PollStrategy.parse('max interval=1 s, jitter=0.5'),
+                         PollStrategy(max_interval=1, jitter=0.5))
+        self.assertEqual(PollStrategy.parse(''), PollStrategy())
+
+    def test_string_can_be_parsed(self):
+        strategy = PollStrategy(0.1, 1.5, 2, 0.2)
+        self.assertEqual(PollStrategy.parse(str(strategy)), strategy)
+
+    def test_invalid(self):
+        for kwargs in [{'initial': 0}, {'backoff': 0.5},
+                       {'initial': 1, 'max_interval': 0.5},
+                       {'jitter': 1}, {'jitter': -0.1}]:
+            with self.assertRaises(ValueError):
+                PollStrategy(**kwargs)
+        for string in ['initial', 'interval=1', 'initial=1 backoff=2']:
+            with self.assertRaises(ValueError):
+                PollStrategy.parse(string)
+
+    def _intervals(self, strategy, count=4):
+        intervals = strategy.intervals()
+        return [round(next(intervals), 6) for _ in range(count)]
+
+
+if __name__ == '__main__':
+    unittest.main()